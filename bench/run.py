@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+#
+#
+
+import sys
+from argparse import ArgumentParser
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from json import dump, load
+from os import chdir, environ, getcwd
+from os.path import abspath, dirname, join
+from platform import platform, python_version
+from statistics import median
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from synthetic import Project
+
+from changelet import __version__
+from changelet import config as config_module
+from changelet.command.bump import Bump
+from changelet.config import Config
+from changelet.entry import Entry
+from changelet.history import ChangelogIndex
+from changelet.main import build_parser
+from changelet.replay import ReplayGitHubCli
+
+# the repo, for running the CLI from it
+ROOT = dirname(dirname(abspath(__file__)))
+DEFAULT_SIZES = (1000, 10000)
+
+
+@contextmanager
+def cwd(directory):
+    # changelet's paths are relative to the cwd
+    original = getcwd()
+    chdir(directory)
+    try:
+        yield
+    finally:
+        chdir(original)
+
+
+def config(project):
+    return Config(
+        directory='.changelog',
+        module=project.module,
+        cache_dir=False,
+        provider={
+            'class': ReplayGitHubCli,
+            'fixture': project.fixture,
+            'max_lookback': project.count,
+        },
+    )
+
+
+def bench_load_all(project):
+    # cold, nothing parsed and no PRs fetched yet
+    Entry._parsed.clear()
+    cfg = config(project)
+    start = perf_counter()
+    Entry.load_all(cfg)
+    return perf_counter() - start
+
+
+def bench_load_all_warm(project):
+    # parsed entries & PRs are reused, e.g. by serve
+    cfg = config(project)
+    Entry.load_all(cfg)
+    start = perf_counter()
+    Entry.load_all(cfg)
+    return perf_counter() - start
+
+
+def bench_bump(project):
+    # a full preview, loading through rendering, w/the output discarded
+    Entry._parsed.clear()
+    cfg = config(project)
+    args = build_parser(['changelet', 'bump']).parse_args(['bump'])
+    start = perf_counter()
+    with redirect_stdout(StringIO()):
+        try:
+            Bump().run(args, cfg)
+        except SystemExit:
+            pass
+    return perf_counter() - start
+
+
+def bench_config_build(project):
+    # parsing the config, not the process level cache of it
+    config_module._parsed.clear()
+    start = perf_counter()
+    Config.build(root='.')
+    return perf_counter() - start
+
+
+def bench_prs_index(project):
+    provider = config(project).provider
+    start = perf_counter()
+    provider.prs(root='.', directory='.changelog')
+    return perf_counter() - start
+
+
+def bench_changelog_index(project):
+    ChangelogIndex._cache.clear()
+    start = perf_counter()
+    ChangelogIndex.load('CHANGELOG.md').read('0.1.0')
+    return perf_counter() - start
+
+
+def bench_cli_cold_start(project):
+    # a fresh interpreter through to a minimal command
+    env = dict(environ, PYTHONPATH=ROOT)
+    start = perf_counter()
+    run(
+        [sys.executable, '-m', 'changelet.main', 'show', '0.1.0'],
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+    return perf_counter() - start
+
+
+# name -> (function, scales w/the number of entries)
+BENCHMARKS = {
+    'entries.load_all': (bench_load_all, True),
+    'entries.load_all_warm': (bench_load_all_warm, True),
+    'bump.preview': (bench_bump, True),
+    'github.prs_index': (bench_prs_index, True),
+    'config.build': (bench_config_build, False),
+    'history.index': (bench_changelog_index, False),
+    'cli.cold_start': (bench_cli_cold_start, False),
+}
+
+
+def measure(func, project, repeat):
+    # a discarded warm up run so that one-time costs, e.g. importing yaml,
+    # don't skew the results
+    func(project)
+    times = [func(project) for _ in range(repeat)]
+    return {
+        'median': median(times),
+        'min': min(times),
+        'max': max(times),
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(sizes, repeat, selected=None, log=sys.stderr):
+    results = {}
+    with TemporaryDirectory() as td:
+        for i, size in enumerate(sorted(sizes)):
+            log.write(f'generating {size} entries\n')
+            root = join(td, str(size))
+            project = Project(root, size).generate()
+            with cwd(root):
+                for name, (func, scales) in BENCHMARKS.items():
+                    if selected and name not in selected:
+                        continue
+                    if not scales and i:
+                        # only needs running once
+                        continue
+                    key = f'{name}[{size}]' if scales else name
+                    log.write(f'  {key}\n')
+                    results[key] = measure(func, project, repeat)
+    return {
+        'meta': {
+            'changelet': __version__,
+            'python': python_version(),
+            'platform': platform(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'sizes': sorted(sizes),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    # (name, baseline median, current median, ratio, regressed) for each
+    # benchmark in both, regressed when it's slowed by more than threshold
+    ret = []
+    for name, result in current['results'].items():
+        try:
+            before = baseline['results'][name]['median']
+        except KeyError:
+            continue
+        after = result['median']
+        ratio = after / before if before else float('inf')
+        ret.append((name, before, after, ratio, ratio > 1 + threshold))
+    return ret
+
+
+def report(results, fh):
+    fh.write(f'{"Benchmark":<32} {"Median":>11} {"Min":>11} {"Max":>11}\n')
+    for name, r in results['results'].items():
+        fh.write(
+            f'{name:<32} {r["median"] * 1000:>8.1f} ms {r["min"] * 1000:>8.1f} '
+            f'ms {r["max"] * 1000:>8.1f} ms\n'
+        )
+
+
+def report_comparison(comparison, fh):
+    fh.write(
+        f'{"Benchmark":<32} {"Baseline":>11} {"Current":>11} {"Change":>8}\n'
+    )
+    for name, before, after, ratio, regressed in comparison:
+        flag = '  REGRESSION' if regressed else ''
+        fh.write(
+            f'{name:<32} {before * 1000:>8.1f} ms {after * 1000:>8.1f} ms '
+            f'{(ratio - 1) * 100:>+7.1f}%{flag}\n'
+        )
+
+
+def main(argv=sys.argv):
+    parser = ArgumentParser(
+        description='Benchmarks changelet against synthetic projects'
+    )
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_SIZES,
+        help=f'Numbers of entries to generate, Default: {" ".join(str(s) for s in DEFAULT_SIZES)}, e.g. add 100000 for the largest',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Runs of each benchmark, the median is used, Default: 5',
+    )
+    parser.add_argument(
+        '--benchmark',
+        dest='benchmarks',
+        action='append',
+        choices=sorted(BENCHMARKS),
+        help='Only run the named benchmark, may be repeated, Default: all',
+    )
+    parser.add_argument(
+        '--save', metavar='FILE', help='Write the results to FILE as JSON'
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='FILE',
+        help='Compare the results w/a baseline previously written w/--save',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help='Slow down, as a fraction of the baseline, beyond which --compare flags a regression, Default: 0.25',
+    )
+    args = parser.parse_args(argv[1:])
+
+    results = run_benchmarks(args.sizes, args.repeat, args.benchmarks)
+    report(results, sys.stdout)
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            dump(results, fh, indent=2)
+            fh.write('\n')
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = load(fh)
+        comparison = compare(baseline, results, args.threshold)
+        sys.stdout.write('\n')
+        report_comparison(comparison, sys.stdout)
+        if any(c[-1] for c in comparison):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#
+#
+#
+
+from datetime import datetime, timedelta, timezone
+from json import dump, dumps
+from os import makedirs
+from os.path import join
+from random import Random
+from uuid import UUID
+
+TYPES = ('major', 'minor', 'minor', 'patch', 'patch', 'patch', 'none')
+WORDS = (
+    'add',
+    'fix',
+    'support',
+    'records',
+    'provider',
+    'zone',
+    'handling',
+    'when',
+    'missing',
+    'values',
+    'config',
+    'option',
+)
+
+
+class Project:
+    # a synthetic project on disk: a module w/__version__, a .changelog
+    # directory w/count entries, a CHANGELOG.md w/releases sections, and a
+    # replay fixture w/the gh responses for the PRs that merged the entries
+
+    def __init__(self, root, count, releases=1000, seed=42):
+        self.root = root
+        self.count = count
+        self.directory = join(root, '.changelog')
+        self.module = 'synthetic_project'
+        self.changelog = join(root, 'CHANGELOG.md')
+        self.fixture = join(root, 'replay.json')
+        self.releases = releases
+        self._random = Random(seed)
+
+    def _description(self):
+        words = self._random.choices(WORDS, k=self._random.randint(3, 12))
+        return ' '.join(words).capitalize()
+
+    def generate(self):
+        random = self._random
+        makedirs(self.directory)
+        makedirs(join(self.root, self.module))
+        with open(join(self.root, self.module, '__init__.py'), 'w') as fh:
+            fh.write("__version__ = '1.0.0'\n")
+        with open(join(self.root, '.changelet.yaml'), 'w') as fh:
+            fh.write('directory: .changelog\ncache_dir: false\n')
+
+        merged_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        prs = []
+        for i in range(self.count):
+            filename = f'{UUID(int=random.getrandbits(128)).hex}.md'
+            number = i + 1
+            lines = ['---', f'type: {random.choice(TYPES)}']
+            if i % 2:
+                # half reference their PR explicitly, the rest are looked up
+                # by filename
+                lines.append(f'pr: {number}')
+            lines.extend(('---', self._description(), ''))
+            with open(join(self.directory, filename), 'w') as fh:
+                fh.write('\n'.join(lines))
+            prs.append(
+                {
+                    'number': number,
+                    'mergedAt': (merged_at + timedelta(minutes=i)).isoformat(),
+                    'files': [
+                        {'path': f'.changelog/{filename}'},
+                        {'path': f'{self.module}/file{i % 50}.py'},
+                    ],
+                }
+            )
+
+        # in the format ReplayGitHubCli reads
+        calls = [
+            {
+                'cmd': cmd,
+                'input': None,
+                'returncode': 0,
+                'stdout': dumps(stdout),
+                'stderr': None,
+                'binary': True,
+                'duration': 0,
+            }
+            for cmd, stdout in (
+                (
+                    ['gh', 'repo', 'view', '--json', 'nameWithOwner'],
+                    {'nameWithOwner': 'octodns/synthetic'},
+                ),
+                (self.pr_list_cmd(len(prs)), prs[::-1]),
+            )
+        ]
+        with open(self.fixture, 'w') as fh:
+            dump({'version': 1, 'calls': calls}, fh)
+
+        with open(self.changelog, 'w') as fh:
+            for i in range(self.releases, 0, -1):
+                date = (merged_at - timedelta(days=i)).strftime('%Y-%m-%d')
+                fh.write(f'## 0.{i}.0 - {date}\n\nMinor:\n')
+                for _ in range(random.randint(2, 8)):
+                    fh.write(f'* {self._description()} - [#{i}](http://x)\n')
+                fh.write('\n')
+        return self
+
+    def pr_list_cmd(self, limit):
+        return [
+            'gh',
+            'pr',
+            'list',
+            '--base',
+            'main',
+            '--state',
+            'merged',
+            f'--limit={limit}',
+            '--json',
+            'files,mergedAt,number',
+        ]
@@ -0,0 +1,350 @@
+#
+#
+#
+
+from contextlib import contextmanager
+from datetime import datetime
+from os import makedirs
+from os.path import join
+from uuid import uuid4
+
+from .config import Config
+from .entry import Entry
+
+
+class ChangeletException(Exception):
+    pass
+
+
+class Release:
+
+    def __init__(self, current_version, version, entries, notes):
+        self.current_version = current_version
+        self.version = version
+        self.entries = entries
+        # format name -> rendered release notes
+        self.notes = notes
+
+    def __repr__(self):
+        return f'Release<{self.current_version} -> {self.version}, {len(self.entries)}>'
+
+
+# frozenset(kwargs) -> (signature, Config)
+_configs = {}
+
+
+def config(**kwargs):
+    # Configs, and with them their providers and PR indexes, are built once
+    # per distinct set of arguments and shared by every call in the process.
+    # they're rebuilt when any of the files they were built from change, PRs
+    # merged since they were fetched need a reset
+    key = frozenset(kwargs.items())
+    signature = Config.signature(**kwargs)
+    try:
+        cached_signature, ret = _configs[key]
+        if cached_signature == signature:
+            return ret
+    except KeyError:
+        pass
+    ret = Config.build(**kwargs)
+    _configs[key] = (signature, ret)
+    return ret
+
+
+def reset(config):
+    # drops the PRs, and indexes, that config's provider has fetched so that
+    # they're rebuilt, e.g. to pick up newly merged PRs, on next use
+    reset = getattr(config.provider, 'reset', None)
+    if reset is not None:
+        reset()
+
+
+@contextmanager
+def _reading(what):
+    # the things that can go wrong reading entries and versions, e.g. a
+    # module that can't be imported, bad front matter, or a failed PR lookup,
+    # as ChangeletExceptions
+    from subprocess import CalledProcessError
+
+    try:
+        yield
+    except ChangeletException:
+        raise
+    except (
+        AttributeError,
+        CalledProcessError,
+        ImportError,
+        IndexError,
+        KeyError,
+        OSError,
+        SyntaxError,
+        TypeError,
+        ValueError,
+    ) as e:
+        raise ChangeletException(f'Unable to read {what}: {e}')
+    except Exception as e:
+        # only imported when front matter needed it
+        from yaml import YAMLError
+
+        if isinstance(e, YAMLError):
+            raise ChangeletException(f'Unable to read {what}: {e}')
+        raise
+
+
+def _load_ref(config, ref):
+    from subprocess import CalledProcessError
+
+    from .command.bump import _load_ref
+
+    with _reading(ref):
+        try:
+            return _load_ref(config, ref)
+        except CalledProcessError as e:
+            raise ChangeletException(f'Unable to read {ref}: {e}')
+        except ValueError as e:
+            raise ChangeletException(str(e))
+
+
+def load_entries(config, ref=None):
+    # highest impact first, the order releases are built in. with ref they're
+    # read out of git as of it rather than from the working tree
+    if ref is not None:
+        return _load_ref(config, ref)[1]
+    with _reading(config.directory):
+        return sorted(Entry.load_all(config), reverse=True)
+
+
+def current_version(config):
+    # read from config.root's source, not imported, so that it's neither
+    # stale after a bump nor shared by other repos' modules w/the same name
+    from .command.bump import _get_current_version
+
+    with _reading(f'the version of {config.module}'):
+        return _get_current_version(config.module, config.root or '.')
+
+
+def next_version(config, entries=None, current=None):
+    from .command.bump import _get_new_version
+
+    if entries is None:
+        entries = load_entries(config)
+    if current is None:
+        current = current_version(config)
+    return _get_new_version(current, entries)
+
+
+def render_notes(
+    config, version, entries=None, title=None, formats=('markdown',), date=None
+):
+    from .render import render
+
+    if entries is None:
+        entries = load_entries(config)
+    if date is None:
+        date = datetime.now().strftime('%Y-%m-%d')
+    try:
+        return render(
+            version=version,
+            entries=entries,
+            date=date,
+            title=title,
+            names=formats,
+            templates=config.templates,
+        )
+    except ValueError as e:
+        raise ChangeletException(str(e))
+
+
+def release(config, version=None, title=None, formats=('markdown',), ref=None):
+    # what `changelet bump` would do, w/o making any changes
+    if ref is None:
+        current = current_version(config)
+        entries = load_entries(config)
+    else:
+        current, entries = _load_ref(config, ref)
+    if version is None:
+        version = next_version(config, entries=entries, current=current)
+        if version is None:
+            raise ChangeletException(
+                'No changelog entries found that would bump'
+            )
+    notes = render_notes(
+        config, version, entries=entries, title=title, formats=formats
+    )
+    return Release(
+        current_version=current, version=version, entries=entries, notes=notes
+    )
+
+
+def check(config, changed_files=None):
+    # the changelog entries the current branch adds, empty when it has none.
+    # with changed_files, paths or a dict of path -> status, e.g. from
+    # changes.changed_files, git isn't consulted
+    if changed_files is not None:
+        from .changes import added_files, changelog_entries
+
+        if isinstance(changed_files, dict):
+            changed_files = added_files(changed_files)
+        return changelog_entries(changed_files, config.directory)
+    return config.provider.changelog_entries_in_branch(
+        root=config.root, directory=config.directory
+    )
+
+
+def _directories(config, packages=None):
+    # the changelog directories, each workspace package's, optionally limited
+    # to the named ones, or just config's
+    if not config.packages:
+        return [config.directory]
+    from .workspace import WorkspaceException, package_configs
+
+    try:
+        configs = package_configs(config, packages)
+    except WorkspaceException as e:
+        raise ChangeletException(str(e))
+    return [c.directory for _, c in configs]
+
+
+def check_refs(config, refs, packages=None, max_workers=None):
+    # a result per ref, in order, each a dict w/ref, ok, and the entries it
+    # adds relative to base, or an error when it couldn't be compared. all of
+    # the refs are evaluated together in a single process. in a workspace any
+    # of the packages having an entry will do
+    added = config.provider.changelog_entries_in_refs(
+        root=config.root,
+        directories=_directories(config, packages),
+        refs=refs,
+        max_workers=max_workers,
+    )
+    ret = []
+    for ref, entries in added.items():
+        if entries is None:
+            ret.append(
+                {'ref': ref, 'ok': False, 'error': f'Unable to resolve {ref}'}
+            )
+        else:
+            ret.append(
+                {'ref': ref, 'ok': bool(entries), 'entries': sorted(entries)}
+            )
+    return ret
+
+
+def lint(config, packages=None, max_workers=None):
+    # the problems w/all of the pending entries, each a LintError w/filename,
+    # line, and message, empty when they're all good
+    from .lint import lint
+
+    return lint(_directories(config, packages), max_workers=max_workers)
+
+
+def missing_entries(config, changed_files=None, packages=None):
+    # the changelog directories, from sources or packages in the config,
+    # optionally limited to the named packages, that have changes but no new
+    # entry. with changed_files, paths or a dict of path -> status, git isn't
+    # consulted, otherwise a single diff covers everything
+    from .changes import added_files, missing_entries
+    from .workspace import WorkspaceException, sources
+
+    try:
+        pairs = sources(config, packages)
+    except WorkspaceException as e:
+        raise ChangeletException(str(e))
+    if not pairs:
+        raise ChangeletException('No sources or packages in the config')
+
+    if changed_files is None:
+        changed_files = config.provider.changed_files()
+    if isinstance(changed_files, dict):
+        added = added_files(changed_files)
+    else:
+        added = changed_files
+    return missing_entries(pairs, changed_files, added)
+
+
+def create(config, type, description, pr=None, add=False, commit=False):
+    if not description:
+        raise ChangeletException('description is required')
+    if commit:
+        staged = config.provider.staged_changelog_entry(config.directory)
+        if staged:
+            raise ChangeletException(
+                f'A changelog entry is already staged ({staged})'
+            )
+
+    try:
+        entry = Entry(
+            type=type,
+            description=description,
+            pr=pr,
+            filename=join(config.directory, f'{uuid4().hex}.md'),
+        )
+    except ValueError:
+        raise ChangeletException(f'Invalid type "{type}"')
+    entry.save()
+
+    if add or commit:
+        if commit:
+            has_other_staged = config.provider.has_staged()
+        config.provider.add_file(entry.filename)
+        if commit:
+            if not has_other_staged:
+                # if this is going to be a changelog only commit, prefix it
+                description = f'{config.commit_prefix}{description}'
+            config.provider.commit(description)
+
+    return entry
+
+
+def create_many(config, specs, add=False, commit=False):
+    # specs is an iterable of dicts with type, description, and optionally pr.
+    # all of them are validated before anything is written and then staged
+    # with a single git add and committed once
+    entries = []
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ChangeletException(f'entry {i}: not an object')
+        try:
+            description = spec['description']
+            if not isinstance(description, str):
+                raise ChangeletException('description must be a string')
+            if not description:
+                raise ChangeletException('description is required')
+            entries.append(
+                Entry(
+                    type=spec['type'],
+                    description=description,
+                    pr=spec.get('pr'),
+                    filename=join(config.directory, f'{uuid4().hex}.md'),
+                )
+            )
+        except KeyError as e:
+            raise ChangeletException(f'entry {i}: missing {e}')
+        except ValueError:
+            raise ChangeletException(
+                f'entry {i}: invalid type "{spec["type"]}"'
+            )
+        except ChangeletException as e:
+            raise ChangeletException(f'entry {i}: {e}')
+
+    if commit:
+        staged = config.provider.staged_changelog_entry(config.directory)
+        if staged:
+            raise ChangeletException(
+                f'A changelog entry is already staged ({staged})'
+            )
+
+    makedirs(config.directory, exist_ok=True)
+    for entry in entries:
+        entry.save()
+
+    if entries and (add or commit):
+        if commit:
+            has_other_staged = config.provider.has_staged()
+        config.provider.add_files([e.filename for e in entries])
+        if commit:
+            description = f'Add {len(entries)} changelog entries'
+            if not has_other_staged:
+                description = f'{config.commit_prefix}{description}'
+            config.provider.commit(description)
+
+    return entries
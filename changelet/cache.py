@@ -0,0 +1,69 @@
+#
+#
+#
+
+from json import dump, load
+from os import environ, makedirs, remove, replace
+from os.path import abspath, basename, expanduser, join
+from zlib import crc32
+
+
+def default_cache_dir(root):
+    # per-project directory under the user's cache dir, outside of the working
+    # tree so it never shows up as a local change
+    base = environ.get('XDG_CACHE_HOME') or join(expanduser('~'), '.cache')
+    root = abspath(root or '.')
+    # crc32 rather than a cryptographic hash as this is on the start up path
+    # and only needs to tell projects apart
+    key = f'{basename(root)}-{crc32(root.encode("utf-8")):08x}'
+    return join(base, 'changelet', key)
+
+
+class Cache:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _filename(self, name):
+        return join(self.directory, f'{name}.json')
+
+    def load(self, name):
+        try:
+            with open(self._filename(name)) as fh:
+                return load(fh)
+        except (OSError, ValueError):
+            # missing, unreadable, or corrupt entries are all just misses
+            return None
+
+    def store(self, name, data):
+        from tempfile import NamedTemporaryFile
+
+        # write to a temp file and move it into place so that readers never
+        # see a partial entry
+        fh = None
+        try:
+            makedirs(self.directory, exist_ok=True)
+            with NamedTemporaryFile(
+                'w', dir=self.directory, suffix='.tmp', delete=False
+            ) as fh:
+                dump(data, fh)
+            replace(fh.name, self._filename(name))
+        except OSError:
+            # caching is best-effort, e.g. an unwritable cache dir just means
+            # nothing is cached
+            if fh is not None:
+                try:
+                    remove(fh.name)
+                except OSError:
+                    pass
+            return False
+        return True
+
+    def remove(self, name):
+        try:
+            remove(self._filename(name))
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return f'Cache<{self.directory}>'
@@ -0,0 +1,129 @@
+#
+#
+#
+
+from json import load
+from os.path import dirname, normpath
+
+# GitHub API file status -> git status letter, anything else is a change
+_STATUSES = {'added': 'A', 'removed': 'D'}
+
+
+def _status(item):
+    # plain paths, e.g. from a previous step, are taken to be added, objects
+    # have path or filename and optionally status, e.g. from the GitHub API's
+    # pull request files
+    if isinstance(item, str):
+        return item, 'A'
+    path = item.get('path') or item.get('filename')
+    status = item.get('status')
+    return path, _STATUSES.get(status, 'M') if status else 'A'
+
+
+def changed_files(data):
+    # path -> status letter, A for added, M for changed, D for removed, like
+    # GitHubCli.changed_files, from a JSON document, which may be
+    #   - a list of paths or of objects w/path or filename, and status
+    #   - an object w/a files list of either of those
+    if isinstance(data, dict):
+        if 'commits' in data:
+            # push events only list the commits pushed, not everything that
+            # the branch changes, so they can't say whether it has an entry
+            raise ValueError(
+                'Push events only list the pushed commits, not the branch\'s '
+                'changes, use --changed-files'
+            )
+        if 'files' in data:
+            data = data['files']
+        elif 'pull_request' in data:
+            # pull request events don't list their files
+            raise ValueError(
+                'Pull request events don\'t list changed files, use '
+                '--changed-files or --fetch-pr-files'
+            )
+        else:
+            raise ValueError('No changed files found in JSON')
+    if not isinstance(data, list):
+        raise ValueError('No changed files found in JSON')
+    ret = {}
+    for item in data:
+        path, status = _status(item)
+        if path:
+            ret[path] = status
+    return ret
+
+
+def added_files(statuses):
+    return [p for p, s in statuses.items() if s == 'A']
+
+
+def load_changed_files(fh, provider=None):
+    # with provider the files of pull request events are fetched from GitHub
+    try:
+        data = load(fh)
+        if provider is not None and isinstance(data, dict):
+            number = data.get('pull_request', {}).get('number')
+            if number is not None:
+                repo = data.get('repository', {}).get('full_name')
+                data = provider.pr_files(number, repo=repo)
+        return changed_files(data)
+    except (AttributeError, TypeError):
+        raise ValueError('Unrecognized changed files JSON')
+
+
+def changelog_entries(paths, directory):
+    # the changelog entries, directly in directory, among paths
+    prefix = f'{directory}/'
+    return {
+        p
+        for p in paths
+        if p.startswith(prefix)
+        and p.endswith('.md')
+        and '/' not in p[len(prefix) :]
+    }
+
+
+def _parts(path):
+    return [p for p in path.split('/') if p and p != '.']
+
+
+class PrefixTrie:
+    # maps path prefixes, a component at a time, to values so that the most
+    # specific prefix of a path can be found in a single walk
+
+    def __init__(self, items=()):
+        self._root = {}
+        for prefix, value in items:
+            self[prefix] = value
+
+    def __setitem__(self, prefix, value):
+        node = self._root
+        for part in _parts(prefix):
+            node = node.setdefault(part, {})
+        # None is never a path component
+        node[None] = value
+
+    def longest(self, path):
+        node = self._root
+        ret = node.get(None)
+        for part in _parts(path):
+            try:
+                node = node[part]
+            except KeyError:
+                break
+            ret = node.get(None, ret)
+        return ret
+
+
+def missing_entries(sources, changed, added):
+    # sources is an iterable of (source path prefix, changelog directory).
+    # returns the directories, sorted, whose sources have changes but that
+    # have no new entries
+    trie = PrefixTrie(sources)
+    touched = set()
+    for path in changed:
+        directory = trie.longest(path)
+        if directory is not None:
+            touched.add(directory)
+    have = {normpath(dirname(p)) for p in added if p.endswith('.md')}
+    return sorted(d for d in touched if normpath(d) not in have)
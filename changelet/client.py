@@ -0,0 +1,74 @@
+#
+#
+#
+
+from json import dumps, loads
+from os import environ, getcwd
+from os.path import exists, join
+
+SOCKET_NAME = 'serve.sock'
+
+
+def socket_path(config):
+    if not config.cache_dir:
+        return None
+    return join(config.cache_dir, SOCKET_NAME)
+
+
+def forwardable(args):
+    # only things that are safe to answer from a long-lived process, anything
+    # interactive or that makes release changes is always run locally
+    command = args.command
+    if command == 'check':
+        # stdin and GITHUB_EVENT_PATH are only available locally
+        return not (args.github_event or args.changed_files == '-')
+    if command == 'create':
+        # staging & committing are git changes, left to the local process
+        if args.add or args.commit or args.continue_:
+            return False
+        return args.from_file != '-'
+    if command == 'bump':
+        return not (args.make_changes or args.pr or args.edit)
+    return False
+
+
+def request(path, argv):
+    # imported on use, most runs never get this far
+    from socket import AF_UNIX, SHUT_WR, SOCK_STREAM, socket
+
+    with socket(AF_UNIX, SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            # not running, e.g. a stale socket left behind
+            return None
+        payload = {
+            'argv': list(argv),
+            'cwd': getcwd(),
+            'env': {
+                k: v for k, v in environ.items() if k.startswith('CHANGELET_')
+            },
+        }
+        sock.sendall(dumps(payload).encode('utf-8') + b'\n')
+        sock.shutdown(SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    response = loads(b''.join(chunks))
+    if response.get('code') is None:
+        # the server declined, e.g. it's serving a different directory
+        return None
+    return response
+
+
+def forward(argv, args, config):
+    if environ.get('CHANGELET_NO_SERVE'):
+        return None
+    # most of the time nothing's running
+    path = socket_path(config)
+    if not path or not exists(path) or not forwardable(args):
+        return None
+    return request(path, argv)
@@ -2,17 +2,56 @@
 #
 #
 
-from .bump import Bump
-from .check import Check
-from .create import Create
+from collections.abc import MutableMapping
+from importlib import import_module
 
-commands = {}
 
+class Commands(MutableMapping):
+    # commands are registered by dotted path so that only the one actually
+    # being run has its module, and that module's dependencies, imported. They
+    # are imported and instantiated on first access.
 
-def register(klass):
-    commands[klass.name] = klass()
+    def __init__(self):
+        self._commands = {}
 
+    def __getitem__(self, name):
+        command = self._commands[name]
+        if isinstance(command, str):
+            module, klass = command.rsplit('.', 1)
+            command = getattr(import_module(module), klass)()
+            self._commands[name] = command
+        return command
 
-register(Bump)
-register(Check)
-register(Create)
+    def __setitem__(self, name, command):
+        self._commands[name] = command
+
+    def __delitem__(self, name):
+        del self._commands[name]
+
+    def __iter__(self):
+        return iter(self._commands)
+
+    def __len__(self):
+        return len(self._commands)
+
+
+commands = Commands()
+
+
+def register(klass, name=None):
+    if isinstance(klass, str):
+        # dotted path, e.g. changelet.command.bump.Bump, name is required
+        commands[name] = klass
+    else:
+        commands[klass.name] = klass()
+
+
+register('changelet.command.batch.Batch', 'batch')
+register('changelet.command.bump.Bump', 'bump')
+register('changelet.command.check.Check', 'check')
+register('changelet.command.create.Create', 'create')
+register('changelet.command.history.History', 'history')
+register('changelet.command.import_.Import', 'import')
+register('changelet.command.lint.Lint', 'lint')
+register('changelet.command.serve.Serve', 'serve')
+register('changelet.command.show.Show', 'show')
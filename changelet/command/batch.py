@@ -0,0 +1,114 @@
+#
+#
+#
+
+import sys
+from json import dumps, loads
+from sys import exit
+
+from changelet import api
+
+
+class Batch:
+    name = 'batch'
+    description = (
+        'Reads newline-delimited JSON operations, create, check, and preview, '
+        'from stdin, runs them in a single process, and writes a JSON result '
+        'line for each as it completes.'
+    )
+
+    def configure(self, parser):
+        parser.add_argument(
+            '--stop-on-error',
+            action='store_true',
+            default=False,
+            help='Stop at the first operation that fails',
+        )
+
+    def exit(self, code):
+        exit(code)
+
+    def _create(self, config, op):
+        entry = api.create(
+            config,
+            type=op['type'],
+            description=op['description'],
+            pr=op.get('pr'),
+            add=op.get('add', False),
+            commit=op.get('commit', False),
+        )
+        return {
+            'filename': entry.filename,
+            'type': entry.type.value,
+            'description': entry.description,
+        }
+
+    def _check(self, config, op):
+        return {'entries': sorted(api.check(config))}
+
+    def _preview(self, config, op):
+        release = api.release(
+            config,
+            version=op.get('version'),
+            title=op.get('title'),
+            formats=op.get('formats', ('markdown',)),
+        )
+        return {
+            'current_version': str(release.current_version),
+            'version': str(release.version),
+            'notes': release.notes,
+        }
+
+    def execute(self, config, line):
+        try:
+            op = loads(line)
+            name = op['op']
+        except ValueError as e:
+            return {'error': f'invalid JSON: {e}'}
+        except (KeyError, TypeError):
+            return {'error': 'missing op'}
+
+        ret = {'op': name}
+        if 'id' in op:
+            # passed through so callers can match up results
+            ret['id'] = op['id']
+        ops = {
+            'create': self._create,
+            'check': self._check,
+            'preview': self._preview,
+        }
+        try:
+            method = ops[name]
+        except (KeyError, TypeError):
+            ret['error'] = f'unknown op "{name}"'
+            return ret
+        try:
+            ret['result'] = method(config, op)
+        except KeyError as e:
+            ret['error'] = f'missing {e}'
+        except api.ChangeletException as e:
+            ret['error'] = str(e)
+        except Exception as e:
+            # anything else fails just this op, the rest still run
+            ret['error'] = f'{e.__class__.__name__}: {e}'
+        return ret
+
+    def run(self, args, config, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+
+        failed = 0
+        for line in stdin:
+            if not line.strip():
+                continue
+            result = self.execute(config, line)
+            stdout.write(dumps(result))
+            stdout.write('\n')
+            # results are streamed as each operation completes
+            stdout.flush()
+            if 'error' in result:
+                failed += 1
+                if args.stop_on_error:
+                    break
+
+        self.exit(1 if failed else 0)
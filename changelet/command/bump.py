@@ -2,23 +2,36 @@
 #
 #
 
+import sys
 from datetime import datetime
 from hashlib import sha256
 from importlib import import_module
-from io import StringIO
 from os import environ, fdopen, unlink
 from os.path import join
+from re import MULTILINE
+from re import compile as re_compile
 from shlex import split as shlex_split
-from subprocess import Popen
-from sys import exit, path, stderr
+from subprocess import CalledProcessError, Popen
+from sys import exit, path
 from tempfile import mkstemp
 
 from semver import Version
 
 from changelet.entry import Entry, EntryType
+from changelet.history import ChangelogIndex
+from changelet.release import ReleaseCache
+from changelet.render import FORMATS, render
+from changelet.timings import phase
 
 
 def _get_current_version(module_name, directory='.'):
+    # read from source when we can, an imported module is cached for the life
+    # of the process so long-lived ones, e.g. serve, would never see a change
+    try:
+        with phase('bump.current_version'):
+            return _read_version(join(directory, module_name, '__init__.py'))
+    except (OSError, ValueError):
+        pass
     # temporarily prepend directory to sys.path so we import from CWD rather
     # than a virtualenv or system install. If the module is in a subdirectory,
     # e.g. lib/the_thing, it'll be on the user to get the correct one in the
@@ -26,12 +39,46 @@ def _get_current_version(module_name, directory='.'):
     original_path = path.copy()
     path.insert(0, directory)
     try:
-        module = import_module(module_name)
+        with phase('bump.current_version'):
+            module = import_module(module_name)
         return Version.parse(module.__version__)
     finally:
         path[:] = original_path
 
 
+# __version__ = '1.2.3' or __version__ = __VERSION__ = '1.2.3'
+_VERSION_RE = re_compile(
+    r'''^__version__\b[^\n]*?['"]([^'"\n]+)['"]''', MULTILINE
+)
+
+
+def _read_version(filename):
+    # the version from a module's __init__.py w/o importing it, safe to use
+    # from multiple threads
+    with open(filename) as fh:
+        match = _VERSION_RE.search(fh.read())
+    if not match:
+        raise ValueError(f'Unable to find __version__ in {filename}')
+    return Version.parse(match.group(1))
+
+
+def _load_ref(config, ref):
+    # the current version and entries as of ref, w/o touching the working
+    # tree. a single git ls-tree lists the entries and then they, along with
+    # the module's __init__.py, are read through a single git cat-file --batch
+    provider = config.provider
+    init = join(config.module, '__init__.py')
+    paths = [
+        p for p in provider.ls_tree(ref, config.directory) if p.endswith('.md')
+    ]
+    contents = provider.cat_files(ref, [init] + paths)
+    match = _VERSION_RE.search(contents.pop(init) or '')
+    if not match:
+        raise ValueError(f'Unable to find __version__ in {init} at {ref}')
+    entries = sorted(Entry.load_contents(contents, config), reverse=True)
+    return Version.parse(match.group(1)), entries
+
+
 def _get_new_version(current_version, entries):
     try:
         bump_type = entries[0].type
@@ -88,6 +135,24 @@ class Bump:
             action='store_true',
             help='Silently check if a bump would happen and exit with 0 or 1',
         )
+        parser.add_argument(
+            '--format',
+            dest='formats',
+            action='append',
+            choices=tuple(FORMATS.keys()),
+            help='Output format(s) for the preview, may be repeated, Default: markdown',
+        )
+        parser.add_argument(
+            '--ref',
+            default=None,
+            help='Preview the release as of a git ref, e.g. origin/main, rather than the working tree',
+        )
+        parser.add_argument(
+            '--package',
+            dest='packages',
+            action='append',
+            help='Limit a workspace bump to the named package, may be repeated, Default: all packages',
+        )
         parser.add_argument(
             'title', nargs='*', help='A short title/quip for the release title'
         )
@@ -95,7 +160,108 @@ class Bump:
     def exit(self, code):
         exit(code)
 
+    def _run_workspace(self, args, config):
+        from changelet.workspace import (
+            WorkspaceException,
+            index_prs,
+            map_packages,
+            package_configs,
+        )
+
+        if args.pr or args.edit or args.ref or args.version:
+            print(
+                'Error: --pr, --edit, --ref, and --version are not supported '
+                'for workspaces, use --package',
+                file=sys.stderr,
+            )
+            return self.exit(1)
+        try:
+            packages = package_configs(config, args.packages)
+        except WorkspaceException as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return self.exit(1)
+
+        date = datetime.now().strftime('%Y-%m-%d')
+        title = ' '.join(args.title)
+        names = args.formats or ['markdown']
+
+        def prepare(package):
+            init = join(package.root, package.module, '__init__.py')
+            current_version = _read_version(init)
+            entries = sorted(Entry.load_all(package), reverse=True)
+            new_version = _get_new_version(current_version, entries)
+            rendered = None
+            if new_version:
+                rendered = render(
+                    version=new_version,
+                    entries=entries,
+                    date=date,
+                    title=title,
+                    names=['markdown'] + [n for n in names if n != 'markdown'],
+                    templates=package.templates,
+                )
+            return init, current_version, entries, new_version, rendered
+
+        # loading entries, along w/PR lookups, and rendering happen
+        # concurrently per package, all sharing a single provider
+        try:
+            index_prs(config, packages)
+            prepared = map_packages(prepare, packages)
+        except (OSError, ValueError) as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return self.exit(1)
+
+        bumps = {}
+        for (name, package), (
+            init,
+            current_version,
+            entries,
+            new_version,
+            rendered,
+        ) in zip(packages, prepared):
+            if not new_version:
+                if not args.check:
+                    print(f'{name}: nothing to release\n')
+                continue
+            bumps[name] = new_version
+            if args.check:
+                continue
+            if not args.make_changes:
+                print(f'{name}: {current_version} -> {new_version}\n')
+                for format_name in names:
+                    print(rendered[format_name])
+                continue
+
+            buf = rendered['markdown']
+            changelog = join(package.root, 'CHANGELOG.md')
+            try:
+                with open(changelog) as fh:
+                    existing = fh.read()
+            except FileNotFoundError:
+                existing = ''
+            with open(changelog, 'w') as fh:
+                fh.write(buf)
+                fh.write(existing)
+            with open(init) as fh:
+                existing = fh.read()
+            with open(init, 'w') as fh:
+                fh.write(
+                    existing.replace(str(current_version), str(new_version))
+                )
+            for entry in entries:
+                entry.remove()
+            print(f'{name}: bumped {current_version} -> {new_version}')
+
+        if args.check:
+            return self.exit(0 if bumps else 1)
+        if not args.make_changes:
+            self.exit(0 if bumps else 1)
+        return bumps
+
     def run(self, args, config, root='.'):
+        if config.packages:
+            return self._run_workspace(args, config)
+
         # If --pr is specified, validate git state and handle PR workflow
         if args.pr:
             # Check we're on main branch
@@ -104,7 +270,7 @@ class Bump:
             if current_branch != base_branch:
                 print(
                     f'Error: Must be on {base_branch} branch, currently on {current_branch}',
-                    file=stderr,
+                    file=sys.stderr,
                 )
                 return self.exit(1)
 
@@ -113,21 +279,43 @@ class Bump:
                 if config.provider.has_local_changes():
                     print(
                         'Error: Unstaged changes detected. Please commit or stash them.',
-                        file=stderr,
+                        file=sys.stderr,
                     )
                     return self.exit(1)
 
             # Pull latest changes
             config.provider.pull()
 
-        buf = StringIO()
-
         module_name = config.module
 
-        buf.write('## ')
-        current_version = _get_current_version(module_name)
-
-        entries = sorted(Entry.load_all(config), reverse=True)
+        if args.ref:
+            if args.make_changes or args.pr:
+                print(
+                    'Error: --ref can only be used to preview a release',
+                    file=sys.stderr,
+                )
+                return self.exit(1)
+            try:
+                current_version, entries = _load_ref(config, args.ref)
+            except (CalledProcessError, ValueError) as e:
+                print(f'Error: {e}', file=sys.stderr)
+                return self.exit(1)
+        else:
+            # read from the same root that CHANGELOG.md & __init__.py are
+            # written to
+            current_version = _get_current_version(module_name, root)
+
+            # a preview run stores the loaded entries, along with their PRs,
+            # so that a following --make-changes/--pr run with identical
+            # inputs can reuse them rather than reloading everything and
+            # refetching the PRs
+            release_cache = ReleaseCache(config, current_version)
+            entries = release_cache.load()
+            if entries is None:
+                entries = Entry.load_all(config)
+                with phase('entries.sort'):
+                    entries.sort(reverse=True)
+                release_cache.store(entries)
 
         new_version = (
             args.version
@@ -139,35 +327,38 @@ class Bump:
         if not new_version:
             print('No changelog entries found that would bump, nothing to do')
             return self.exit(1)
-        buf.write(str(new_version))
-        buf.write(' - ')
-        buf.write(datetime.now().strftime('%Y-%m-%d'))
-        if args.title:
-            buf.write(' - ')
-            buf.write(' '.join(args.title))
-        buf.write('\n')
-
-        current_type = None
-        for entry in entries:
-            type = entry.type
-            if type == EntryType.NONE:
-                # these aren't included in the listing
-                continue
-            if type != current_type:
-                buf.write('\n')
-                buf.write(type.value.capitalize())
-                buf.write(':\n')
-                current_type = type
-            buf.write(entry.markdown)
-
-            buf.write('\n')
 
-        buf.write('\n')
-
-        buf = buf.getvalue()
+        # markdown is always rendered, it's what goes into CHANGELOG.md and
+        # the PR body
+        names = args.formats or ['markdown']
+        with phase('bump.render'):
+            try:
+                rendered = render(
+                    version=new_version,
+                    entries=entries,
+                    date=datetime.now().strftime('%Y-%m-%d'),
+                    title=' '.join(args.title),
+                    names=['markdown'] + [n for n in names if n != 'markdown'],
+                    templates=config.templates,
+                )
+            except ValueError as e:
+                # e.g. invalid templates in the config
+                print(f'Error: {e}', file=sys.stderr)
+                return self.exit(1)
+        buf = rendered['markdown']
+        changelog = join(root, 'CHANGELOG.md')
         if not args.make_changes and not args.pr:
+            # the working tree's CHANGELOG.md says nothing about other refs
+            latest = None
+            if not args.ref:
+                latest = ChangelogIndex.load(
+                    changelog, cache_dir=config.cache_dir
+                ).latest
+            if latest:
+                print(f'Previous version {latest.version} - {latest.date}')
             print(f'New version number {new_version}\n')
-            print(buf)
+            for name in names:
+                print(rendered[name])
             self.exit(0)
         else:
             # If --pr is specified, create branch and make changes
@@ -175,7 +366,6 @@ class Bump:
             if args.pr:
                 config.provider.create_branch(branch_name)
 
-            changelog = join(root, 'CHANGELOG.md')
             with open(changelog) as fh:
                 existing = fh.read()
 
@@ -195,12 +385,12 @@ class Bump:
                     try:
                         rc = Popen(shlex_split(editor_cmd) + [tmp_path]).wait()
                     except OSError as e:
-                        print(f'Failed to open editor: {e}', file=stderr)
+                        print(f'Failed to open editor: {e}', file=sys.stderr)
                         return self.exit(1)
                     if rc != 0:
                         print(
                             f'Editor exited with non-zero status {rc}, aborting.',
-                            file=stderr,
+                            file=sys.stderr,
                         )
                         return self.exit(1)
                     with open(tmp_path) as fh:
@@ -212,30 +402,31 @@ class Bump:
                     print('No changes made, aborting.')
                     return self.exit(1)
 
-            with open(changelog, 'w') as fh:
-                fh.write(buf)
-                fh.write(existing)
+            with phase('bump.write'):
+                with open(changelog, 'w') as fh:
+                    fh.write(buf)
+                    fh.write(existing)
 
-            init = join(root, module_name, '__init__.py')
-            with open(init) as fh:
-                existing = fh.read()
+                init = join(root, module_name, '__init__.py')
+                with open(init) as fh:
+                    existing = fh.read()
 
-            with open(init, 'w') as fh:
-                fh.write(
-                    existing.replace(str(current_version), str(new_version))
-                )
+                with open(init, 'w') as fh:
+                    fh.write(
+                        existing.replace(str(current_version), str(new_version))
+                    )
 
-            for entry in entries:
-                entry.remove()
+                for entry in entries:
+                    entry.remove()
+                release_cache.clear()
 
             # If --pr is specified, stage, commit, push, and create PR
             if args.pr:
                 # Stage the specific files we modified
-                config.provider.add_file(changelog)
-                config.provider.add_file(init)
-                for entry in entries:
-                    if entry.filename:
-                        config.provider.add_file(entry.filename)
+                config.provider.add_files(
+                    [changelog, init]
+                    + [e.filename for e in entries if e.filename]
+                )
 
                 # Commit changes
                 commit_message = f'Version {new_version.major}.{new_version.minor}.{new_version.patch} bump & changelog update'
@@ -2,7 +2,11 @@
 #
 #
 
-from sys import argv, exit, stderr
+import sys
+from json import dumps
+from os import environ
+from subprocess import CalledProcessError
+from sys import argv, exit
 
 
 class Check:
@@ -19,19 +23,174 @@ class Check:
             default=False,
             help='Do not print status message to stdout',
         )
+        parser.add_argument(
+            '--package',
+            dest='packages',
+            action='append',
+            help='Limit a workspace check to the named package, may be repeated, Default: all packages',
+        )
+        parser.add_argument(
+            '--per-package',
+            action='store_true',
+            default=False,
+            help='Require an entry for every package, from sources or packages in the config, with changes',
+        )
+        parser.add_argument(
+            '--validate',
+            action='store_true',
+            default=False,
+            help='Also validate the contents of all of the pending entries, see lint',
+        )
+        parser.add_argument(
+            '--refs',
+            nargs='+',
+            default=None,
+            metavar='REF',
+            help='Check each of the refs, e.g. queued PR branches, against base and write a JSON result per line',
+        )
+        parser.add_argument(
+            '--changed-files',
+            default=None,
+            metavar='FILE',
+            help='Decide from a JSON list of changed files, `-` for stdin, rather than git',
+        )
+        parser.add_argument(
+            '--github-event',
+            action='store_true',
+            default=False,
+            help='Decide from the changed files of the GitHub Actions pull_request event payload, GITHUB_EVENT_PATH, rather than git, see --fetch-pr-files',
+        )
+        parser.add_argument(
+            '--fetch-pr-files',
+            action='store_true',
+            default=False,
+            help='Fetch the files of pull_request event payloads w/gh api, which needs network access and a token',
+        )
 
     def exit(self, code):
         exit(code)
 
-    def run(self, args, config):
-        if config.provider.changelog_entries_in_branch(
+    def _changed_files(self, args, config):
+        from changelet.changes import load_changed_files
+
+        if args.github_event:
+            filename = environ.get('GITHUB_EVENT_PATH')
+            if not filename:
+                raise ValueError('GITHUB_EVENT_PATH is not set')
+        else:
+            filename = args.changed_files
+        # only goes to the network when asked to
+        provider = config.provider if args.fetch_pr_files else None
+        if filename == '-':
+            return load_changed_files(sys.stdin, provider)
+        with open(filename) as fh:
+            return load_changed_files(fh, provider)
+
+    def _entries_in_branch(self, config, changed=None):
+        if changed is not None:
+            from changelet.changes import added_files, changelog_entries
+
+            return changelog_entries(added_files(changed), config.directory)
+        return config.provider.changelog_entries_in_branch(
             root=config.root, directory=config.directory
-        ):
+        )
+
+    def _per_package(self, args, config, changed):
+        from changelet.api import ChangeletException, missing_entries
+
+        try:
+            missing = missing_entries(
+                config, changed_files=changed, packages=args.packages
+            )
+        except ChangeletException as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return self.exit(1)
+        if not missing:
+            return self.exit(0)
+        if not args.quiet:
+            for directory in missing:
+                print(
+                    f'Missing required changelog file in {directory}',
+                    file=sys.stderr,
+                )
+            print(f'run {argv[0]} create for each', file=sys.stderr)
+        self.exit(1)
+
+    def _refs(self, args, config):
+        from changelet.api import ChangeletException, check_refs
+
+        if args.changed_files or args.github_event or args.per_package:
+            print(
+                'Error: --refs can not be combined with --changed-files, --github-event, or --per-package',
+                file=sys.stderr,
+            )
+            return self.exit(1)
+        try:
+            results = check_refs(config, args.refs, packages=args.packages)
+        except ChangeletException as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return self.exit(1)
+        for result in results:
+            print(dumps(result))
+        self.exit(0 if all(r['ok'] for r in results) else 1)
+
+    def _validate(self, args, config):
+        from changelet.api import ChangeletException, lint
+
+        try:
+            errors = lint(config, packages=args.packages)
+        except ChangeletException as e:
+            errors = [f'Error: {e}']
+        if not args.quiet:
+            for error in errors:
+                print(error, file=sys.stderr)
+        return not errors
+
+    def run(self, args, config):
+        if args.validate and not self._validate(args, config):
+            return self.exit(1)
+
+        if args.refs:
+            return self._refs(args, config)
+
+        changed = None
+        if args.changed_files or args.github_event:
+            # no git, or fetching, involved
+            try:
+                changed = self._changed_files(args, config)
+            except (CalledProcessError, OSError, ValueError) as e:
+                print(f'Error: {e}', file=sys.stderr)
+                return self.exit(1)
+
+        if args.per_package:
+            return self._per_package(args, config, changed)
+
+        if config.packages:
+            from changelet.workspace import (
+                WorkspaceException,
+                map_packages,
+                package_configs,
+            )
+
+            try:
+                packages = package_configs(config, args.packages)
+            except WorkspaceException as e:
+                print(f'Error: {e}', file=sys.stderr)
+                return self.exit(1)
+            # any of the packages having an entry will do
+            found = any(
+                map_packages(
+                    lambda c: self._entries_in_branch(c, changed), packages
+                )
+            )
+        else:
+            found = self._entries_in_branch(config, changed)
+        if found:
             return self.exit(0)
 
         if not args.quiet:
             print(
                 f'PR is missing required changelog file, run {argv[0]} create',
-                file=stderr,
+                file=sys.stderr,
             )
         self.exit(1)
@@ -2,9 +2,9 @@
 #
 #
 
+import sys
 from os.path import join
 from sys import exit as sys_exit
-from sys import stderr
 from uuid import uuid4
 
 from changelet.entry import Entry
@@ -59,6 +59,12 @@ See https://semver.org/ for more info''',
             default=False,
             help='Continue a previously failed commit attempt',
         )
+        parser.add_argument(
+            '--from-file',
+            default=None,
+            metavar='FILE',
+            help='Create an entry for each line of a JSON Lines file, `-` for stdin, with type, description, and optionally pr',
+        )
         parser.add_argument(
             'description',
             metavar='change-description',
@@ -69,12 +75,68 @@ CHANGELOG.md. Should be a single line. Can option include simple markdown format
 and links.''',
         )
 
+    def _from_file(self, args, config):
+        from json import loads
+        from time import perf_counter
+
+        from changelet.api import ChangeletException, create_many
+
+        start = perf_counter()
+        specs = []
+        try:
+            if args.from_file == '-':
+                # not ours to close
+                lines = list(sys.stdin)
+            else:
+                with open(args.from_file) as fh:
+                    lines = list(fh)
+        except OSError as e:
+            print(f'error: {e}', file=sys.stderr)
+            return sys_exit(1)
+        for i, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                specs.append(loads(line))
+            except ValueError as e:
+                print(
+                    f'error: {args.from_file}:{i}: invalid JSON, {e}',
+                    file=sys.stderr,
+                )
+                return sys_exit(1)
+
+        try:
+            entries = create_many(
+                config, specs, add=args.add, commit=args.commit
+            )
+        except ChangeletException as e:
+            print(f'error: {e}', file=sys.stderr)
+            return sys_exit(1)
+
+        elapsed = perf_counter() - start
+        rate = len(entries) / elapsed if elapsed else 0
+        if args.commit:
+            status = 'committed'
+        elif args.add:
+            status = 'staged'
+        else:
+            status = 'written'
+        print(
+            f'Created {len(entries)} entries in {elapsed:.2f}s'
+            f' ({rate:.0f}/s), they have been {status}.'
+        )
+        return entries
+
     def run(self, args, config):
+        if args.from_file:
+            return self._from_file(args, config)
+
         if args.continue_:
             filename = config.provider.staged_changelog_entry(config.directory)
             if filename is None:
                 print(
-                    'No staged changelog entry found to continue.', file=stderr
+                    'No staged changelog entry found to continue.',
+                    file=sys.stderr,
                 )
                 return sys_exit(1)
 
@@ -101,15 +163,15 @@ and links.''',
                     f' re-attempt the commit, or unstage'
                     f' the entry with `git reset HEAD'
                     f' {staged}` and try again.',
-                    file=stderr,
+                    file=sys.stderr,
                 )
                 return sys_exit(1)
 
         if args.type is None:
-            print('error: -t/--type is required', file=stderr)
+            print('error: -t/--type is required', file=sys.stderr)
             return sys_exit(1)
         if not args.description:
-            print('error: description is required', file=stderr)
+            print('error: description is required', file=sys.stderr)
             return sys_exit(1)
 
         filename = join(config.directory, f'{uuid4().hex}.md')
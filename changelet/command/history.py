@@ -0,0 +1,33 @@
+#
+#
+#
+
+from os.path import join
+
+from changelet.history import ChangelogIndex
+
+
+class History:
+    name = 'history'
+    description = 'Lists the releases recorded in CHANGELOG.md.'
+
+    def configure(self, parser):
+        parser.add_argument(
+            '-n',
+            '--limit',
+            type=int,
+            default=None,
+            help='Only list the most recent N releases',
+        )
+
+    def run(self, args, config):
+        index = ChangelogIndex.load(
+            join(config.root, 'CHANGELOG.md'), cache_dir=config.cache_dir
+        )
+        sections = index.sections[: args.limit]
+        for section in sections:
+            if section.title:
+                print(f'{section.version} - {section.date} - {section.title}')
+            else:
+                print(f'{section.version} - {section.date}')
+        return sections
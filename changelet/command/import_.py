@@ -0,0 +1,127 @@
+#
+#
+#
+
+import sys
+from os.path import join
+from re import compile as re_compile
+from sys import exit
+from uuid import uuid4
+
+from changelet.entry import Entry
+
+# conventional commit type -> entry type
+TYPES = {
+    'feat': 'minor',
+    'fix': 'patch',
+    'perf': 'patch',
+    'revert': 'patch',
+    'build': 'none',
+    'chore': 'none',
+    'ci': 'none',
+    'docs': 'none',
+    'refactor': 'none',
+    'style': 'none',
+    'test': 'none',
+}
+
+# feat(scope)!: description
+_CONVENTIONAL_RE = re_compile(
+    r'^(?P<type>[\w-]+)(?:\([^)]*\))?(?P<breaking>!)?:\s*(?P<description>.+)$'
+)
+# trailing (#123) added to squash merges
+_PR_RE = re_compile(r'\s*\(#(?P<pr>\d+)\)$')
+
+
+def classify(subject, body, types, default=None):
+    # returns (type, description, pr), type is None when the commit should be
+    # skipped
+    pr = None
+    match = _PR_RE.search(subject)
+    if match:
+        pr = int(match.group('pr'))
+        subject = subject[: match.start()]
+
+    match = _CONVENTIONAL_RE.match(subject)
+    if not match:
+        return default, subject, pr
+    description = match.group('description')
+    if match.group('breaking') or 'BREAKING CHANGE' in body:
+        return 'major', description, pr
+    return types.get(match.group('type').lower(), default), description, pr
+
+
+class Import:
+    name = 'import'
+    description = (
+        'Creates changelog entries from the commits since a ref, classifying '
+        'them by their conventional commit type.'
+    )
+
+    def configure(self, parser):
+        parser.add_argument(
+            '--default-type',
+            choices=('none', 'patch', 'minor', 'major'),
+            default=None,
+            help='Entry type for commits that cannot be classified, Default: they are skipped',
+        )
+        parser.add_argument(
+            '-a',
+            '--add',
+            action='store_true',
+            default=False,
+            help='`git add` the newly created changelog entries',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help='Print the entries that would be created rather than writing them',
+        )
+        parser.add_argument(
+            'ref', help='Import commits after this ref, e.g. the last tag'
+        )
+
+    def exit(self, code):
+        exit(code)
+
+    def run(self, args, config):
+        from subprocess import CalledProcessError
+
+        types = dict(TYPES)
+        if config.import_types:
+            types.update(config.import_types)
+
+        filenames = []
+        commits = created = 0
+        try:
+            for _, subject, body in config.provider.commits(args.ref):
+                commits += 1
+                type, description, pr = classify(
+                    subject, body, types, default=args.default_type
+                )
+                if type is None:
+                    continue
+                entry = Entry(type=type, description=description, pr=pr)
+                created += 1
+                if args.dry_run:
+                    print(f'{entry.type.value}: {entry.description}')
+                    continue
+                # written as we go, nothing is held on to beyond filenames
+                entry.save(join(config.directory, f'{uuid4().hex}.md'))
+                filenames.append(entry.filename)
+        except CalledProcessError:
+            print(
+                f'error: failed to read the git log after {args.ref}',
+                file=sys.stderr,
+            )
+            return self.exit(1)
+
+        if args.add and filenames:
+            config.provider.add_files(filenames)
+
+        print(
+            f'Imported {created} entries from {commits} commits',
+            file=sys.stderr,
+        )
+        return filenames
@@ -0,0 +1,37 @@
+#
+#
+#
+
+import sys
+from sys import exit
+
+
+class Lint:
+    name = 'lint'
+    description = 'Validates all of the pending changelog entries, reporting every problem along w/its file and line'
+
+    def configure(self, parser):
+        parser.add_argument(
+            '--package',
+            dest='packages',
+            action='append',
+            help='Limit a workspace lint to the named package, may be repeated, Default: all packages',
+        )
+
+    def exit(self, code):
+        exit(code)
+
+    def run(self, args, config):
+        from changelet.api import ChangeletException, lint
+
+        try:
+            errors = lint(config, packages=args.packages)
+        except ChangeletException as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return self.exit(1)
+        for error in errors:
+            print(error)
+        if errors:
+            print(f'{len(errors)} problem(s) found', file=sys.stderr)
+            return self.exit(1)
+        self.exit(0)
@@ -0,0 +1,63 @@
+#
+#
+#
+
+import sys
+from sys import exit
+
+from changelet.client import socket_path
+
+
+class Serve:
+    name = 'serve'
+    description = (
+        'Runs a resident process that answers check, create, and bump preview '
+        'requests over a Unix socket. Other invocations for the same project '
+        'forward to it while it is running.'
+    )
+
+    def configure(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=None,
+            help='Path of the Unix socket to listen on, Default: serve.sock in the cache directory',
+        )
+        parser.add_argument(
+            '--idle-timeout',
+            type=float,
+            default=None,
+            help='Exit after this many seconds without a request, Default: never',
+        )
+
+    def exit(self, code):
+        exit(code)
+
+    def run(self, args, config):
+        from changelet.daemon import Server, ServerException
+        from changelet.main import config_kwargs
+
+        path = args.socket or socket_path(config)
+        if not path:
+            print(
+                'error: --socket is required when caching is disabled',
+                file=sys.stderr,
+            )
+            return self.exit(1)
+
+        try:
+            # its own config is only used for requests w/the same args
+            server = Server(
+                path, config=config, config_kwargs=config_kwargs(args)
+            )
+        except ServerException as e:
+            print(f'error: {e}', file=sys.stderr)
+            return self.exit(1)
+
+        print(f'Listening on {path}')
+        try:
+            server.serve(idle_timeout=args.idle_timeout)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return server
@@ -0,0 +1,33 @@
+#
+#
+#
+
+import sys
+from os.path import join
+from sys import exit
+
+from changelet.history import ChangelogIndex
+
+
+class Show:
+    name = 'show'
+    description = 'Shows the CHANGELOG.md section for a past release.'
+
+    def configure(self, parser):
+        parser.add_argument(
+            'version', help='The release version to show, e.g. 1.2.3'
+        )
+
+    def exit(self, code):
+        exit(code)
+
+    def run(self, args, config):
+        index = ChangelogIndex.load(
+            join(config.root, 'CHANGELOG.md'), cache_dir=config.cache_dir
+        )
+        section = index.read(args.version)
+        if section is None:
+            print(f'Version {args.version} not found', file=sys.stderr)
+            return self.exit(1)
+        print(section.rstrip('\n'))
+        return section
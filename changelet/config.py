@@ -3,45 +3,149 @@
 #
 
 from importlib import import_module
+from os import stat
 from os.path import abspath, basename, isfile, join
+from re import MULTILINE
+from re import compile as re_compile
 from sys import version_info
-from typing import TYPE_CHECKING
 
-from yaml import safe_load as yaml_load
+from .cache import default_cache_dir
 
-# https://pypi.org/project/tomli/#intro
-# based on code in black.file
-if version_info >= (3, 11):  # pragma: no cover
+# [tool.changelet], [tool.changelet.provider], [[tool.changelet.x]], ...
+_TOML_TABLE_RE = re_compile(r'^\s*\[\[?\s*([^\]]*?)\s*\]', MULTILINE)
+# things that could put changelet config somewhere other than under a
+# [tool.changelet...] table header, e.g. [tool] + changelet.directory = ...
+_TOML_OTHER_RE = re_compile(
+    r'^\s*(\[\s*tool\s*\]|(tool\s*\.\s*)?["\']?changelet["\']?\s*[.=])',
+    MULTILINE,
+)
+
+
+def _toml_loads(text):
+    # imported on use to keep them out of start up for commands that don't
+    # need them
+    # https://pypi.org/project/tomli/#intro
+    # based on code in black.file
+    if version_info >= (3, 11):  # pragma: no cover
+        try:
+            from tomllib import loads
+        except ImportError:
+            # Help users on older alphas
+            from tomli import loads
+    else:  # pragma: no cover
+        from tomli import loads
+    return loads(text)
+
+
+def _changelet_toml(text):
+    # pulls out just the [tool.changelet...] tables so that we're not parsing
+    # the whole of large pyproject.toml files, returns None if that can't be
+    # done reliably
+    if _TOML_OTHER_RE.search(text):
+        return None
+    lines = []
+    keep = False
+    for line in text.splitlines(keepends=True):
+        match = _TOML_TABLE_RE.match(line)
+        if match:
+            name = match.group(1)
+            # e.g. [tool . "changelet"], quoted keys w/dots aren't handled so
+            # headers that mention changelet & needed it fall back to a full
+            # parse
+            normalized = '.'.join(
+                p.strip().strip('"\'') for p in name.split('.')
+            )
+            if normalized != name and 'changelet' in name:
+                return None
+            keep = name == 'tool.changelet' or name.startswith(
+                'tool.changelet.'
+            )
+        if keep:
+            lines.append(line)
+    return ''.join(lines)
+
+
+def _parse_pyproject_toml(filename):
+    with open(filename, 'rb') as fh:
+        text = fh.read().decode('utf-8')
+    if 'changelet' not in text:
+        # nothing for us, no need to parse anything
+        return None
+    extracted = _changelet_toml(text)
+    if extracted is not None:
+        try:
+            data = _toml_loads(extracted)
+        except ValueError:
+            # something, e.g. a multi-line string, confused the extraction,
+            # fall back to parsing the whole file
+            data = _toml_loads(text)
+    else:
+        data = _toml_loads(text)
+    return data.get('tool', {}).get('changelet')
+
+
+def _parse_yaml(filename):
+    from yaml import safe_load
+
+    with open(filename, 'rb') as fh:
+        return safe_load(fh)
+
+
+# abspath -> ((mtime_ns, size), data)
+_parsed = {}
+
+
+def _load(filename, parse):
+    # process-level cache of parsed config files keyed on their path, mtime,
+    # and size so that unchanged files are never re-parsed
+    filename = abspath(filename)
+    st = stat(filename)
+    key = (st.st_mtime_ns, st.st_size)
     try:
-        from tomllib import load as toml_load
-    except ImportError:
-        # Help users on older alphas
-        if not TYPE_CHECKING:
-            from tomli import load as toml_load
-else:  # pragma: no cover
-    from tomli import load as toml_load
+        cached_key, data = _parsed[filename]
+        if cached_key == key:
+            return data
+    except KeyError:
+        pass
+    data = parse(filename)
+    _parsed[filename] = (key, data)
+    return data
 
 
 class Config:
     DEFAULT_ROOT = ''
 
+    @classmethod
+    def _filenames(cls, kwargs):
+        root = kwargs.get('root', cls.DEFAULT_ROOT)
+        # explicit yaml file, or the default one
+        yaml_filename = kwargs.get('config') or join(root, '.changelet.yaml')
+        return join(root, 'pyproject.toml'), yaml_filename
+
+    @classmethod
+    def signature(cls, **kwargs):
+        # the (mtime_ns, size) of each of the files build would read, None for
+        # those that don't exist, changes when a built Config would
+        ret = []
+        for filename in cls._filenames(kwargs):
+            try:
+                st = stat(filename)
+                ret.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                ret.append(None)
+        return tuple(ret)
+
     @classmethod
     def build(cls, **kwargs):
         # create w/defaults
         config = Config()
 
-        root = kwargs.get('root', cls.DEFAULT_ROOT)
+        pyproject_toml_filename, yaml_filename = cls._filenames(kwargs)
 
         # override w/toml, if applicable
-        pyproject_toml_filename = join(root, 'pyproject.toml')
         if isfile(pyproject_toml_filename):
             config.load_pyproject_toml(pyproject_toml_filename)
 
-        # explicit yaml file
-        yaml_filename = kwargs.get('config')
-        if not yaml_filename:
-            # default yaml file
-            yaml_filename = join(root, '.changelet.yaml')
         # override w/yaml, if applicable
         if isfile(yaml_filename):
             config.load_yaml(yaml_filename)
@@ -68,6 +172,10 @@ class Config:
         if config.module is None:
             config.module = basename(abspath('.')).replace('-', '_')
 
+        # default cache location if not set by config
+        if config.cache_dir is None:
+            config.cache_dir = default_cache_dir(config.root)
+
         return config
 
     def __init__(
@@ -77,11 +185,26 @@ class Config:
         commit_prefix='Changelog: ',
         module=None,
         provider={'class': 'changelet.github.GitHubCli'},
+        templates=None,
+        cache_dir=None,
+        import_types=None,
+        packages=None,
+        sources=None,
     ):
         self.root = root
         self.directory = directory
         self.commit_prefix = commit_prefix
         self.module = module
+        self.templates = templates
+        # commit type, e.g. feat, -> entry type overrides for import
+        self.import_types = import_types
+        # workspace packages, each a dict w/name and optionally root,
+        # directory, and module
+        self.packages = packages
+        # source path prefix -> changelog directory for check --per-package
+        self.sources = sources
+        # False disables caching
+        self.cache_dir = cache_dir
 
         # will instantiate & configure
         self.provider = provider
@@ -101,21 +224,24 @@ class Config:
 
     @provider.setter
     def provider(self, value):
-        self._provider_config = value
+        if value is None or isinstance(value, dict):
+            # will be instantiated on first use
+            self._provider_config = value
+        else:
+            # an existing provider, e.g. shared w/another config
+            self._provider_config = None
+            self._provider = value
+
+    def _apply(self, config):
+        if isinstance(config, dict):
+            for k, v in config.items():
+                setattr(self, k, v)
 
     def load_pyproject_toml(self, filename):
-        with open(filename, 'rb') as fh:
-            config = toml_load(fh).get('tool', {}).get('changelet')
-            if isinstance(config, dict):
-                for k, v in config.items():
-                    setattr(self, k, v)
+        self._apply(_load(filename, _parse_pyproject_toml))
 
     def load_yaml(self, filename):
-        with open(filename, 'rb') as fh:
-            config = yaml_load(fh)
-            if isinstance(config, dict):
-                for k, v in config.items():
-                    setattr(self, k, v)
+        self._apply(_load(filename, _parse_yaml))
 
     def __repr__(self):
         return f'Config<root={self.root}, directory={self.directory}, module={self.module}, provider={self.provider}>'
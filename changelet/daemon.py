@@ -0,0 +1,180 @@
+#
+#
+#
+
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from json import dumps, loads
+from logging import getLogger
+from os import environ, getcwd, listdir, makedirs, remove, stat
+from os.path import dirname, isdir, join
+from socket import AF_UNIX, SOCK_STREAM, socket
+from socketserver import StreamRequestHandler, UnixStreamServer
+from traceback import format_exc
+
+from .command import commands
+from .config import Config
+
+
+class ServerException(Exception):
+    pass
+
+
+class Handler(StreamRequestHandler):
+
+    def handle(self):
+        request = loads(self.rfile.readline())
+        response = self.server.execute(request)
+        self.wfile.write(dumps(response).encode('utf-8') + b'\n')
+
+
+class Server(UnixStreamServer):
+    # a long-lived process that keeps Configs, and with them their providers'
+    # PR indexes, along with parsed entries warm between requests
+
+    def __init__(self, path, config=None, config_kwargs={}):
+        self.log = getLogger('Server')
+        self.path = path
+        self.cwd = getcwd()
+        # frozenset(config_kwargs) -> (signature, Config)
+        self._configs = {}
+        if config is not None:
+            self._configs[self._key(config_kwargs)] = (
+                Config.signature(**config_kwargs),
+                config,
+            )
+        # directory -> signature of its entries
+        self._signatures = {}
+        self._idle = False
+
+        self._clear_stale(path)
+        super().__init__(path, Handler)
+
+    def _clear_stale(self, path):
+        try:
+            with socket(AF_UNIX, SOCK_STREAM) as sock:
+                sock.connect(path)
+        except FileNotFoundError:
+            makedirs(dirname(path) or '.', exist_ok=True)
+        except OSError:
+            # left behind by a server that didn't shut down cleanly
+            remove(path)
+        else:
+            raise ServerException(f'Already running on {path}')
+
+    def _key(self, config_kwargs):
+        return frozenset(config_kwargs.items())
+
+    def config(self, config_kwargs):
+        # rebuilt when any of the files it was built from change
+        key = self._key(config_kwargs)
+        signature = Config.signature(**config_kwargs)
+        try:
+            cached_signature, config = self._configs[key]
+            if cached_signature == signature:
+                return config
+            self.log.info('config: %s changed', config_kwargs)
+        except KeyError:
+            pass
+        config = Config.build(**config_kwargs)
+        self._configs[key] = (signature, config)
+        return config
+
+    def _signature(self, directory):
+        if not isdir(directory):
+            return ()
+        signature = []
+        for filename in sorted(listdir(directory)):
+            if not filename.endswith('.md'):
+                continue
+            st = stat(join(directory, filename))
+            signature.append((filename, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def refresh(self, config):
+        # new or changed entries may well belong to PRs that have merged since
+        # the provider's index was built, so start fresh when they change
+        directory = config.directory
+        signature = self._signature(directory)
+        previous = self._signatures.get(directory)
+        self._signatures[directory] = signature
+        if previous is not None and previous != signature:
+            self.log.info('refresh: %s changed', directory)
+            reset = getattr(config.provider, 'reset', None)
+            if reset is not None:
+                reset()
+
+    def execute(self, request):
+        # imported here to avoid an import cycle, main uses client which is
+        # what talks to us
+        from .main import build_parser, config_kwargs
+
+        if request.get('cwd') != self.cwd:
+            # decline, the client will run the command itself
+            return {'code': None}
+
+        argv = request['argv']
+        stdout = StringIO()
+        stderr = StringIO()
+        code = 0
+
+        original_env = {
+            k: v for k, v in environ.items() if k.startswith('CHANGELET_')
+        }
+        original_argv = list(sys.argv)
+        for k in original_env:
+            del environ[k]
+        environ.update(request.get('env', {}))
+        sys.argv[:] = argv
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    args = build_parser(argv).parse_args(argv[1:])
+                    config = self.config(config_kwargs(args))
+                    self.refresh(config)
+                    commands[args.command].run(args=args, config=config)
+                except SystemExit as e:
+                    if e.code is None:
+                        code = 0
+                    elif isinstance(e.code, int):
+                        code = e.code
+                    else:
+                        print(e.code, file=sys.stderr)
+                        code = 1
+                except Exception:
+                    print(format_exc(), file=sys.stderr)
+                    code = 1
+        finally:
+            for k in [k for k in environ if k.startswith('CHANGELET_')]:
+                del environ[k]
+            environ.update(original_env)
+            sys.argv[:] = original_argv
+
+        return {
+            'code': code,
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+        }
+
+    def handle_timeout(self):
+        self._idle = True
+
+    def serve(self, idle_timeout=None):
+        if idle_timeout is None:
+            self.serve_forever()
+            return
+        # exit once we've gone idle_timeout seconds w/o a request
+        self.timeout = idle_timeout
+        while not self._idle:
+            self.handle_request()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return f'Server<{self.path}>'
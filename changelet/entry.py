@@ -4,10 +4,13 @@
 
 from datetime import datetime, timezone
 from enum import Enum
-from os import listdir, makedirs, remove
-from os.path import dirname, isdir, join
+from os import listdir, makedirs, remove, stat
+from os.path import abspath, dirname, isdir, join
+from re import compile as re_compile
 
-from yaml import safe_load
+from .metrics import inc
+from .timings import phase
+from .trace import span
 
 
 class EntryType(Enum):
@@ -17,6 +20,11 @@ class EntryType(Enum):
     MAJOR = 'major'
 
 
+_TYPES = frozenset(t.value for t in EntryType)
+# YAML would treat leading zeros differently, those are left to it
+_PR_RE = re_compile(r'0|[1-9][0-9]*')
+
+
 class Entry:
     EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
     ORDERING = {
@@ -26,17 +34,60 @@ class Entry:
         EntryType.NONE: 0,
     }
 
+    # abspath -> ((mtime_ns, size), (data, description))
+    _parsed = {}
+
     @classmethod
     def _parse_file(cls, filename):
+        # parsed files are kept for the life of the process, keyed on their
+        # mtime and size, so that long-lived users, e.g. serve, only re-parse
+        # entries that have changed
+        path = abspath(filename)
+        st = stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        try:
+            cached_key, parsed = cls._parsed[path]
+            if cached_key == key:
+                inc('changelet_cache_hits_total', cache='entry')
+                data, description = parsed
+                return dict(data), description
+        except KeyError:
+            pass
+        inc('changelet_cache_misses_total', cache='entry')
+
         with open(filename, 'r') as fh:
-            pieces = fh.read().split('---\n', 2)
-            data = safe_load(pieces[1])
-            description = pieces[2]
-            return data, description
+            data, description = cls._parse(fh.read())
+        cls._parsed[path] = (key, (data, description))
+        return dict(data), description
 
     @classmethod
-    def load(cls, filename, config):
-        data, description = cls._parse_file(filename)
+    def _front_matter(cls, text):
+        # the front matter changelet writes, `type: <type>` and optionally
+        # `pr: <number>`, is handled directly, w/o YAML, anything else is None
+        data = {}
+        for line in text.splitlines():
+            key, _, value = line.partition(': ')
+            if key == 'type' and value in _TYPES:
+                data['type'] = value
+            elif key == 'pr' and _PR_RE.fullmatch(value):
+                data['pr'] = int(value)
+            else:
+                return None
+        return data
+
+    @classmethod
+    def _parse(cls, text):
+        pieces = text.split('---\n', 2)
+        with phase('entries.parse'):
+            data = cls._front_matter(pieces[1])
+            if data is None:
+                from yaml import safe_load
+
+                data = safe_load(pieces[1])
+        return data, pieces[2]
+
+    @classmethod
+    def _build(cls, filename, data, description, config):
         if 'pr' in data:
             pr = config.provider.pr_by_id(
                 root=config.root, directory=config.directory, id=data['pr']
@@ -49,6 +100,25 @@ class Entry:
             filename=filename, type=data['type'], description=description, pr=pr
         )
 
+    @classmethod
+    def load(cls, filename, config):
+        data, description = cls._parse_file(filename)
+        return cls._build(filename, data, description, config)
+
+    @classmethod
+    def load_contents(cls, contents, config):
+        # contents is filename -> text, e.g. read out of git rather than from
+        # the working tree
+        with span('entries.load_contents') as s:
+            entries = [
+                cls._build(filename, *cls._parse(text), config)
+                for filename, text in sorted(contents.items())
+                if text is not None
+            ]
+            s.set('changelet.entries', len(entries))
+        inc('changelet_entries_loaded_total', len(entries))
+        return entries
+
     @classmethod
     def load_file(cls, filename):
         data, description = cls._parse_file(filename)
@@ -61,11 +131,16 @@ class Entry:
         directory = config.directory
         entries = []
         if isdir(directory):
-            for filename in sorted(listdir(directory)):
-                if not filename.endswith('.md'):
-                    continue
-                filename = join(directory, filename)
-                entries.append(Entry.load(filename, config))
+            with phase('entries.load'), span(
+                'entries.load', {'changelet.directory': directory}
+            ) as s:
+                for filename in sorted(listdir(directory)):
+                    if not filename.endswith('.md'):
+                        continue
+                    filename = join(directory, filename)
+                    entries.append(Entry.load(filename, config))
+                s.set('changelet.entries', len(entries))
+            inc('changelet_entries_loaded_total', len(entries))
         return entries
 
     def __init__(self, type, description, pr=None, filename=None):
@@ -103,21 +178,23 @@ class Entry:
             self.pr.merged_at if self.pr else self.EPOCH,
         )
 
+    def _content(self):
+        pieces = ['---\ntype: ', self.type.value]
+        if self.pr:
+            # a Pr once loaded, or just its id when newly created
+            pieces.extend(('\npr: ', str(getattr(self.pr, 'id', self.pr))))
+        pieces.extend(('\n---\n', self.description, '\n'))
+        return ''.join(pieces)
+
     def save(self, filename=None):
         if filename is None:
             filename = self.filename
         directory = dirname(filename)
         if not isdir(directory):
             makedirs(directory)
+        # a single write of the whole thing
         with open(filename, 'w') as fh:
-            fh.write('---\ntype: ')
-            fh.write(self.type.value)
-            if self.pr:
-                fh.write('\npr: ')
-                fh.write(str(self.pr.id))
-            fh.write('\n---\n')
-            fh.write(self.description)
-            fh.write('\n')
+            fh.write(self._content())
         self.filename = filename
 
     def remove(self):
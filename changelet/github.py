@@ -3,17 +3,55 @@
 #
 
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from json import loads
 from logging import getLogger
 from os import environ
+from os.path import dirname, normpath
 from shlex import split as shlex_split
-from subprocess import PIPE, run
+from subprocess import PIPE, CalledProcessError, Popen
+from subprocess import run as subprocess_run
+from threading import Lock
 
+from .metrics import inc
 from .pr import Pr
+from .timings import command, phase
+from .trace import span, traced
+
+
+@contextmanager
+def _measured(cmd):
+    # counts, times, and traces a git or gh invocation, yielding its span
+    inc('changelet_subprocesses_total', tool=cmd[0])
+    if cmd[0] == 'gh':
+        inc('changelet_github_calls_total')
+    with command(cmd), span(
+        ' '.join(cmd[:2]), {'process.command_line': ' '.join(cmd)}
+    ) as s:
+        yield s
+
+
+def run(cmd, **kwargs):
+    # every git & gh invocation goes through here so that they can be
+    # measured
+    with _measured(cmd) as s:
+        try:
+            result = subprocess_run(cmd, **kwargs)
+        except CalledProcessError as e:
+            s.set('process.exit.code', e.returncode)
+            raise
+        s.set('process.exit.code', result.returncode)
+        if result.stdout is not None:
+            s.set('changelet.output.size', len(result.stdout))
+        return result
 
 
 class GitHubCli:
+    # total length of paths beyond which add_files switches from argv to
+    # --pathspec-from-file
+    ADD_FILES_ARGV_MAX = 32 * 1024
 
     def __init__(self, repo=None, max_lookback=50, base_branch='main'):
         self.log = getLogger('GitHubCli[{repo}]')
@@ -27,93 +65,392 @@ class GitHubCli:
         self.max_lookback = max_lookback
         self.base_branch = base_branch
 
-        self._prs = None
+        self._merged_prs = None
+        # directory -> index
+        self._prs = {}
+        self._lock = Lock()
+        # (ref, base) -> merge base
+        self._merge_bases = {}
+
+    def _exec(self, cmd, **kwargs):
+        # every subprocess the provider runs goes through here, and _open for
+        # those that are streamed, so that subclasses, e.g. record & replay,
+        # can intercept them
+        return run(cmd, **kwargs)
+
+    def _open(self, cmd, **kwargs):
+        return Popen(cmd, **kwargs)
 
     def _run(self, cmd):
-        result = run(cmd, check=True, stdout=PIPE)
-        return loads(result.stdout)
+        with span('github.json') as s:
+            result = self._exec(cmd, check=True, stdout=PIPE)
+            s.set('changelet.json.size', len(result.stdout))
+            inc('changelet_json_bytes_parsed_total', len(result.stdout))
+            return loads(result.stdout)
 
-    def prs(self, root, directory):
-        # we're making an assumption here that we'll always be called with the
-        # same root & directory so we can use them once and cache the results.
-        if self._prs is None:
-            # will be indexed by both id & filename
-            prs = {}
+    def _run_with_input(self, cmd, content, **kwargs):
+        # potentially large text content is streamed to the command via stdin,
+        # `-` as a file argument, rather than argv so that its size isn't
+        # bounded by ARG_MAX
+        return self._exec(cmd, check=True, input=content, text=True, **kwargs)
 
-            cmd = [
-                'gh',
-                'pr',
-                'list',
-                '--base',
-                self.base_branch,
-                '--state',
-                'merged',
-                f'--limit={self.max_lookback}',
-                '--json',
-                'files,mergedAt,number',
+    def _fetch_merged(self):
+        cmd = [
+            'gh',
+            'pr',
+            'list',
+            '--base',
+            self.base_branch,
+            '--state',
+            'merged',
+            f'--limit={self.max_lookback}',
+            '--json',
+            'files,mergedAt,number',
+        ]
+        repo = self.repo
+        if repo:
+            cmd.extend(('--repo', f'{repo}'))
+
+        # we need to know the repo for PR urls
+        if not repo:
+            repo = self._run(['gh', 'repo', 'view', '--json', 'nameWithOwner'])[
+                'nameWithOwner'
             ]
-            repo = self.repo
-            if repo:
-                cmd.extend(('--repo', f'{repo}'))
-
-            # we need to know the repo for PR urls
-            if not repo:
-                repo = self._run(
-                    ['gh', 'repo', 'view', '--json', 'nameWithOwner']
-                )['nameWithOwner']
-
-            for pr in self._run(cmd):
-                number = pr['number']
-                url = f'https://github.com/{repo}/pull/{number}'
-                merged_at = datetime.fromisoformat(pr['mergedAt'])
-
-                files = [
-                    f['path']
-                    for f in pr['files']
-                    if f['path'].startswith(f'{directory}/')
-                ]
-                if not files:
-                    # no changelog entries, ignore it
-                    continue
-
-                pr = Pr(
-                    id=number, text=f'#{number}', url=url, merged_at=merged_at
+
+        merged = []
+        for pr in self._run(cmd):
+            number = pr['number']
+            url = f'https://github.com/{repo}/pull/{number}'
+            merged_at = datetime.fromisoformat(pr['mergedAt'])
+            merged.append(
+                (
+                    Pr(
+                        id=number,
+                        text=f'#{number}',
+                        url=url,
+                        merged_at=merged_at,
+                    ),
+                    [f['path'] for f in pr['files']],
                 )
-                prs[number] = pr
-                for filename in files:
-                    prs[filename] = pr
-            self._prs = prs
+            )
+        return merged
+
+    def _merged(self):
+        # the merged PRs, along with the paths of the files they touched,
+        # fetched once and shared by every directory
+        if self._merged_prs is None:
+            with phase('github.prs'), span('github.prs') as s:
+                self._merged_prs = self._fetch_merged()
+                s.set('changelet.prs', len(self._merged_prs))
+        return self._merged_prs
+
+    @traced('github.index')
+    def index(self, root, directories):
+        # indexes of PRs by both id & filename for each of directories. those
+        # not already built are built together in a single pass over the
+        # merged PRs' files, so additional directories cost no extra fetches
+        # or passes. the lock keeps concurrent callers, e.g. workspace
+        # packages, from fetching more than once
+        with self._lock:
+            # gh's paths are normalized, e.g. never ./one/.changelog/x.md
+            normalized = {d: normpath(d) for d in directories}
+            missing = {n for n in normalized.values() if n not in self._prs}
+            if missing:
+                built = {d: {} for d in missing}
+                for pr, paths in self._merged():
+                    for path in paths:
+                        # entries live directly in their directory
+                        prs = built.get(dirname(path))
+                        if prs is not None:
+                            prs[pr.id] = pr
+                            prs[path] = pr
+                self._prs.update(built)
+            return {d: self._prs[n] for d, n in normalized.items()}
+
+    def prs(self, root, directory):
+        return self.index(root, (directory,))[directory]
 
-        return self._prs
+    def reset(self):
+        # drops the fetched PRs and indexes, they'll be rebuilt on next use
+        with self._lock:
+            self._merged_prs = None
+            self._prs = {}
+
+    def _lookup(self, root, directory, key, by):
+        pr = self.prs(root=root, directory=directory).get(key)
+        inc('changelet_pr_lookups_total', by=by)
+        if pr is None:
+            inc('changelet_pr_lookup_misses_total', by=by)
+        return pr
 
     def pr_by_id(self, root, directory, id):
-        return self.prs(root=root, directory=directory).get(id)
+        return self._lookup(root, directory, id, 'id')
 
     def pr_by_filename(self, root, directory, filename):
-        return self.prs(root=root, directory=directory).get(filename)
+        return self._lookup(root, directory, normpath(filename), 'filename')
 
-    def changelog_entries_in_branch(self, root, directory):
-        result = run(
-            ['git', 'diff', '--name-only', f'origin/{self.base_branch}'],
+    def _rev_parse(self, *refs):
+        # the shas refs resolve to, None if any of them can't be
+        result = self._exec(
+            ['git', 'rev-parse', *refs],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        shas = tuple(result.stdout.split())
+        if result.returncode or len(shas) != len(refs):
+            return None
+        return shas
+
+    def _merge_base(self, shas):
+        # cached per pair of commits, refs often share one
+        try:
+            return self._merge_bases[shas]
+        except KeyError:
+            pass
+        result = self._exec(
+            ['git', 'merge-base', *shas],
             check=False,
+            capture_output=True,
+            text=True,
+        )
+        merge_base = None if result.returncode else result.stdout.strip()
+        self._merge_bases[shas] = merge_base
+        return merge_base
+
+    def state(self):
+        # the HEAD & base commits, they move w/new commits & merged PRs
+        shas = self._rev_parse('HEAD', f'origin/{self.base_branch}')
+        return ' '.join(shas) if shas else None
+
+    def _diff_since_base(self, options, paths=()):
+        # a single git diff of the working tree against where the branch
+        # forked from base, --merge-base has git find that in the same
+        # process. w/o one, e.g. in a shallow clone, it's against base itself
+        cmd = [
+            'git',
+            'diff',
+            *options,
+            '--merge-base',
+            f'origin/{self.base_branch}',
+        ]
+        if paths:
+            cmd.extend(('--', *paths))
+        result = self._exec(cmd, check=False, stdout=PIPE)
+        if result.returncode:
+            cmd = [c for c in cmd if c != '--merge-base']
+            result = self._exec(cmd, check=False, stdout=PIPE)
+        return result.stdout.decode('utf-8')
+
+    @traced('github.changed_files')
+    def changed_files(self):
+        # path -> status letter, e.g. A or M, for everything changed since
+        # the merge base, in a single diff
+        pieces = self._diff_since_base(
+            ('--name-status', '--no-renames', '-z')
+        ).split('\0')
+        return {
+            path: status[0] for status, path in zip(pieces[::2], pieces[1::2])
+        }
+
+    @traced('github.pr_files')
+    def pr_files(self, number, repo=None):
+        # the files a PR changes, each w/filename & status, e.g. added, as
+        # GitHub's API reports them, every page of them
+        repo = repo or self.repo or '{owner}/{repo}'
+        result = self._exec(
+            [
+                'gh',
+                'api',
+                '--paginate',
+                f'repos/{repo}/pulls/{number}/files',
+                '--jq',
+                '.[] | {filename, status}',
+            ],
+            check=True,
             stdout=PIPE,
         )
+        return [loads(line) for line in result.stdout.splitlines() if line]
+
+    @traced('github.changelog_entries_in_branch')
+    def changelog_entries_in_branch(self, root, directory):
+        # only entries added since the merge base count, so that being behind
+        # base doesn't matter, and the pathspec limits git to walking just
+        # the changelog directory
+        output = self._diff_since_base(
+            ('--name-only', '--diff-filter=A'), (f'{directory}/',)
+        )
         return {
             l
-            for l in result.stdout.decode('utf-8').split()
+            for l in output.split()
             if l.endswith('.md') and l.startswith(f'{directory}/')
         }
 
+    @traced('github.changelog_entries_in_refs')
+    def changelog_entries_in_refs(
+        self, root, directories, refs, max_workers=None
+    ):
+        # ref -> the changelog entries, in any of directories, it adds
+        # relative to base, None if it can't be resolved. base is resolved
+        # once, the refs and their merge bases concurrently, and then all of
+        # the diffs are run through a single `git diff-tree --stdin`
+        refs = list(refs)
+        base = self._rev_parse(f'origin/{self.base_branch}^{{commit}}')
+
+        def resolve(ref):
+            shas = self._rev_parse(f'{ref}^{{commit}}')
+            if base is None or shas is None:
+                return None
+            return shas[0], self._merge_base((shas[0], base[0])) or base[0]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = dict(zip(refs, executor.map(resolve, refs)))
+
+        # sha -> since, refs pointing at the same commit are only diffed once
+        pairs = dict(p for p in resolved.values() if p is not None)
+        added = {sha: set() for sha in pairs}
+        if pairs:
+            directories = set(directories)
+            cmd = [
+                'git',
+                'diff-tree',
+                '--stdin',
+                '-r',
+                '-z',
+                '--name-status',
+                '--diff-filter=A',
+                '--',
+                *(f'{d}/' for d in sorted(directories)),
+            ]
+            # `<commit> <parent>` diffs parent to commit, output for each is
+            # the commit's sha followed by status & path pairs, nothing at
+            # all when there are no changes
+            queries = ''.join(
+                f'{sha} {since}\n' for sha, since in pairs.items()
+            )
+            with _measured(cmd) as s, self._open(
+                cmd, stdin=PIPE, stdout=PIPE
+            ) as proc:
+                out, _ = proc.communicate(queries.encode('utf-8'))
+                s.set('process.exit.code', proc.returncode)
+                s.set('changelet.output.size', len(out))
+            if proc.returncode:
+                raise CalledProcessError(proc.returncode, cmd)
+            pieces = iter(out.decode('utf-8').split('\0'))
+            current = None
+            for piece in pieces:
+                if piece in added:
+                    current = added[piece]
+                elif piece:
+                    path = next(pieces, '')
+                    if path.endswith('.md') and dirname(path) in directories:
+                        current.add(path)
+
+        return {
+            ref: None if pair is None else added[pair[0]]
+            for ref, pair in resolved.items()
+        }
+
+    def commits(self, ref):
+        # commits in ref..HEAD, newest first, as (sha, subject, body). git's
+        # output is streamed and parsed a commit at a time so that long
+        # histories never need to be held in memory
+        cmd = [
+            'git',
+            'log',
+            '--no-merges',
+            '--format=%x1e%H%x00%s%x00%b',
+            f'{ref}..HEAD',
+        ]
+        with _measured(cmd) as s:
+            with self._open(cmd, stdout=PIPE, text=True) as proc:
+                record = ''
+                for line in proc.stdout:
+                    if line.startswith('\x1e'):
+                        if record:
+                            yield self._commit(record)
+                        record = line[1:]
+                    else:
+                        record += line
+                if record:
+                    yield self._commit(record)
+            s.set('process.exit.code', proc.returncode)
+            if proc.returncode:
+                raise CalledProcessError(proc.returncode, cmd)
+
+    @traced('github.ls_tree')
+    def ls_tree(self, ref, directory):
+        # paths, relative to the cwd, of the files in directory as of ref
+        result = self._exec(
+            ['git', 'ls-tree', '-z', '--name-only', ref, '--', f'{directory}/'],
+            check=True,
+            capture_output=True,
+        )
+        return [p for p in result.stdout.decode('utf-8').split('\0') if p]
+
+    @traced('github.cat_files')
+    def cat_files(self, ref, paths):
+        # the contents of paths as of ref, read through a single
+        # `git cat-file --batch`. None for those that don't exist
+        paths = list(paths)
+        if not paths:
+            return {}
+        names = ''.join(f'{ref}:./{p}\n' for p in paths)
+        result = self._exec(
+            ['git', 'cat-file', '--batch'],
+            check=True,
+            capture_output=True,
+            input=names.encode('utf-8'),
+        )
+        out = result.stdout
+        ret = {}
+        offset = 0
+        for path in paths:
+            # <sha> blob <size>\n<content>\n or <name> missing\n
+            end = out.index(b'\n', offset)
+            header = out[offset:end].split()
+            offset = end + 1
+            if len(header) != 3:
+                ret[path] = None
+                continue
+            size = int(header[2])
+            ret[path] = out[offset : offset + size].decode('utf-8')
+            offset += size + 1
+        return ret
+
+    def _commit(self, record):
+        sha, subject, body = record.split('\0', 2)
+        return sha, subject, body.strip()
+
     def add_file(self, filename):
-        cmd = ['git', 'add', filename]
+        self.add_files((filename,))
+
+    @traced('github.add_files')
+    def add_files(self, filenames):
+        # stages all of the files, including deletions, in a single git
+        # invocation. `git add <pathspec>` records removals of deleted paths
+        # as well as additions and modifications
+        filenames = list(filenames)
+        if not filenames:
+            return
+        cmd = ['git', 'add']
         extra_args = environ.get('CHANGELET_GIT_ADD_ARGS', '').strip()
         if extra_args:
             # Use shlex.split to handle quoted arguments properly
-            cmd[2:2] = shlex_split(extra_args)
-        run(cmd, check=True)
+            cmd.extend(shlex_split(extra_args))
+        if sum(len(f) + 1 for f in filenames) > self.ADD_FILES_ARGV_MAX:
+            # long lists are fed through stdin to stay well clear of ARG_MAX
+            cmd.extend(('--pathspec-from-file=-', '--pathspec-file-nul'))
+            self._exec(
+                cmd, check=True, input='\0'.join(filenames).encode('utf-8')
+            )
+        else:
+            cmd.extend(filenames)
+            self._exec(cmd, check=True)
 
+    @traced('github.has_staged')
     def has_staged(self, exclude=None):
-        result = run(
+        result = self._exec(
             ['git', 'diff', '--staged', '--name-only'],
             check=True,
             capture_output=True,
@@ -123,8 +460,9 @@ class GitHubCli:
             files -= {exclude}
         return len(files) > 0
 
+    @traced('github.staged_changelog_entry')
     def staged_changelog_entry(self, directory):
-        result = run(
+        result = self._exec(
             ['git', 'diff', '--staged', '--name-only'],
             check=True,
             capture_output=True,
@@ -134,16 +472,18 @@ class GitHubCli:
                 return line
         return None
 
+    @traced('github.commit')
     def commit(self, description):
-        cmd = ['git', 'commit', '--message', description]
+        cmd = ['git', 'commit', '--file', '-']
         extra_args = environ.get('CHANGELET_GIT_COMMIT_ARGS', '').strip()
         if extra_args:
             # Use shlex.split to handle quoted arguments properly
             cmd[2:2] = shlex_split(extra_args)
-        run(cmd, check=True)
+        self._run_with_input(cmd, description)
 
+    @traced('github.current_branch')
     def current_branch(self):
-        result = run(
+        result = self._exec(
             ['git', 'branch', '--show-current'],
             check=True,
             capture_output=True,
@@ -151,8 +491,9 @@ class GitHubCli:
         )
         return result.stdout.strip()
 
+    @traced('github.has_local_changes')
     def has_local_changes(self):
-        result = run(
+        result = self._exec(
             ['git', 'status', '--porcelain'],
             check=True,
             capture_output=True,
@@ -160,41 +501,44 @@ class GitHubCli:
         )
         return bool(result.stdout.strip())
 
+    @traced('github.pull')
     def pull(self):
-        run(['git', 'pull'], check=True, capture_output=True, text=True)
+        self._exec(['git', 'pull'], check=True, capture_output=True, text=True)
 
+    @traced('github.create_branch')
     def create_branch(self, name):
-        run(
+        self._exec(
             ['git', 'checkout', '-b', name],
             check=True,
             capture_output=True,
             text=True,
         )
 
+    @traced('github.push_branch')
     def push_branch(self, name):
-        run(
+        self._exec(
             ['git', 'push', '-u', 'origin', name],
             check=True,
             capture_output=True,
             text=True,
         )
 
+    @traced('github.create_pr')
     def create_pr(self, title, body):
-        result = run(
+        result = self._run_with_input(
             [
                 'gh',
                 'pr',
                 'create',
                 '--title',
                 title,
-                '--body',
-                body,
+                '--body-file',
+                '-',
                 '--assignee',
                 '@me',
             ],
-            check=True,
+            body,
             capture_output=True,
-            text=True,
         )
         return result.stdout.strip()
 
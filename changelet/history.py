@@ -0,0 +1,143 @@
+#
+#
+#
+
+from mmap import ACCESS_READ, mmap
+from os import stat
+from os.path import abspath
+from re import MULTILINE
+from re import compile as re_compile
+from zlib import crc32
+
+from .cache import Cache
+
+# ## 1.2.3 - 2025-07-04 - Optional Title
+_SECTION_RE = re_compile(
+    rb'^## (?P<version>v?\d+\.\d+\.\d+\S*) - (?P<date>\d{4}-\d{2}-\d{2})'
+    rb'(?: - (?P<title>[^\r\n]*))?\r?$',
+    MULTILINE,
+)
+
+
+class Section:
+
+    def __init__(self, version, date, title, start, end):
+        self.version = version
+        self.date = date
+        self.title = title
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'Section<{self.version}, {self.date}, {self.start}-{self.end}>'
+
+
+class ChangelogIndex:
+    # filename -> (mtime_ns, size, index), w/cache_dir the sections' offsets
+    # are also stored there for other processes
+    _cache = {}
+
+    @classmethod
+    def _scan(cls, filename, size):
+        sections = []
+        if size:
+            with open(filename, 'rb') as fh, mmap(
+                fh.fileno(), 0, access=ACCESS_READ
+            ) as mm:
+                for match in _SECTION_RE.finditer(mm):
+                    title = match.group('title')
+                    sections.append(
+                        Section(
+                            version=match.group('version').decode('utf-8'),
+                            date=match.group('date').decode('utf-8'),
+                            title=title.decode('utf-8') if title else None,
+                            start=match.start(),
+                            end=None,
+                        )
+                    )
+        # each section runs until the start of the next, the last to the end
+        # of the file
+        for i, section in enumerate(sections):
+            try:
+                section.end = sections[i + 1].start
+            except IndexError:
+                section.end = size
+        return sections
+
+    @classmethod
+    def _stored(cls, filename, key, cache):
+        # the sections' offsets as stored by a previous process, so that the
+        # file is only scanned once per change rather than once per run
+        name = f'history-{crc32(abspath(filename).encode("utf-8")):08x}'
+        data = cache.load(name)
+        try:
+            if data['key'] == list(key):
+                return [Section(*s) for s in data['sections']]
+        except (KeyError, TypeError):
+            # missing or unusable, rescan
+            pass
+        sections = cls._scan(filename, key[1])
+        cache.store(
+            name,
+            {
+                'key': key,
+                'sections': [
+                    (s.version, s.date, s.title, s.start, s.end)
+                    for s in sections
+                ],
+            },
+        )
+        return sections
+
+    @classmethod
+    def load(cls, filename, cache_dir=None):
+        try:
+            st = stat(filename)
+        except FileNotFoundError:
+            return ChangelogIndex(filename, [])
+        key = (st.st_mtime_ns, st.st_size)
+        try:
+            cached_key, index = cls._cache[filename]
+            if cached_key == key:
+                return index
+        except KeyError:
+            pass
+        if cache_dir:
+            sections = cls._stored(filename, key, Cache(cache_dir))
+        else:
+            sections = cls._scan(filename, st.st_size)
+        index = ChangelogIndex(filename, sections)
+        cls._cache[filename] = (key, index)
+        return index
+
+    def __init__(self, filename, sections):
+        self.filename = filename
+        self.sections = sections
+        self._by_version = {s.version.lstrip('v'): s for s in sections}
+
+    @property
+    def latest(self):
+        try:
+            return self.sections[0]
+        except IndexError:
+            return None
+
+    def get(self, version):
+        return self._by_version.get(str(version).lstrip('v'))
+
+    def read(self, version):
+        section = self.get(version)
+        if section is None:
+            return None
+        with open(self.filename, 'rb') as fh:
+            fh.seek(section.start)
+            return fh.read(section.end - section.start).decode('utf-8')
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __repr__(self):
+        return f'ChangelogIndex<{self.filename}, {len(self.sections)}>'
@@ -0,0 +1,123 @@
+#
+#
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from os import listdir
+from os.path import isdir, join
+
+from .entry import Entry, EntryType
+
+_EXPECTED_TYPES = ', '.join(t.value for t in EntryType)
+
+
+class LintError:
+
+    def __init__(self, filename, line, message):
+        self.filename = filename
+        self.line = line
+        self.message = message
+
+    def __eq__(self, other):
+        return self._key == other._key
+
+    def __lt__(self, other):
+        return self._key < other._key
+
+    @property
+    def _key(self):
+        return (self.filename, self.line, self.message)
+
+    def __str__(self):
+        return f'{self.filename}:{self.line}: {self.message}'
+
+    def __repr__(self):
+        return f'LintError<{self}>'
+
+
+def lint_text(filename, text):
+    # every problem that would keep text from loading as an entry, w/the
+    # 1-based line it's on
+    if not text.startswith('---\n'):
+        return [LintError(filename, 1, 'Missing front matter, expected ---')]
+    pieces = text.split('---\n', 2)
+    if len(pieces) < 3:
+        return [LintError(filename, 1, 'Unterminated front matter')]
+    front, description = pieces[1], pieces[2]
+    front_lines = front.split('\n')
+
+    data = Entry._front_matter(front)
+    if data is None:
+        from yaml import YAMLError, safe_load
+
+        try:
+            data = safe_load(front)
+        except YAMLError as e:
+            mark = getattr(e, 'problem_mark', None)
+            line = 2 + mark.line if mark else 2
+            problem = getattr(e, 'problem', None) or e
+            return [
+                LintError(filename, line, f'Invalid front matter, {problem}')
+            ]
+    if not isinstance(data, dict):
+        return [LintError(filename, 2, 'Front matter must be a mapping')]
+
+    def line_of(key):
+        for i, line in enumerate(front_lines):
+            if line.startswith(f'{key}:'):
+                return i + 2
+        # e.g. flow style, {type: minor}
+        return 2
+
+    errors = []
+    try:
+        EntryType(data['type'])
+    except KeyError:
+        errors.append(LintError(filename, 1, 'Missing type'))
+    except ValueError:
+        errors.append(
+            LintError(
+                filename,
+                line_of('type'),
+                f'Invalid type "{data["type"]}", expected one of {_EXPECTED_TYPES}',
+            )
+        )
+    pr = data.get('pr')
+    if pr is not None and (not isinstance(pr, int) or isinstance(pr, bool)):
+        errors.append(
+            LintError(
+                filename, line_of('pr'), f'Invalid pr "{pr}", expected a number'
+            )
+        )
+    if not description.strip():
+        # the line after the closing ---
+        errors.append(
+            LintError(filename, len(front_lines) + 2, 'Empty description')
+        )
+    return errors
+
+
+def lint_file(filename):
+    try:
+        with open(filename) as fh:
+            text = fh.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return [LintError(filename, 1, f'Unreadable, {e}')]
+    return lint_text(filename, text)
+
+
+def lint(directories, max_workers=None):
+    # the errors in all of the entries in directories, sorted by file and
+    # line. files are read and parsed concurrently
+    filenames = []
+    for directory in directories:
+        if isdir(directory):
+            filenames.extend(
+                join(directory, f)
+                for f in listdir(directory)
+                if f.endswith('.md')
+            )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sorted(
+            e for errors in executor.map(lint_file, filenames) for e in errors
+        )
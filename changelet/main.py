@@ -2,16 +2,17 @@
 #
 #
 
-import logging
+import sys
 from argparse import ArgumentParser
 from sys import argv as sys_argv
 
+from changelet import metrics, timings, trace
+from changelet.client import forward
 from changelet.command import commands
 from changelet.config import Config
 
 
-def main(argv=sys_argv, exit_on_error=True):
-
+def build_parser(argv, exit_on_error=True):
     parser = ArgumentParser(add_help=True, exit_on_error=exit_on_error)
     parser.add_argument(
         '-c',
@@ -40,21 +41,80 @@ def main(argv=sys_argv, exit_on_error=True):
         default=None,
         choices=('CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG'),
     )
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        default=False,
+        help='Print a breakdown of where the time went, by phase and subprocess, to stderr',
+    )
+    parser.add_argument(
+        '--profile',
+        default=None,
+        metavar='FILE',
+        help='Profile the run, writing cProfile stats, readable w/pstats, to FILE',
+    )
+    parser.add_argument(
+        '--trace',
+        default=None,
+        metavar='FILE',
+        help='Record trace spans for the run and write them to FILE as OTLP JSON, joins $TRACEPARENT when set',
+    )
+    parser.add_argument(
+        '--metrics',
+        default=None,
+        metavar='FILE',
+        help='Write counters for the run to FILE, JSON if it ends in .json, Prometheus text format otherwise',
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        '--record',
+        default=None,
+        metavar='FILE',
+        help='Record every git & gh invocation, w/its output and timing, to FILE',
+    )
+    replay.add_argument(
+        '--replay',
+        default=None,
+        metavar='FILE',
+        help='Serve every git & gh invocation from FILE, recorded w/--record, rather than running them',
+    )
+    parser.add_argument(
+        '--replay-latency',
+        default=0,
+        type=float,
+        metavar='SECONDS',
+        help='Add SECONDS to each replayed invocation, Default: 0',
+    )
+    parser.add_argument(
+        '--replay-realtime',
+        action='store_true',
+        default=False,
+        help='Have each replayed invocation take as long as it did when recorded',
+    )
+    parser.add_argument(
+        '--replay-writes',
+        action='store_true',
+        default=False,
+        help='Allow replayed commands that write the working tree, e.g. bump --make-changes, only git & gh are replayed',
+    )
 
     subparsers = parser.add_subparsers(
         dest="command", required=True, help="Available sub-commands"
     )
-    for command in commands.values():
-        command_parser = subparsers.add_parser(
-            command.name, description=command.description
-        )
-        command.configure(command_parser)
+    # only the command(s) named in argv are imported and configured, the rest
+    # just need to be known to the parser
+    requested = set(argv[1:])
+    for name in commands:
+        command_parser = subparsers.add_parser(name)
+        if name in requested:
+            command = commands[name]
+            command_parser.description = command.description
+            command.configure(command_parser)
 
-    args = parser.parse_args(argv[1:])
+    return parser
 
-    if args.logging is not None:
-        logging.basicConfig(level=getattr(logging, args.logging))
 
+def config_kwargs(args):
     kwargs = {}
     if args.config:
         kwargs['config'] = args.config
@@ -64,7 +124,44 @@ def main(argv=sys_argv, exit_on_error=True):
         kwargs['directory'] = args.directory
     if args.module:
         kwargs['module'] = args.module
-    config = Config.build(**kwargs)
+    return kwargs
+
+
+def _writes(args):
+    # commands that change the working tree, which replaying git & gh doesn't
+    # stop them from doing
+    command = args.command
+    if command == 'bump':
+        return args.make_changes or args.pr
+    if command == 'import':
+        return not args.dry_run
+    return command == 'create'
+
+
+def _run(argv, args):
+    if args.replay and not args.replay_writes and _writes(args):
+        print(
+            f'Error: a replayed {args.command} would still write the working '
+            'tree, run it in a throwaway copy w/--replay-writes',
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    with timings.phase('config'), trace.span('config'):
+        config = Config.build(**config_kwargs(args))
+    if args.record or args.replay:
+        from changelet.replay import ReplayException, install
+
+        try:
+            install(
+                config,
+                record=args.record,
+                replay=args.replay,
+                latency=args.replay_latency,
+                realtime=args.replay_realtime,
+            )
+        except (OSError, ValueError, ReplayException) as e:
+            print(f'Error: {e}', file=sys.stderr)
+            sys.exit(1)
     try:
         command = commands[args.command]
     except KeyError:  # pragma: no cover
@@ -73,7 +170,63 @@ def main(argv=sys_argv, exit_on_error=True):
         # returning args w/o a command. This handles that case w/o blowing up
         pass
     else:
-        command.run(args=args, config=config)
+        # hand off to `changelet serve` if it's running for this project,
+        # unless this run is being measured, recorded, or replayed
+        if not (
+            args.timings
+            or args.profile
+            or args.trace
+            or args.metrics
+            or args.record
+            or args.replay
+        ):
+            response = forward(argv, args, config)
+            if response is not None:
+                sys.stdout.write(response['stdout'])
+                sys.stderr.write(response['stderr'])
+                sys.exit(response['code'])
+        with timings.phase('run'):
+            command.run(args=args, config=config)
+
+
+def main(argv=sys_argv, exit_on_error=True):
+    parser = build_parser(argv, exit_on_error=exit_on_error)
+    args = parser.parse_args(argv[1:])
+
+    if args.logging is not None:
+        import logging
+
+        logging.basicConfig(level=getattr(logging, args.logging))
+
+    profiler = None
+    if args.profile:
+        from cProfile import Profile
+
+        profiler = Profile()
+        profiler.enable()
+    if args.timings:
+        timings.start()
+    if args.trace:
+        trace.start()
+    if args.metrics:
+        metrics.start()
+    # commands exit rather than return, the reports are written regardless
+    try:
+        # a single root span for the whole run
+        with trace.span(
+            f'changelet {args.command}', {'changelet.command': args.command}
+        ):
+            _run(argv, args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.timings:
+            timings.stop().report(sys.stderr)
+        if args.trace:
+            trace.stop().export(args.trace)
+        if args.metrics:
+            metrics.stop().write(args.metrics)
 
 
 if __name__ == '__main__':  # pragma: no cover
@@ -0,0 +1,135 @@
+#
+#
+#
+
+from json import dump
+from os import chmod, replace
+from os.path import dirname
+from threading import Lock
+
+# the Metrics being collected, None unless --metrics is in use
+_active = None
+
+# name -> help, every counter that's known
+COUNTERS = {
+    'changelet_entries_loaded_total': 'Changelog entries loaded',
+    'changelet_cache_hits_total': 'Cache lookups that were hits, by cache',
+    'changelet_cache_misses_total': 'Cache lookups that were misses, by cache',
+    'changelet_pr_lookups_total': 'Entry PR lookups, by id or filename',
+    'changelet_pr_lookup_misses_total': 'Entry PR lookups that found no PR',
+    'changelet_subprocesses_total': 'Subprocesses run, by tool',
+    'changelet_github_calls_total': 'gh invocations, i.e. GitHub API calls',
+    'changelet_json_bytes_parsed_total': 'Bytes of gh JSON output parsed',
+}
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{k}="{v}"' for k, v in labels)
+    return f'{{{pairs}}}'
+
+
+class Metrics:
+
+    def __init__(self):
+        # (name, sorted labels) -> value
+        self.counters = {}
+        self._lock = Lock()
+
+    def inc(self, name, value=1, **labels):
+        if name not in COUNTERS:
+            raise ValueError(f'Unknown metric "{name}"')
+        key = (name, tuple(sorted(labels.items())))
+        # commands & providers update counters from multiple threads
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def get(self, name, **labels):
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def ratios(self):
+        # cache -> hits / lookups for each cache that was used
+        caches = {
+            dict(labels)['cache']
+            for (name, labels) in self.counters
+            if name
+            in ('changelet_cache_hits_total', 'changelet_cache_misses_total')
+        }
+        ret = {}
+        for cache in sorted(caches):
+            hits = self.get('changelet_cache_hits_total', cache=cache)
+            misses = self.get('changelet_cache_misses_total', cache=cache)
+            ret[cache] = hits / (hits + misses)
+        return ret
+
+    def prometheus(self):
+        # text exposition format, e.g. for node exporter's textfile collector
+        lines = []
+        for name, help in COUNTERS.items():
+            samples = sorted(
+                (labels, v)
+                for (n, labels), v in self.counters.items()
+                if n == name
+            )
+            if not samples:
+                continue
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(labels)} {value}')
+        ratios = self.ratios()
+        if ratios:
+            name = 'changelet_cache_hit_ratio'
+            lines.append(f'# HELP {name} Cache hits over lookups, by cache')
+            lines.append(f'# TYPE {name} gauge')
+            for cache, ratio in ratios.items():
+                lines.append(f'{name}{_labels((("cache", cache),))} {ratio}')
+        lines.append('')
+        return '\n'.join(lines)
+
+    def summary(self):
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            'cache_hit_ratios': self.ratios(),
+        }
+
+    def write(self, filename):
+        # JSON for .json files, Prometheus' text format otherwise. written to
+        # a temp file and moved into place so that collectors never see a
+        # partial file
+        from tempfile import NamedTemporaryFile
+
+        with NamedTemporaryFile(
+            'w', dir=dirname(filename) or '.', suffix='.tmp', delete=False
+        ) as fh:
+            if filename.endswith('.json'):
+                dump(self.summary(), fh)
+                fh.write('\n')
+            else:
+                fh.write(self.prometheus())
+        # readable by collectors running as other users
+        chmod(fh.name, 0o644)
+        replace(fh.name, filename)
+
+
+def start():
+    global _active
+    _active = Metrics()
+    return _active
+
+
+def stop():
+    global _active
+    ret = _active
+    _active = None
+    return ret
+
+
+def inc(name, value=1, **labels):
+    # a no-op unless metrics are being collected
+    if _active is not None:
+        _active.inc(name, value, **labels)
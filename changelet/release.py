@@ -0,0 +1,132 @@
+#
+#
+#
+
+from datetime import datetime
+from hashlib import sha256
+from os import listdir
+from os.path import abspath, isdir, join
+from time import time
+
+from .cache import Cache
+from .entry import Entry
+from .metrics import inc
+from .pr import Pr
+
+
+def _entry_data(entry):
+    pr = entry.pr
+    if pr is not None:
+        pr = {
+            'id': pr.id,
+            'text': pr.text,
+            'url': pr.url,
+            'merged_at': pr.merged_at.isoformat(),
+        }
+    return {
+        'type': entry.type.value,
+        'description': entry.description,
+        'filename': entry.filename,
+        'pr': pr,
+    }
+
+
+def _entry_from_data(data):
+    pr = data['pr']
+    if pr is not None:
+        pr = Pr(
+            id=pr['id'],
+            text=pr['text'],
+            url=pr['url'],
+            merged_at=datetime.fromisoformat(pr['merged_at']),
+        )
+    return Entry(
+        type=data['type'],
+        description=data['description'],
+        pr=pr,
+        filename=data['filename'],
+    )
+
+
+class ReleaseCache:
+    NAME = 'release'
+    # seconds after which stored entries are never reused, e.g. for
+    # providers w/o a state to tell whether PRs have merged since
+    MAX_AGE = 3600
+
+    def __init__(self, config, current_version):
+        self.config = config
+        self.current_version = current_version
+        self._digest = None
+
+        cache_dir = config.cache_dir
+        self.cache = Cache(cache_dir) if cache_dir else None
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            config = self.config
+            directory = config.directory
+            h = sha256()
+            h.update(str(self.current_version).encode('utf-8'))
+            h.update(b'\0')
+            provider = config.provider
+            h.update(repr(provider).encode('utf-8'))
+            h.update(b'\0')
+            # settings alone don't say whether anything has changed since,
+            # e.g. for GitHubCli the HEAD & base commits
+            state = getattr(provider, 'state', None)
+            if state is not None:
+                h.update(str(state()).encode('utf-8'))
+                h.update(b'\0')
+            h.update(abspath(directory).encode('utf-8'))
+            h.update(b'\0')
+            if isdir(directory):
+                for filename in sorted(listdir(directory)):
+                    if not filename.endswith('.md'):
+                        continue
+                    h.update(filename.encode('utf-8'))
+                    h.update(b'\0')
+                    with open(join(directory, filename), 'rb') as fh:
+                        h.update(fh.read())
+                    h.update(b'\0')
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def load(self):
+        if self.cache is None:
+            return None
+        data = self.cache.load(self.NAME)
+        entries = None
+        if (
+            data
+            and data.get('digest') == self.digest
+            and 0 <= time() - data.get('created', 0) <= self.MAX_AGE
+        ):
+            try:
+                entries = [_entry_from_data(e) for e in data['entries']]
+            except (KeyError, TypeError, ValueError):
+                # unusable, treat it as a miss
+                pass
+        if entries is None:
+            inc('changelet_cache_misses_total', cache='release')
+        else:
+            inc('changelet_cache_hits_total', cache='release')
+        return entries
+
+    def store(self, entries):
+        if self.cache is None:
+            return
+        self.cache.store(
+            self.NAME,
+            {
+                'digest': self.digest,
+                'created': time(),
+                'entries': [_entry_data(e) for e in entries],
+            },
+        )
+
+    def clear(self):
+        if self.cache is None:
+            return
+        self.cache.remove(self.NAME)
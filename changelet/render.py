@@ -0,0 +1,186 @@
+#
+#
+#
+
+from functools import lru_cache
+from html import escape as html_escape
+from string import Template
+
+from .entry import EntryType
+
+
+def _noop(value):
+    return value
+
+
+def _html(value):
+    return html_escape(value, quote=True)
+
+
+class Format:
+    PARTS = ('header', 'section_start', 'entry', 'pr', 'section_end', 'footer')
+
+    def __init__(
+        self,
+        name,
+        header,
+        section_start,
+        entry,
+        pr,
+        section_end='',
+        footer='\n',
+        escape=_noop,
+    ):
+        self.name = name
+        self.header = header
+        self.section_start = section_start
+        self.entry = entry
+        self.pr = pr
+        self.section_end = section_end
+        self.footer = footer
+        self.escape = escape
+
+    def override(self, **parts):
+        values = {p: getattr(self, p) for p in self.PARTS}
+        values.update(parts)
+        return Format(name=self.name, escape=self.escape, **values)
+
+    def compiled(self):
+        return {p: _compile(getattr(self, p)) for p in self.PARTS}
+
+    def __repr__(self):
+        return f'Format<{self.name}>'
+
+
+FORMATS = {
+    f.name: f
+    for f in (
+        Format(
+            name='markdown',
+            header='## $heading\n',
+            section_start='\n$type:\n',
+            entry='* $description$pr\n',
+            pr=' - [$text]($url)',
+        ),
+        Format(
+            name='rst',
+            header='$heading\n$underline\n',
+            section_start='\n$type:\n\n',
+            entry='* $description$pr\n',
+            pr=' - `$text <$url>`_',
+        ),
+        Format(
+            name='html',
+            header='<h2>$heading</h2>\n',
+            section_start='<h3>$type</h3>\n<ul>\n',
+            entry='<li>$description$pr</li>\n',
+            pr=' - <a href="$url">$text</a>',
+            section_end='</ul>\n',
+            footer='',
+            escape=_html,
+        ),
+        Format(
+            name='text',
+            header='$heading\n',
+            section_start='\n$type:\n',
+            entry='* $description$pr\n',
+            pr=' - $url',
+        ),
+    )
+}
+
+
+@lru_cache(maxsize=None)
+def _compile(text):
+    # templates are keyed by their content so that identical parts, whether
+    # built-in or from config, are only ever compiled once per process
+    return Template(text)
+
+
+def formats(templates=None):
+    # templates is a dict of format name to a dict of part overrides, e.g.
+    # {'markdown': {'header': '# $heading\\n'}}
+    if not templates:
+        return FORMATS
+    try:
+        items = templates.items()
+    except AttributeError:
+        raise ValueError('templates must map format names to parts')
+    ret = dict(FORMATS)
+    for name, parts in items:
+        try:
+            ret[name] = ret[name].override(**parts)
+        except KeyError:
+            raise ValueError(f'Unknown format "{name}" in templates')
+        except TypeError:
+            raise ValueError(f'Invalid template part(s) for format "{name}"')
+    return ret
+
+
+def render(
+    version, entries, date, title=None, names=('markdown',), templates=None
+):
+    # entries are expected to already be sorted, they're walked once with
+    # every requested format rendered along the way
+    available = formats(templates)
+    try:
+        selected = [(n, available[n]) for n in names]
+    except KeyError as e:
+        raise ValueError(f'Unknown format {e}')
+
+    heading = f'{version} - {date}'
+    if title:
+        heading = f'{heading} - {title}'
+
+    targets = []
+    for name, fmt in selected:
+        compiled = fmt.compiled()
+        escape = fmt.escape
+        buf = [
+            compiled['header'].safe_substitute(
+                heading=escape(heading),
+                underline='=' * len(heading),
+                version=escape(str(version)),
+                date=escape(date),
+                title=escape(title or ''),
+            )
+        ]
+        targets.append((name, compiled, escape, buf))
+
+    current_type = None
+    for entry in entries:
+        type = entry.type
+        if type == EntryType.NONE:
+            # these aren't included in the listing
+            continue
+        new_section = type != current_type
+        for _, compiled, escape, buf in targets:
+            if new_section:
+                if current_type is not None:
+                    buf.append(compiled['section_end'].safe_substitute())
+                buf.append(
+                    compiled['section_start'].safe_substitute(
+                        type=escape(type.value.capitalize())
+                    )
+                )
+            pr = ''
+            if entry.pr:
+                pr = compiled['pr'].safe_substitute(
+                    id=escape(str(entry.pr.id)),
+                    text=escape(entry.pr.text),
+                    url=escape(entry.pr.url),
+                )
+            buf.append(
+                compiled['entry'].safe_substitute(
+                    description=escape(entry.description), pr=pr
+                )
+            )
+        current_type = type
+
+    ret = {}
+    for name, compiled, _, buf in targets:
+        if current_type is not None:
+            buf.append(compiled['section_end'].safe_substitute())
+        buf.append(compiled['footer'].safe_substitute())
+        ret[name] = ''.join(buf)
+    return ret
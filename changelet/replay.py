@@ -0,0 +1,213 @@
+#
+#
+#
+
+from io import BytesIO, StringIO
+from json import dump, load
+from os import replace
+from os.path import abspath
+from subprocess import PIPE, CalledProcessError, CompletedProcess
+from threading import Lock
+from time import perf_counter, sleep
+
+from .github import GitHubCli, _measured
+
+
+class ReplayException(Exception):
+    pass
+
+
+def _encode(value):
+    # stdout/stderr as JSON, bytes are decoded losslessly & flagged
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'surrogateescape'), True
+    return value, False
+
+
+def _decode(value, binary):
+    if value is not None and binary:
+        return value.encode('utf-8', 'surrogateescape')
+    return value
+
+
+class _Process:
+    # enough of Popen for the provider's streamed commands, the command is
+    # run, or replayed, in full via call(input) when its output is needed
+
+    def __init__(self, call, text):
+        self._call = call
+        self._text = text
+        self.returncode = None
+        self._stdout = None
+
+    def communicate(self, input=None):
+        self.returncode, out, err = self._call(input)
+        return out, err
+
+    @property
+    def stdout(self):
+        if self._stdout is None:
+            out, _ = self.communicate()
+            self._stdout = StringIO(out) if self._text else BytesIO(out)
+        return self._stdout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class RecordingGitHubCli(GitHubCli):
+    # runs everything for real while recording each invocation, its input,
+    # exit status, output, and duration, to fixture, which is rewritten after
+    # every call so that runs that exit part way through are still captured
+
+    def __init__(self, fixture, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture = abspath(fixture)
+        self.calls = []
+        self._record_lock = Lock()
+
+    def _record(self, cmd, input, returncode, stdout, stderr, duration):
+        input, _ = _encode(input)
+        stdout, binary = _encode(stdout)
+        stderr, _ = _encode(stderr)
+        with self._record_lock:
+            self.calls.append(
+                {
+                    'cmd': list(cmd),
+                    'input': input,
+                    'returncode': returncode,
+                    'stdout': stdout,
+                    'stderr': stderr,
+                    'binary': binary,
+                    'duration': duration,
+                }
+            )
+            tmp = f'{self.fixture}.tmp'
+            with open(tmp, 'w') as fh:
+                dump({'version': 1, 'calls': self.calls}, fh, indent=1)
+            replace(tmp, self.fixture)
+
+    def _exec(self, cmd, **kwargs):
+        start = perf_counter()
+        try:
+            result = super()._exec(cmd, **kwargs)
+        except CalledProcessError as e:
+            self._record(
+                cmd,
+                kwargs.get('input'),
+                e.returncode,
+                e.stdout,
+                e.stderr,
+                perf_counter() - start,
+            )
+            raise
+        self._record(
+            cmd,
+            kwargs.get('input'),
+            result.returncode,
+            result.stdout,
+            result.stderr,
+            perf_counter() - start,
+        )
+        return result
+
+    def _open(self, cmd, **kwargs):
+        text = kwargs.get('text', False)
+
+        def call(input):
+            start = perf_counter()
+            proc = super(RecordingGitHubCli, self)._open(cmd, **kwargs)
+            with proc:
+                out, err = proc.communicate(input)
+            self._record(
+                cmd, input, proc.returncode, out, err, perf_counter() - start
+            )
+            return proc.returncode, out, err
+
+        return _Process(call, text)
+
+
+class ReplayGitHubCli(GitHubCli):
+    # serves every invocation from a fixture written by RecordingGitHubCli,
+    # w/o running anything. identical commands are answered in the order
+    # they were recorded, the last answer repeating once they run out.
+    # latency, in seconds, is added to each call and with realtime each also
+    # takes as long as it did when recorded
+
+    def __init__(self, fixture, latency=0, realtime=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture = fixture
+        self.latency = latency
+        self.realtime = realtime
+        with open(fixture) as fh:
+            data = load(fh)
+        # cmd -> [recorded calls]
+        self._calls = {}
+        for call in data['calls']:
+            self._calls.setdefault(tuple(call['cmd']), []).append(call)
+        self._replay_lock = Lock()
+
+    def _next(self, cmd):
+        with self._replay_lock:
+            try:
+                calls = self._calls[tuple(cmd)]
+            except KeyError:
+                raise ReplayException(
+                    f'No recording of `{" ".join(cmd)}` in {self.fixture}'
+                )
+            call = calls.pop(0) if len(calls) > 1 else calls[0]
+        delay = self.latency
+        if self.realtime:
+            delay += call['duration']
+        if delay:
+            sleep(delay)
+        return call
+
+    def _exec(self, cmd, check=False, **kwargs):
+        with _measured(cmd) as s:
+            call = self._next(cmd)
+            binary = call['binary']
+            captured = (
+                kwargs.get('capture_output') or kwargs.get('stdout') == PIPE
+            )
+            stdout = _decode(call['stdout'], binary) if captured else None
+            stderr = _decode(call['stderr'], binary) if captured else None
+            s.set('process.exit.code', call['returncode'])
+            if check and call['returncode']:
+                raise CalledProcessError(
+                    call['returncode'], cmd, stdout, stderr
+                )
+            return CompletedProcess(cmd, call['returncode'], stdout, stderr)
+
+    def _open(self, cmd, **kwargs):
+        def call(input):
+            call = self._next(cmd)
+            return (
+                call['returncode'],
+                _decode(call['stdout'], call['binary']),
+                _decode(call['stderr'], call['binary']),
+            )
+
+        return _Process(call, kwargs.get('text', False))
+
+
+def install(config, record=None, replay=None, latency=0, realtime=False):
+    # swaps config's provider for one that records to, or replays from, the
+    # given fixture, keeping its settings. only the builtin provider runs its
+    # commands through _exec/_open so it's the only one that can be wrapped
+    settings = dict(config._provider_config or {})
+    klass = settings.pop('class', None)
+    if klass not in ('changelet.github.GitHubCli', GitHubCli):
+        raise ReplayException(
+            'Record & replay are only supported w/the GitHubCli provider'
+        )
+    if record is not None:
+        config.provider = RecordingGitHubCli(fixture=record, **settings)
+    else:
+        config.provider = ReplayGitHubCli(
+            fixture=replay, latency=latency, realtime=realtime, **settings
+        )
+    return config.provider
@@ -0,0 +1,88 @@
+#
+#
+#
+
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from time import perf_counter
+
+# the Timings being recorded, None unless --timings is in use
+_active = None
+_NULL = nullcontext()
+
+
+class Timings:
+
+    def __init__(self):
+        # name -> [count, total, max] seconds, in the order first seen
+        self.phases = {}
+        # subprocess, e.g. `git diff` -> [count, total, max] seconds
+        self.commands = {}
+        self._lock = Lock()
+        self._start = perf_counter()
+
+    @contextmanager
+    def _time(self, stats, key):
+        # phases & subprocesses can be timed from multiple threads. they're
+        # listed in the order they start, outer phases before inner ones
+        with self._lock:
+            stat = stats.setdefault(key, [0, 0.0, 0.0])
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] = max(stat[2], elapsed)
+
+    def phase(self, name):
+        return self._time(self.phases, name)
+
+    def command(self, cmd):
+        # grouped by the tool and its sub-command, e.g. gh pr
+        return self._time(self.commands, ' '.join(cmd[:2]))
+
+    def _table(self, title, stats):
+        lines = [f'{title:<32} {"Calls":>6} {"Total":>11} {"Max":>11}']
+        for name, (count, total, longest) in stats.items():
+            lines.append(
+                f'{name:<32} {count:>6} {total * 1000:>8.1f} ms '
+                f'{longest * 1000:>8.1f} ms'
+            )
+        return lines
+
+    def report(self, fh):
+        # phases nest, e.g. entries.parse is part of entries.load, so they
+        # don't sum to the total
+        lines = self._table('Phase', self.phases)
+        if self.commands:
+            lines.append('')
+            lines.extend(self._table('Subprocess', self.commands))
+        total = perf_counter() - self._start
+        lines.append(f'\nTotal {total * 1000:.1f} ms')
+        fh.write('\n'.join(lines))
+        fh.write('\n')
+
+
+def start():
+    global _active
+    _active = Timings()
+    return _active
+
+
+def stop():
+    global _active
+    ret = _active
+    _active = None
+    return ret
+
+
+def phase(name):
+    # times the block as name, a no-op unless timings are being recorded
+    return _NULL if _active is None else _active.phase(name)
+
+
+def command(cmd):
+    return _NULL if _active is None else _active.command(cmd)
@@ -0,0 +1,201 @@
+#
+#
+#
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from json import dump
+from os import environ, urandom
+from re import compile as re_compile
+from threading import Lock
+from time import time_ns
+
+# the Tracer recording spans, None unless --trace is in use
+_active = None
+# the innermost open span, the parent of any started within it
+_current = ContextVar('changelet_span', default=None)
+
+# W3C trace context, e.g. from the pipeline that's running changelet
+_TRACEPARENT_RE = re_compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}')
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+def _value(value):
+    # OTLP/JSON's AnyValue, 64-bit ints are encoded as strings
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [_value(v) for v in value]}}
+    return {'stringValue': str(value)}
+
+
+def _attributes(attributes):
+    return [{'key': k, 'value': _value(v)} for k, v in attributes.items()]
+
+
+class Span:
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time_ns()
+        self.end = None
+        self.status = STATUS_UNSET
+        self.message = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def error(self, message):
+        self.status = STATUS_ERROR
+        self.message = message
+
+    def otlp(self):
+        ret = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            # INTERNAL
+            'kind': 1,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': _attributes(self.attributes),
+            'status': {'code': self.status},
+        }
+        if self.parent_id:
+            ret['parentSpanId'] = self.parent_id
+        if self.message:
+            ret['status']['message'] = self.message
+        return ret
+
+    def __repr__(self):
+        return f'Span<{self.name}, {self.span_id}, {self.parent_id}>'
+
+
+class _NullSpan:
+
+    def set(self, key, value):
+        pass
+
+    def error(self, message):
+        pass
+
+
+_NULL = nullcontext(_NullSpan())
+
+
+class Tracer:
+
+    def __init__(self, traceparent=None):
+        match = _TRACEPARENT_RE.fullmatch(traceparent or '')
+        if match:
+            # spans join the caller's trace
+            self.trace_id, self.parent_id = match.groups()
+        else:
+            self.trace_id, self.parent_id = urandom(16).hex(), None
+        self.spans = []
+        self._lock = Lock()
+
+    @contextmanager
+    def span(self, name, attributes):
+        parent = _current.get()
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            parent_id=parent.span_id if parent else self.parent_id,
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except SystemExit as e:
+            span.set('process.exit.code', e.code or 0)
+            if e.code:
+                span.error(f'exit {e.code}')
+            raise
+        except Exception as e:
+            span.error(f'{e.__class__.__name__}: {e}')
+            raise
+        finally:
+            span.end = time_ns()
+            _current.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def otlp(self):
+        from . import __version__
+
+        return {
+            'resourceSpans': [
+                {
+                    'resource': {
+                        'attributes': _attributes({'service.name': 'changelet'})
+                    },
+                    'scopeSpans': [
+                        {
+                            'scope': {
+                                'name': 'changelet',
+                                'version': __version__,
+                            },
+                            'spans': [
+                                s.otlp()
+                                for s in sorted(
+                                    self.spans, key=lambda s: s.start
+                                )
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, filename):
+        # OTLP/JSON, as a collector's file exporter would write it
+        with open(filename, 'w') as fh:
+            dump(self.otlp(), fh)
+            fh.write('\n')
+
+
+def start():
+    global _active
+    _active = Tracer(environ.get('TRACEPARENT'))
+    return _active
+
+
+def stop():
+    global _active
+    ret = _active
+    _active = None
+    return ret
+
+
+def span(name, attributes=None):
+    # records the block as a span, yielding it so that attributes can be
+    # added along the way, a no-op unless tracing
+    if _active is None:
+        return _NULL
+    return _active.span(name, dict(attributes or {}))
+
+
+def traced(name):
+    # records each call of the decorated function as a span named name
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
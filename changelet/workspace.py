@@ -0,0 +1,75 @@
+#
+#
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from os.path import basename, join, normpath
+
+from .config import Config
+
+
+class WorkspaceException(Exception):
+    pass
+
+
+def package_configs(config, names=None):
+    # a Config per workspace package, in the order they're listed, optionally
+    # limited to names. they all share config's provider so that merged PRs
+    # are only fetched once for the lot
+    packages = config.packages or []
+    if names:
+        known = {p['name'] for p in packages}
+        unknown = sorted(set(names) - known)
+        if unknown:
+            raise WorkspaceException(f'Unknown package(s) {", ".join(unknown)}')
+        packages = [p for p in packages if p['name'] in names]
+
+    provider = config.provider
+    ret = []
+    for package in packages:
+        name = package['name']
+        # normalized, w/o e.g. a leading ./ from `-r .`, as they're matched
+        # against the paths git & gh report
+        root = normpath(join(config.root, package.get('root', name)))
+        module = package.get('module', basename(root).replace('-', '_'))
+        ret.append(
+            (
+                name,
+                Config(
+                    root=root,
+                    directory=normpath(
+                        join(root, package.get('directory', '.changelog'))
+                    ),
+                    commit_prefix=config.commit_prefix,
+                    module=module,
+                    provider=provider,
+                    templates=config.templates,
+                    cache_dir=config.cache_dir,
+                    import_types=config.import_types,
+                ),
+            )
+        )
+    return ret
+
+
+def map_packages(func, configs, max_workers=None):
+    # calls func(config) for each package concurrently, results are returned
+    # in package order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, [c for _, c in configs]))
+
+
+def index_prs(config, configs):
+    # builds the shared provider's PR indexes for all of the packages up
+    # front, in a single pass, when it supports doing so
+    index = getattr(config.provider, 'index', None)
+    if index is not None and configs:
+        index(root=config.root, directories=[c.directory for _, c in configs])
+
+
+def sources(config, names=None):
+    # (source path prefix, changelog directory) pairs, explicitly configured
+    # or each workspace package's root and directory
+    if config.sources:
+        return sorted(config.sources.items())
+    return [(c.root, c.directory) for _, c in package_configs(config, names)]
@@ -0,0 +1,479 @@
+#
+#
+#
+
+from os import makedirs
+from os.path import isdir, isfile, join
+from subprocess import CalledProcessError
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import TemporaryDirectory
+from semver import Version
+
+from changelet import api
+from changelet.api import ChangeletException, Release
+from changelet.config import Config
+from changelet.entry import Entry, EntryType
+
+
+class TestApi(TestCase):
+
+    def config(self, directory, provider=None):
+        if provider is None:
+            provider = MagicMock()
+            provider.pr_by_filename.return_value = None
+        return Config(
+            directory=directory,
+            provider={'class': MagicMock(return_value=provider)},
+            cache_dir=False,
+        )
+
+    def entries(self, directory):
+        makedirs(directory, exist_ok=True)
+        Entry(
+            type='patch', description='A fix', filename=join(directory, 'a.md')
+        ).save()
+        Entry(
+            type='minor',
+            description='A feature',
+            filename=join(directory, 'b.md'),
+        ).save()
+
+    def test_repr(self):
+        # smoke
+        Release(
+            current_version='1.0.0', version='1.1.0', entries=[], notes={}
+        ).__repr__()
+
+    @patch('changelet.config.Config.build')
+    def test_config(self, build_mock):
+        build_mock.side_effect = lambda **kwargs: Config(**kwargs)
+        api._configs.clear()
+
+        config = api.config(root='one')
+        self.assertEqual('one', config.root)
+        # shared by later calls w/the same args, along w/its provider
+        self.assertIs(config, api.config(root='one'))
+        other = api.config(root='two')
+        self.assertIsNot(config, other)
+        self.assertEqual(2, build_mock.call_count)
+
+        # rebuilt when their config files change
+        with TemporaryDirectory() as td:
+            config = api.config(root=td.dirname)
+            self.assertIs(config, api.config(root=td.dirname))
+            with open(join(td.dirname, '.changelet.yaml'), 'w') as fh:
+                fh.write('directory: .cl\n')
+            changed = api.config(root=td.dirname)
+            self.assertIsNot(config, changed)
+            self.assertIs(changed, api.config(root=td.dirname))
+        api._configs.clear()
+
+    def test_reset(self):
+        provider = MagicMock()
+        config = Config(provider={'class': MagicMock(return_value=provider)})
+        api.reset(config)
+        provider.reset.assert_called_once_with()
+
+        # providers w/o a reset are left alone
+        config = Config(provider={'class': MagicMock(return_value=object())})
+        api.reset(config)
+
+    def test_current_version(self):
+        # read from each config's root, and never stale
+        with TemporaryDirectory() as td:
+            configs = []
+            for name in ('one', 'two'):
+                root = join(td.dirname, name)
+                makedirs(join(root, 'mod'))
+                configs.append(Config(root=root, module='mod'))
+
+            def write(config, version):
+                init = join(config.root, 'mod', '__init__.py')
+                with open(init, 'w') as fh:
+                    fh.write(f"__version__ = '{version}'\n")
+
+            one, two = configs
+            write(one, '1.0.0')
+            write(two, '2.0.0')
+            self.assertEqual(Version.parse('1.0.0'), api.current_version(one))
+            self.assertEqual(Version.parse('2.0.0'), api.current_version(two))
+            write(one, '1.1.0')
+            self.assertEqual(Version.parse('1.1.0'), api.current_version(one))
+
+            # modules that can't be found, or imported, are exceptions too
+            for module, msg in (
+                (
+                    'nope_xyz',
+                    "Unable to read the version of nope_xyz: No module named "
+                    "'nope_xyz'",
+                ),
+                (
+                    'mod',
+                    'Unable to read the version of mod: 1.x is not valid '
+                    'SemVer string',
+                ),
+            ):
+                write(one, '1.x')
+                config = Config(root=one.root, module=module)
+                with self.assertRaises(ChangeletException) as ctx:
+                    api.current_version(config)
+                self.assertEqual(msg, str(ctx.exception))
+
+    def test_load_entries_errors(self):
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = self.config(directory)
+            makedirs(directory)
+            filename = join(directory, 'a.md')
+            for text, msg in (
+                ('---\ntype: [\n---\nbad yaml\n', 'while parsing'),
+                ('---\npr: 1\n---\nno type\n', "'type'"),
+                ('---\ntype: pathc\n---\ntypo\n', "'pathc' is not a valid"),
+                ('no front matter\n', 'list index out of range'),
+            ):
+                with open(filename, 'w') as fh:
+                    fh.write(text)
+                with self.assertRaises(ChangeletException) as ctx:
+                    api.load_entries(config)
+                self.assertTrue(
+                    str(ctx.exception).startswith(
+                        f'Unable to read {directory}: '
+                    )
+                )
+                self.assertIn(msg, str(ctx.exception))
+                # and so is release
+                with patch(
+                    'changelet.command.bump._get_current_version'
+                ) as gcv_mock, self.assertRaises(ChangeletException):
+                    gcv_mock.return_value = Version.parse('1.0.0')
+                    api.release(config)
+
+            # anything else is left alone
+            with patch('changelet.entry.Entry.load_all') as load_all_mock:
+                load_all_mock.side_effect = RuntimeError('boom')
+                with self.assertRaises(RuntimeError):
+                    api.load_entries(config)
+
+    @patch('changelet.command.bump._get_current_version')
+    def test_release(self, get_current_version_mock):
+        get_current_version_mock.return_value = Version.parse('1.0.0')
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = self.config(directory)
+
+            # nothing to release
+            with self.assertRaises(ChangeletException) as ctx:
+                api.release(config)
+            self.assertEqual(
+                'No changelog entries found that would bump', str(ctx.exception)
+            )
+            self.assertEqual([], api.load_entries(config))
+            self.assertIsNone(api.next_version(config))
+
+            self.entries(directory)
+            entries = api.load_entries(config)
+            self.assertEqual(
+                [EntryType.MINOR, EntryType.PATCH], [e.type for e in entries]
+            )
+            self.assertEqual(
+                Version.parse('1.0.0'), api.current_version(config)
+            )
+            self.assertEqual(Version.parse('1.1.0'), api.next_version(config))
+
+            release = api.release(
+                config, title='Title', formats=('markdown', 'text')
+            )
+            self.assertEqual(Version.parse('1.0.0'), release.current_version)
+            self.assertEqual(Version.parse('1.1.0'), release.version)
+            self.assertEqual(2, len(release.entries))
+            self.assertEqual(['markdown', 'text'], list(release.notes))
+            self.assertTrue(release.notes['markdown'].startswith('## 1.1.0 - '))
+            self.assertTrue('Title' in release.notes['markdown'])
+
+            # explicit version
+            release = api.release(config, version='2.0.0')
+            self.assertEqual('2.0.0', release.version)
+
+            notes = api.render_notes(config, '1.1.0', date='2025-07-04')
+            self.assertEqual(
+                '## 1.1.0 - 2025-07-04\n\nMinor:\n* A feature\n\n'
+                'Patch:\n* A fix\n\n',
+                notes['markdown'],
+            )
+
+            with self.assertRaises(ChangeletException) as ctx:
+                api.render_notes(config, '1.1.0', formats=('pdf',))
+            self.assertEqual("Unknown format 'pdf'", str(ctx.exception))
+
+    def test_check(self):
+        provider = MagicMock()
+        provider.changelog_entries_in_branch.return_value = {'.changelog/a.md'}
+        config = self.config('.changelog', provider)
+        self.assertEqual({'.changelog/a.md'}, api.check(config))
+        provider.changelog_entries_in_branch.assert_called_once_with(
+            root=config.root, directory='.changelog'
+        )
+
+        # from a list of changed files, w/o git
+        provider.reset_mock()
+        self.assertEqual(
+            {'.changelog/b.md'},
+            api.check(config, changed_files=['.changelog/b.md', 'src/x.py']),
+        )
+        provider.changelog_entries_in_branch.assert_not_called()
+        # w/statuses only added entries count
+        self.assertEqual(
+            {'.changelog/b.md'},
+            api.check(
+                config,
+                changed_files={'.changelog/a.md': 'M', '.changelog/b.md': 'A'},
+            ),
+        )
+
+    def test_check_refs(self):
+        provider = MagicMock()
+        provider.changelog_entries_in_refs.return_value = {
+            'a': {'.changelog/x.md'},
+            'b': set(),
+            'c': None,
+        }
+        config = self.config('.changelog', provider)
+        self.assertEqual(
+            [
+                {'ref': 'a', 'ok': True, 'entries': ['.changelog/x.md']},
+                {'ref': 'b', 'ok': False, 'entries': []},
+                {'ref': 'c', 'ok': False, 'error': 'Unable to resolve c'},
+            ],
+            api.check_refs(config, ['a', 'b', 'c'], max_workers=2),
+        )
+        provider.changelog_entries_in_refs.assert_called_once_with(
+            root=config.root,
+            directories=['.changelog'],
+            refs=['a', 'b', 'c'],
+            max_workers=2,
+        )
+
+        # workspaces check all of the packages' directories
+        provider.reset_mock()
+        config.packages = [{'name': 'one'}, {'name': 'two'}]
+        api.check_refs(config, ['a'])
+        provider.changelog_entries_in_refs.assert_called_once_with(
+            root=config.root,
+            directories=['one/.changelog', 'two/.changelog'],
+            refs=['a'],
+            max_workers=None,
+        )
+        api.check_refs(config, ['a'], packages=['two'])
+        self.assertEqual(
+            ['two/.changelog'],
+            provider.changelog_entries_in_refs.call_args.kwargs['directories'],
+        )
+        with self.assertRaises(ChangeletException) as ctx:
+            api.check_refs(config, ['a'], packages=['nope'])
+        self.assertEqual('Unknown package(s) nope', str(ctx.exception))
+
+    def test_lint(self):
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = self.config(directory)
+            self.assertEqual([], api.lint(config))
+            makedirs(directory)
+            with open(join(directory, 'a.md'), 'w') as fh:
+                fh.write('---\ntype: patch\n---\n')
+            errors = api.lint(config)
+            self.assertEqual(
+                [f'{directory}/a.md:4: Empty description'],
+                [str(e) for e in errors],
+            )
+
+            config.packages = [{'name': 'pkg'}]
+            with self.assertRaises(ChangeletException) as ctx:
+                api.lint(config, packages=['nope'])
+            self.assertEqual('Unknown package(s) nope', str(ctx.exception))
+
+    def test_create(self):
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            provider = MagicMock()
+            config = self.config(directory, provider)
+
+            with self.assertRaises(ChangeletException) as ctx:
+                api.create(config, 'patch', '')
+            self.assertEqual('description is required', str(ctx.exception))
+
+            with self.assertRaises(ChangeletException) as ctx:
+                api.create(config, 'pathc', 'Typo')
+            self.assertEqual('Invalid type "pathc"', str(ctx.exception))
+
+            entry = api.create(config, 'patch', 'A fix', pr=42)
+            self.assertTrue(isfile(entry.filename))
+            self.assertEqual(EntryType.PATCH, entry.type)
+            self.assertEqual(42, entry.pr)
+            with open(entry.filename) as fh:
+                self.assertEqual(
+                    '---\ntype: patch\npr: 42\n---\nA fix\n', fh.read()
+                )
+            provider.add_file.assert_not_called()
+
+            entry = api.create(config, 'minor', 'A feature', add=True)
+            provider.add_file.assert_called_once_with(entry.filename)
+            provider.commit.assert_not_called()
+
+            # commit, nothing else staged gets the prefix
+            provider.reset_mock()
+            provider.staged_changelog_entry.return_value = None
+            provider.has_staged.return_value = False
+            entry = api.create(config, 'minor', 'Another', commit=True)
+            provider.add_file.assert_called_once_with(entry.filename)
+            provider.commit.assert_called_once_with('Changelog: Another')
+
+            # commit along with other staged changes
+            provider.reset_mock()
+            provider.has_staged.return_value = True
+            api.create(config, 'minor', 'Another', commit=True)
+            provider.commit.assert_called_once_with('Another')
+
+            # entry already staged
+            provider.staged_changelog_entry.return_value = '.changelog/x.md'
+            with self.assertRaises(ChangeletException) as ctx:
+                api.create(config, 'minor', 'Again', commit=True)
+            self.assertEqual(
+                'A changelog entry is already staged (.changelog/x.md)',
+                str(ctx.exception),
+            )
+
+    def test_create_many(self):
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            provider = MagicMock()
+            provider.staged_changelog_entry.return_value = None
+            provider.has_staged.return_value = True
+            config = self.config(directory, provider)
+
+            for specs, msg in (
+                ([{'type': 'patch'}], "entry 0: missing 'description'"),
+                (
+                    [
+                        {'type': 'patch', 'description': 'ok'},
+                        {'type': 'patch', 'description': ''},
+                    ],
+                    'entry 1: description is required',
+                ),
+                (
+                    [{'type': 'pathc', 'description': 'typo'}],
+                    'entry 0: invalid type "pathc"',
+                ),
+                (
+                    [{'type': 'patch', 'description': 'ok'}, 'patch'],
+                    'entry 1: not an object',
+                ),
+                (
+                    [{'type': 'patch', 'description': 42}],
+                    'entry 0: description must be a string',
+                ),
+            ):
+                with self.assertRaises(ChangeletException) as ctx:
+                    api.create_many(config, specs)
+                self.assertEqual(msg, str(ctx.exception))
+            # nothing was written
+            self.assertFalse(isdir(directory))
+
+            # nothing to do
+            self.assertEqual([], api.create_many(config, [], commit=True))
+            provider.add_files.assert_not_called()
+
+            entries = api.create_many(
+                config,
+                [
+                    {'type': 'patch', 'description': 'One'},
+                    {'type': 'minor', 'description': 'Two', 'pr': 3},
+                ],
+                commit=True,
+            )
+            self.assertEqual(2, len(entries))
+            self.assertTrue(all(isfile(e.filename) for e in entries))
+            provider.add_files.assert_called_once_with(
+                [e.filename for e in entries]
+            )
+            # other changes staged, no prefix
+            provider.commit.assert_called_once_with('Add 2 changelog entries')
+
+            provider.staged_changelog_entry.return_value = '.changelog/x.md'
+            with self.assertRaises(ChangeletException) as ctx:
+                api.create_many(
+                    config,
+                    [{'type': 'patch', 'description': 'One'}],
+                    commit=True,
+                )
+            self.assertEqual(
+                'A changelog entry is already staged (.changelog/x.md)',
+                str(ctx.exception),
+            )
+
+    def test_ref(self):
+        provider = MagicMock()
+        provider.ls_tree.return_value = ['.cl/a.md']
+        provider.cat_files.side_effect = lambda ref, paths: {
+            'mod/__init__.py': "__version__ = '1.0.0'\n",
+            '.cl/a.md': '---\ntype: patch\n---\nA fix\n',
+        }
+        provider.pr_by_filename.return_value = None
+        config = Config(
+            directory='.cl',
+            module='mod',
+            provider={'class': MagicMock(return_value=provider)},
+        )
+
+        entries = api.load_entries(config, ref='origin/main')
+        self.assertEqual(['A fix'], [e.description for e in entries])
+
+        release = api.release(config, ref='origin/main')
+        self.assertEqual(Version.parse('1.0.0'), release.current_version)
+        self.assertEqual(Version.parse('1.0.1'), release.version)
+
+        provider.cat_files.side_effect = None
+        provider.cat_files.return_value = {'mod/__init__.py': None}
+        with self.assertRaises(ChangeletException) as ctx:
+            api.release(config, ref='origin/main')
+        self.assertEqual(
+            'Unable to find __version__ in mod/__init__.py at origin/main',
+            str(ctx.exception),
+        )
+
+        provider.ls_tree.side_effect = CalledProcessError(128, ['git'])
+        with self.assertRaises(ChangeletException) as ctx:
+            api.load_entries(config, ref='nope')
+        self.assertTrue(str(ctx.exception).startswith('Unable to read nope: '))
+
+    def test_missing_entries(self):
+        provider = MagicMock()
+        provider.changed_files.return_value = {
+            'one/a.py': 'M',
+            'two/b.py': 'M',
+            'two/.changelog/c.md': 'A',
+        }
+        config = Config(
+            provider={'class': MagicMock(return_value=provider)},
+            sources={'one/': 'one/.changelog', 'two': 'two/.changelog'},
+        )
+        self.assertEqual(['one/.changelog'], api.missing_entries(config))
+        self.assertEqual(
+            [],
+            api.missing_entries(
+                config, changed_files=['one/a.py', 'one/.changelog/d.md']
+            ),
+        )
+
+        config.sources = None
+        with self.assertRaises(ChangeletException) as ctx:
+            api.missing_entries(config)
+        self.assertEqual(
+            'No sources or packages in the config', str(ctx.exception)
+        )
+        config.packages = [{'name': 'one'}]
+        with self.assertRaises(ChangeletException) as ctx:
+            api.missing_entries(config, packages=['nope'])
+        self.assertEqual('Unknown package(s) nope', str(ctx.exception))
@@ -0,0 +1,92 @@
+#
+#
+#
+
+from os import listdir
+from os.path import abspath, join
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers import TemporaryDirectory
+
+from changelet.cache import Cache, default_cache_dir
+
+
+class TestCache(TestCase):
+
+    def test_repr(self):
+        # smoke
+        Cache('foo').__repr__()
+
+    def test_default_cache_dir(self):
+        with patch.dict('changelet.cache.environ', {'XDG_CACHE_HOME': '/xdg'}):
+            directory = default_cache_dir('')
+            self.assertTrue(directory.startswith('/xdg/changelet/'))
+            # root is made absolute so these are the same place
+            self.assertEqual(directory, default_cache_dir('.'))
+            self.assertEqual(directory, default_cache_dir(abspath('.')))
+            # different projects get different directories
+            self.assertNotEqual(directory, default_cache_dir('/elsewhere'))
+
+        with patch.dict('changelet.cache.environ', {}, clear=True):
+            with patch('changelet.cache.expanduser') as expanduser_mock:
+                expanduser_mock.return_value = '/home/user'
+                self.assertTrue(
+                    default_cache_dir('').startswith(
+                        '/home/user/.cache/changelet/'
+                    )
+                )
+
+    def test_load_store_remove(self):
+        with TemporaryDirectory() as td:
+            cache = Cache(join(td.dirname, 'sub', 'dir'))
+
+            # nothing stored, directory doesn't even exist
+            self.assertIsNone(cache.load('thing'))
+            # removing something that doesn't exist is a noop
+            cache.remove('thing')
+
+            cache.store('thing', {'a': [1, 2]})
+            self.assertEqual({'a': [1, 2]}, cache.load('thing'))
+            # no temp files left behind
+            self.assertEqual(['thing.json'], listdir(cache.directory))
+
+            # overwrite
+            cache.store('thing', {'b': 3})
+            self.assertEqual({'b': 3}, cache.load('thing'))
+
+            # corrupt data is a miss
+            with open(join(cache.directory, 'thing.json'), 'w') as fh:
+                fh.write('{not json')
+            self.assertIsNone(cache.load('thing'))
+
+            cache.remove('thing')
+            self.assertIsNone(cache.load('thing'))
+            self.assertEqual([], listdir(cache.directory))
+
+    def test_store_failures(self):
+        with TemporaryDirectory() as td:
+            # a file where the directory should be
+            blocker = join(td.dirname, 'blocker')
+            with open(blocker, 'w') as fh:
+                fh.write('')
+            cache = Cache(join(blocker, 'dir'))
+            self.assertFalse(cache.store('thing', {'a': 1}))
+            self.assertIsNone(cache.load('thing'))
+
+            # failures part way through don't leave temp files behind
+            cache = Cache(join(td.dirname, 'cache'))
+            with patch('changelet.cache.replace') as replace_mock:
+                replace_mock.side_effect = PermissionError('nope')
+                self.assertFalse(cache.store('thing', {'a': 1}))
+            self.assertEqual([], listdir(cache.directory))
+            # even when the clean up fails too
+            with patch('changelet.cache.replace') as replace_mock, patch(
+                'changelet.cache.remove'
+            ) as remove_mock:
+                replace_mock.side_effect = PermissionError('nope')
+                remove_mock.side_effect = PermissionError('nope')
+                self.assertFalse(cache.store('thing', {'a': 1}))
+
+            self.assertTrue(cache.store('thing', {'a': 1}))
+            self.assertEqual({'a': 1}, cache.load('thing'))
@@ -0,0 +1,162 @@
+#
+#
+#
+
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from changelet.changes import (
+    PrefixTrie,
+    added_files,
+    changed_files,
+    changelog_entries,
+    load_changed_files,
+    missing_entries,
+)
+
+
+class TestChanges(TestCase):
+
+    def test_changed_files(self):
+        # list of paths, e.g. from a previous step
+        self.assertEqual(
+            {'a.py': 'A', 'b.md': 'A'}, changed_files(['a.py', 'b.md'])
+        )
+        # GitHub API pull request files
+        self.assertEqual(
+            {'a.py': 'M', 'b.md': 'D', 'c.md': 'A'},
+            changed_files(
+                [
+                    {'filename': 'a.py', 'status': 'modified'},
+                    {'filename': 'b.md', 'status': 'removed'},
+                    {'filename': 'c.md', 'status': 'added'},
+                    {'other': 'ignored'},
+                ]
+            ),
+        )
+        # object w/files
+        self.assertEqual(
+            {'a.py': 'A'}, changed_files({'files': [{'path': 'a.py'}]})
+        )
+        self.assertEqual(['b.md'], added_files({'a.md': 'M', 'b.md': 'A'}))
+
+        # push events don't cover the whole branch
+        with self.assertRaises(ValueError) as ctx:
+            changed_files({'commits': [{'added': ['.changelog/a.md']}]})
+        self.assertEqual(
+            "Push events only list the pushed commits, not the branch's "
+            'changes, use --changed-files',
+            str(ctx.exception),
+        )
+
+        with self.assertRaises(ValueError) as ctx:
+            changed_files({'pull_request': {}})
+        self.assertEqual(
+            "Pull request events don't list changed files, use "
+            '--changed-files or --fetch-pr-files',
+            str(ctx.exception),
+        )
+        for data in ({'other': {}}, 42):
+            with self.assertRaises(ValueError) as ctx:
+                changed_files(data)
+            self.assertEqual(
+                'No changed files found in JSON', str(ctx.exception)
+            )
+
+    def test_load_changed_files(self):
+        self.assertEqual(
+            {'a.py': 'A'}, load_changed_files(StringIO('["a.py"]'))
+        )
+        for text in ('[42]', '{"files": [42]}'):
+            with self.assertRaises(ValueError) as ctx:
+                load_changed_files(StringIO(text))
+            self.assertEqual(
+                'Unrecognized changed files JSON', str(ctx.exception)
+            )
+        with self.assertRaises(ValueError):
+            load_changed_files(StringIO('nope'))
+
+        # pull request events have their files fetched
+        provider = MagicMock()
+        provider.pr_files.return_value = [
+            {'filename': '.changelog/a.md', 'status': 'added'},
+            {'filename': 'x.py', 'status': 'modified'},
+        ]
+        event = (
+            '{"pull_request": {"number": 42}, '
+            '"repository": {"full_name": "org/repo"}}'
+        )
+        self.assertEqual(
+            {'.changelog/a.md': 'A', 'x.py': 'M'},
+            load_changed_files(StringIO(event), provider),
+        )
+        provider.pr_files.assert_called_once_with(42, repo='org/repo')
+        # other things are unaffected by a provider
+        self.assertEqual(
+            {'a.py': 'A'}, load_changed_files(StringIO('["a.py"]'), provider)
+        )
+        self.assertEqual(
+            {'a.py': 'A'},
+            load_changed_files(StringIO('{"files": ["a.py"]}'), provider),
+        )
+        provider.pr_files.assert_called_once()
+
+    def test_changelog_entries(self):
+        self.assertEqual(
+            {'.changelog/a.md'},
+            changelog_entries(
+                [
+                    '.changelog/a.md',
+                    '.changelog/README',
+                    '.changelog/nested/b.md',
+                    '.changelog-extra/c.md',
+                    'src/d.md',
+                ],
+                '.changelog',
+            ),
+        )
+
+    def test_prefix_trie(self):
+        trie = PrefixTrie(
+            [
+                ('packages/core/', 'core'),
+                ('packages/core/plugins', 'plugins'),
+                ('./tools', 'tools'),
+            ]
+        )
+        self.assertEqual('core', trie.longest('packages/core/src/a.py'))
+        self.assertEqual('plugins', trie.longest('packages/core/plugins/b.py'))
+        self.assertEqual('core', trie.longest('packages/core/pluginsx/c.py'))
+        self.assertEqual('tools', trie.longest('tools/d.sh'))
+        self.assertEqual('plugins', trie.longest('packages/core/plugins'))
+        self.assertIsNone(trie.longest('packages/other/e.py'))
+        self.assertIsNone(trie.longest('README.md'))
+
+        # the root catches everything else
+        trie[''] = 'root'
+        self.assertEqual('root', trie.longest('README.md'))
+        self.assertEqual('core', trie.longest('packages/core/src/a.py'))
+
+    def test_missing_entries(self):
+        sources = [
+            ('one', 'one/.changelog'),
+            ('two', 'two/.changelog'),
+            ('three', './three/.changelog'),
+        ]
+        self.assertEqual(
+            ['two/.changelog'],
+            missing_entries(
+                sources,
+                changed=[
+                    'one/a.py',
+                    'one/.changelog/x.md',
+                    'two/b.py',
+                    'three/c.py',
+                    'three/.changelog/y.md',
+                    'other/d.py',
+                ],
+                added=['one/.changelog/x.md', 'three/.changelog/y.md'],
+            ),
+        )
+        self.assertEqual([], missing_entries(sources, changed=[], added=[]))
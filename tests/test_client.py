@@ -0,0 +1,136 @@
+#
+#
+#
+
+from os.path import join
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import TemporaryDirectory
+
+from changelet.client import forward, forwardable, request, socket_path
+from changelet.daemon import Server
+
+
+class TestClient(TestCase):
+
+    class ArgsMock:
+
+        def __init__(self, command, make_changes=False, pr=False, edit=False):
+            self.command = command
+            self.make_changes = make_changes
+            self.pr = pr
+            self.edit = edit
+            self.github_event = False
+            self.changed_files = None
+            self.from_file = None
+            self.add = False
+            self.commit = False
+            self.continue_ = False
+
+    def test_socket_path(self):
+        self.assertIsNone(socket_path(MagicMock(cache_dir=None)))
+        self.assertIsNone(socket_path(MagicMock(cache_dir=False)))
+        self.assertEqual(
+            '/tmp/cache/serve.sock',
+            socket_path(MagicMock(cache_dir='/tmp/cache')),
+        )
+
+    def test_forwardable(self):
+        self.assertTrue(forwardable(self.ArgsMock('check')))
+        self.assertTrue(forwardable(self.ArgsMock('create')))
+        self.assertTrue(forwardable(self.ArgsMock('bump')))
+        self.assertFalse(forwardable(self.ArgsMock('bump', make_changes=True)))
+        self.assertFalse(forwardable(self.ArgsMock('bump', pr=True)))
+        self.assertFalse(forwardable(self.ArgsMock('bump', edit=True)))
+        self.assertFalse(forwardable(self.ArgsMock('serve')))
+
+        # things that need the local stdin or environment
+        args = self.ArgsMock('check')
+        args.changed_files = 'changes.json'
+        self.assertTrue(forwardable(args))
+        args.changed_files = '-'
+        self.assertFalse(forwardable(args))
+        args = self.ArgsMock('check')
+        args.github_event = True
+        self.assertFalse(forwardable(args))
+        args = self.ArgsMock('create')
+        args.from_file = 'entries.jsonl'
+        self.assertTrue(forwardable(args))
+        args.from_file = '-'
+        self.assertFalse(forwardable(args))
+
+        # creates that stage or commit are run locally
+        for flag in ('add', 'commit', 'continue_'):
+            args = self.ArgsMock('create')
+            setattr(args, flag, True)
+            self.assertFalse(forwardable(args), flag)
+
+    def test_request(self):
+        with TemporaryDirectory() as td:
+            path = join(td.dirname, 'serve.sock')
+            # nothing listening
+            self.assertIsNone(request(path, ['changelet', 'check']))
+
+            server = Server(path)
+            thread = Thread(target=server.serve)
+            thread.start()
+            try:
+                with patch.object(server, 'execute') as execute_mock:
+                    execute_mock.return_value = {'code': None}
+                    # declined
+                    self.assertIsNone(request(path, ['changelet', 'check']))
+
+                    execute_mock.return_value = {
+                        'code': 0,
+                        'stdout': 'out',
+                        'stderr': '',
+                    }
+                    with patch.dict(
+                        'changelet.client.environ',
+                        {'CHANGELET_THING': 'value', 'OTHER': 'nope'},
+                    ):
+                        self.assertEqual(
+                            {'code': 0, 'stdout': 'out', 'stderr': ''},
+                            request(path, ['changelet', 'check']),
+                        )
+                    sent = execute_mock.call_args[0][0]
+                    self.assertEqual(['changelet', 'check'], sent['argv'])
+                    self.assertEqual('value', sent['env']['CHANGELET_THING'])
+                    self.assertFalse('OTHER' in sent['env'])
+            finally:
+                server.shutdown()
+                thread.join()
+                server.server_close()
+
+    @patch('changelet.client.request')
+    def test_forward(self, request_mock):
+        request_mock.return_value = {'code': 0}
+        argv = ['changelet', 'check']
+        args = self.ArgsMock('check')
+
+        with TemporaryDirectory() as td:
+            config = MagicMock(cache_dir=td.dirname)
+            path = join(td.dirname, 'serve.sock')
+
+            # not running
+            self.assertIsNone(forward(argv, args, config))
+            request_mock.assert_not_called()
+
+            with open(path, 'w'):
+                pass
+            self.assertEqual({'code': 0}, forward(argv, args, config))
+            request_mock.assert_called_once_with(path, argv)
+
+            # not something that's forwarded
+            request_mock.reset_mock()
+            self.assertIsNone(forward(argv, self.ArgsMock('serve'), config))
+            # caching disabled
+            self.assertIsNone(forward(argv, args, MagicMock(cache_dir=False)))
+            # opted out
+            with patch.dict(
+                'changelet.client.environ', {'CHANGELET_NO_SERVE': '1'}
+            ):
+                self.assertIsNone(forward(argv, args, config))
+            request_mock.assert_not_called()
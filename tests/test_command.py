@@ -4,29 +4,80 @@
 
 from unittest import TestCase
 
-from changelet.command import commands, register
+from changelet.command import Commands, commands, register
+from changelet.command.batch import Batch
 from changelet.command.bump import Bump
 from changelet.command.check import Check
 from changelet.command.create import Create
+from changelet.command.history import History
+from changelet.command.import_ import Import
+from changelet.command.lint import Lint
+from changelet.command.serve import Serve
+from changelet.command.show import Show
+
+
+class Dummy:
+    name = 'dummy'
 
 
 class TestCommand(TestCase):
 
     def tearDown(self):
-        try:
-            del commands['dummy']
-        except KeyError:
-            pass
+        for name in ('dummy', 'lazy'):
+            try:
+                del commands[name]
+            except KeyError:
+                pass
 
     def test_register(self):
-        self.assertEqual(['bump', 'check', 'create'], list(commands.keys()))
+        self.assertEqual(
+            [
+                'batch',
+                'bump',
+                'check',
+                'create',
+                'history',
+                'import',
+                'lint',
+                'serve',
+                'show',
+            ],
+            list(commands.keys()),
+        )
+        self.assertIsInstance(commands['batch'], Batch)
         self.assertIsInstance(commands['bump'], Bump)
         self.assertIsInstance(commands['check'], Check)
         self.assertIsInstance(commands['create'], Create)
-
-        class Dummy:
-            name = 'dummy'
+        self.assertIsInstance(commands['history'], History)
+        self.assertIsInstance(commands['import'], Import)
+        self.assertIsInstance(commands['lint'], Lint)
+        self.assertIsInstance(commands['show'], Show)
+        self.assertIsInstance(commands['serve'], Serve)
 
         register(Dummy)
         self.assertTrue('dummy' in commands)
         self.assertIsInstance(commands['dummy'], Dummy)
+
+        # by dotted path
+        register('test_command.Dummy', 'lazy')
+        self.assertTrue('lazy' in commands)
+        self.assertIsInstance(commands['lazy'], Dummy)
+
+    def test_commands(self):
+        cmds = Commands()
+        cmds['lazy'] = 'test_command.Dummy'
+        self.assertEqual(['lazy'], list(cmds))
+        self.assertEqual(1, len(cmds))
+        # nothing's imported or created until it's accessed
+        self.assertEqual('test_command.Dummy', cmds._commands['lazy'])
+
+        dummy = cmds['lazy']
+        self.assertIsInstance(dummy, Dummy)
+        # and then the same instance is used from then on
+        self.assertIs(dummy, cmds['lazy'])
+        self.assertEqual([dummy], list(cmds.values()))
+
+        del cmds['lazy']
+        self.assertEqual(0, len(cmds))
+        with self.assertRaises(KeyError):
+            cmds['lazy']
@@ -0,0 +1,159 @@
+#
+#
+#
+
+from argparse import ArgumentParser
+from io import StringIO
+from json import dumps, loads
+from os.path import isfile, join
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+from semver import Version
+
+from changelet.command.batch import Batch
+from changelet.config import Config
+
+
+class TestCommandBatch(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, stop_on_error=False):
+            self.stop_on_error = stop_on_error
+
+    def test_configure(self):
+        batch = Batch()
+        parser = ArgumentParser(exit_on_error=False)
+        batch.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['stop_on_error'], flags=['--stop-on-error'], default=False
+        )
+
+    @patch('changelet.command.batch.exit')
+    def test_exit(self, exit_mock):
+        batch = Batch()
+        batch.exit(42)
+        exit_mock.assert_called_once_with(42)
+
+    def run_batch(self, config, ops, stop_on_error=False):
+        stdin = StringIO(
+            ''.join(
+                op if isinstance(op, str) else dumps(op) + '\n' for op in ops
+            )
+        )
+        stdout = StringIO()
+        with patch('changelet.command.batch.Batch.exit') as exit_mock:
+            Batch().run(
+                self.ArgsMock(stop_on_error=stop_on_error),
+                config,
+                stdin=stdin,
+                stdout=stdout,
+            )
+        return [loads(l) for l in stdout.getvalue().splitlines()], exit_mock
+
+    @patch('changelet.command.bump._get_current_version')
+    def test_run(self, get_current_version_mock):
+        get_current_version_mock.return_value = Version.parse('1.0.0')
+        provider = MagicMock()
+        provider.pr_by_filename.return_value = None
+        provider.changelog_entries_in_branch.return_value = {'b', 'a'}
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = Config(
+                directory=directory,
+                provider={'class': MagicMock(return_value=provider)},
+                cache_dir=False,
+            )
+            results, exit_mock = self.run_batch(
+                config,
+                [
+                    {
+                        'op': 'create',
+                        'id': 1,
+                        'type': 'minor',
+                        'description': 'A feature',
+                    },
+                    '\n',
+                    {'op': 'check'},
+                    {'op': 'preview', 'formats': ['text']},
+                ],
+            )
+            exit_mock.assert_called_once_with(0)
+            self.assertEqual(3, len(results))
+
+            create = results[0]
+            self.assertEqual('create', create['op'])
+            self.assertEqual(1, create['id'])
+            self.assertEqual('minor', create['result']['type'])
+            self.assertEqual('A feature', create['result']['description'])
+            self.assertTrue(isfile(create['result']['filename']))
+
+            self.assertEqual(
+                {'op': 'check', 'result': {'entries': ['a', 'b']}}, results[1]
+            )
+
+            preview = results[2]['result']
+            self.assertEqual('1.0.0', preview['current_version'])
+            self.assertEqual('1.1.0', preview['version'])
+            self.assertEqual(['text'], list(preview['notes']))
+            self.assertTrue('* A feature' in preview['notes']['text'])
+
+            # a single config, and so a single provider, for everything
+            provider.changelog_entries_in_branch.assert_called_once()
+
+    def test_errors(self):
+        config = MagicMock()
+        ops = [
+            'not json\n',
+            '[]\n',
+            {'type': 'patch'},
+            {'op': 'nope', 'id': 'x'},
+            {'op': ['list']},
+            {'op': 'create', 'type': 'patch'},
+            {'op': 'create', 'type': 'patch', 'description': ''},
+        ]
+        results, exit_mock = self.run_batch(config, ops)
+        exit_mock.assert_called_once_with(1)
+        self.assertTrue(results[0]['error'].startswith('invalid JSON: '))
+        self.assertEqual(
+            [
+                {'error': 'missing op'},
+                {'error': 'missing op'},
+                {'op': 'nope', 'id': 'x', 'error': 'unknown op "nope"'},
+                {'op': ['list'], 'error': 'unknown op "[\'list\']"'},
+                {'op': 'create', 'error': "missing 'description'"},
+                {'op': 'create', 'error': 'description is required'},
+            ],
+            results[1:],
+        )
+
+        # unexpected failures are reported, and later ops still run
+        with patch('changelet.api.current_version') as current_version_mock:
+            current_version_mock.side_effect = ModuleNotFoundError(
+                "No module named 'nope'"
+            )
+            results, exit_mock = self.run_batch(
+                config, [{'op': 'preview'}, {'op': 'nope'}]
+            )
+        exit_mock.assert_called_once_with(1)
+        self.assertEqual(
+            [
+                {
+                    'op': 'preview',
+                    'error': "ModuleNotFoundError: No module named 'nope'",
+                },
+                {'op': 'nope', 'error': 'unknown op "nope"'},
+            ],
+            results,
+        )
+
+        # stops at the first
+        results, exit_mock = self.run_batch(config, ops, stop_on_error=True)
+        exit_mock.assert_called_once_with(1)
+        self.assertEqual(1, len(results))
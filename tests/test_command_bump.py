@@ -2,11 +2,13 @@
 #
 #
 
+import sys
 from argparse import ArgumentParser
 from datetime import datetime, timedelta, timezone
-from os import makedirs
+from os import listdir, makedirs
 from os.path import basename, join
-from sys import path, version_info
+from subprocess import CalledProcessError
+from sys import modules, path, version_info
 from unittest import TestCase
 from unittest.mock import ANY, MagicMock, call, patch
 
@@ -17,11 +19,13 @@ from changelet.command.bump import (
     Bump,
     _get_current_version,
     _get_new_version,
+    _load_ref,
     version,
 )
 from changelet.config import Config
 from changelet.entry import Entry
 from changelet.pr import Pr
+from changelet.release import ReleaseCache
 
 
 class TestCommandBump(TestCase, AssertActionMixin):
@@ -36,6 +40,9 @@ class TestCommandBump(TestCase, AssertActionMixin):
             edit=False,
             ignore_local_changes=False,
             check=False,
+            formats=None,
+            ref=None,
+            packages=None,
         ):
             self.title = title
             self.make_changes = make_changes
@@ -44,6 +51,9 @@ class TestCommandBump(TestCase, AssertActionMixin):
             self.edit = edit
             self.ignore_local_changes = ignore_local_changes
             self.check = check
+            self.formats = formats
+            self.ref = ref
+            self.packages = packages
 
     def test_configure(self):
         create = Bump()
@@ -63,6 +73,19 @@ class TestCommandBump(TestCase, AssertActionMixin):
             default=False,
         )
         self.assert_action(actions['check'], flags=['--check'], default=False)
+        self.assert_action(
+            actions['ref'], flags=['--ref'], default=None, nargs=None
+        )
+        self.assert_action(
+            actions['packages'], flags=['--package'], default=None, nargs=None
+        )
+        self.assert_action(
+            actions['formats'],
+            flags=['--format'],
+            default=None,
+            nargs=None,
+            choices={'markdown', 'rst', 'html', 'text'},
+        )
         # 3.12 made a change to * so that required=False, before that it was
         # True, for now we'll have to ignore it
         required = False if version_info >= (3, 12, 0) else None
@@ -141,6 +164,338 @@ class TestCommandBump(TestCase, AssertActionMixin):
         cmd.run(args=self.MockArgs([], check=True), config=config)
         exit_mock.assert_called_once_with(1)
 
+    @patch('changelet.command.bump.Bump.exit')
+    @patch('changelet.entry.Entry.load_all')
+    @patch('changelet.command.bump._get_current_version')
+    def test_preview_formats(self, gcv_mock, ela_mock, exit_mock):
+        cmd = Bump()
+
+        config = Config('.cl', provider=None)
+
+        gcv_mock.return_value = Version.parse('0.1.3')
+        ela_mock.return_value = [Entry(type='minor', description='change 1')]
+        date = datetime.now().strftime('%Y-%m-%d')
+
+        exit_mock.return_value = None
+        with patch('changelet.command.bump.print') as print_mock:
+            new_version, buf = cmd.run(
+                args=self.MockArgs([], formats=['html', 'text']),
+                config=config,
+                root='does-not-exist',
+            )
+        exit_mock.assert_called_once_with(0)
+        # markdown is always what's returned
+        self.assertEqual(f'## 0.2.0 - {date}\n\nMinor:\n* change 1\n\n', buf)
+        # but only the requested formats are printed, in order
+        self.assertEqual(
+            [
+                call('New version number 0.2.0\n'),
+                call(
+                    f'<h2>0.2.0 - {date}</h2>\n<h3>Minor</h3>\n<ul>\n'
+                    '<li>change 1</li>\n</ul>\n'
+                ),
+                call(f'0.2.0 - {date}\n\nMinor:\n* change 1\n\n'),
+            ],
+            print_mock.call_args_list,
+        )
+
+        # custom templates from config are applied
+        config.templates = {'text': {'header': 'v$version\n'}}
+        with patch('changelet.command.bump.print') as print_mock:
+            cmd.run(
+                args=self.MockArgs([], formats=['text']),
+                config=config,
+                root='does-not-exist',
+            )
+        self.assertEqual(
+            call('v0.2.0\n\nMinor:\n* change 1\n\n'),
+            print_mock.call_args_list[1],
+        )
+
+        # invalid templates are an error, not a traceback
+        for templates, msg in (
+            ({'pdf': {}}, 'Unknown format "pdf" in templates'),
+            (
+                {'text': {'heading': ''}},
+                'Invalid template part(s) for format "text"',
+            ),
+            ('text', 'templates must map format names to parts'),
+        ):
+            config.templates = templates
+            exit_mock.reset_mock()
+            with patch('changelet.command.bump.print') as print_mock:
+                cmd.run(
+                    args=self.MockArgs([], formats=['text']),
+                    config=config,
+                    root='does-not-exist',
+                )
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once_with(f'Error: {msg}', file=sys.stderr)
+
+        # the previous release is shown when there is one
+        config.templates = None
+        with TemporaryDirectory() as td:
+            with open(join(td.dirname, 'CHANGELOG.md'), 'w') as fh:
+                fh.write('## 0.1.3 - 2025-07-04\n\nPatch:\n* fix\n')
+            with patch('changelet.command.bump.print') as print_mock:
+                cmd.run(args=self.MockArgs([]), config=config, root=td.dirname)
+        self.assertEqual(
+            [
+                call('Previous version 0.1.3 - 2025-07-04'),
+                call('New version number 0.2.0\n'),
+                call(buf),
+            ],
+            print_mock.call_args_list,
+        )
+
+    def _ref_config(self):
+        config = Config(directory='.cl', module='mod', provider=None)
+        config._provider = provider = MagicMock()
+        provider.ls_tree.return_value = ['.cl/b.md', '.cl/a.md', '.cl/README']
+        provider.cat_files.return_value = {
+            'mod/__init__.py': "__version__ = __VERSION__ = '0.1.3'\n",
+            '.cl/a.md': '---\ntype: patch\n---\nchange a\n',
+            '.cl/b.md': '---\ntype: minor\npr: 3\n---\nchange b\n',
+        }
+        provider.pr_by_filename.return_value = None
+        provider.pr_by_id.return_value = None
+        return config, provider
+
+    def test_load_ref(self):
+        config, provider = self._ref_config()
+        current_version, entries = _load_ref(config, 'origin/main')
+        self.assertEqual(Version.parse('0.1.3'), current_version)
+        self.assertEqual(
+            [('minor', 'change b'), ('patch', 'change a')],
+            [(e.type.value, e.description) for e in entries],
+        )
+        provider.ls_tree.assert_called_once_with('origin/main', '.cl')
+        # everything read in one go
+        provider.cat_files.assert_called_once_with(
+            'origin/main', ['mod/__init__.py', '.cl/b.md', '.cl/a.md']
+        )
+        provider.pr_by_id.assert_called_once_with(
+            root=config.root, directory='.cl', id=3
+        )
+
+        # no version to be found
+        provider.cat_files.return_value = {'mod/__init__.py': None}
+        with self.assertRaises(ValueError) as ctx:
+            _load_ref(config, 'origin/main')
+        self.assertEqual(
+            'Unable to find __version__ in mod/__init__.py at origin/main',
+            str(ctx.exception),
+        )
+
+    @patch('changelet.command.bump.Bump.exit')
+    @patch('changelet.entry.Entry.load_all')
+    @patch('changelet.command.bump._get_current_version')
+    def test_preview_ref(self, gcv_mock, ela_mock, exit_mock):
+        cmd = Bump()
+        config, provider = self._ref_config()
+        date = datetime.now().strftime('%Y-%m-%d')
+
+        with TemporaryDirectory() as td:
+            # the working tree's CHANGELOG.md isn't consulted
+            with open(join(td.dirname, 'CHANGELOG.md'), 'w') as fh:
+                fh.write('## 0.1.3 - 2025-07-04\n\nPatch:\n* fix\n')
+            with patch('changelet.command.bump.print') as print_mock:
+                new_version, buf = cmd.run(
+                    args=self.MockArgs([], ref='origin/main'),
+                    config=config,
+                    root=td.dirname,
+                )
+        self.assertEqual(Version.parse('0.2.0'), new_version)
+        self.assertEqual(
+            [
+                call('New version number 0.2.0\n'),
+                call(
+                    f'## 0.2.0 - {date}\n\nMinor:\n* change b\n\n'
+                    'Patch:\n* change a\n\n'
+                ),
+            ],
+            print_mock.call_args_list,
+        )
+        exit_mock.assert_called_once_with(0)
+        # nothing from the working tree
+        gcv_mock.assert_not_called()
+        ela_mock.assert_not_called()
+
+        # only for previews
+        exit_mock.reset_mock()
+        exit_mock.side_effect = SystemExit
+        with patch('changelet.command.bump.print') as print_mock:
+            with self.assertRaises(SystemExit):
+                cmd.run(
+                    args=self.MockArgs(
+                        [], ref='origin/main', make_changes=True
+                    ),
+                    config=config,
+                )
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once_with(
+            'Error: --ref can only be used to preview a release',
+            file=sys.stderr,
+        )
+
+        # git failures
+        exit_mock.reset_mock()
+        provider.ls_tree.side_effect = CalledProcessError(128, ['git'])
+        with patch('changelet.command.bump.print') as print_mock:
+            with self.assertRaises(SystemExit):
+                cmd.run(args=self.MockArgs([], ref='nope'), config=config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once()
+
+    def _workspace(self, root):
+        for name, current in (('one', '1.0.0'), ('two-b', '2.0.0')):
+            makedirs(join(root, name, name.replace('-', '_')))
+            with open(
+                join(root, name, name.replace('-', '_'), '__init__.py'), 'w'
+            ) as fh:
+                fh.write(f"__version__ = '{current}'\n")
+        Entry(
+            type='minor',
+            description='change 1',
+            filename=join(root, 'one', '.changelog', 'a.md'),
+        ).save()
+        with open(join(root, 'one', 'CHANGELOG.md'), 'w') as fh:
+            fh.write('## 1.0.0 - 2025-07-04\n\nMajor:\n* First\n')
+
+        provider = MagicMock()
+        provider.pr_by_filename.return_value = None
+        config = Config(
+            root=root,
+            provider={'class': MagicMock(return_value=provider)},
+            packages=[{'name': 'one'}, {'name': 'two-b'}],
+        )
+        return config, provider
+
+    @patch('changelet.command.bump.Bump.exit')
+    def test_workspace(self, exit_mock):
+        cmd = Bump()
+        date = datetime.now().strftime('%Y-%m-%d')
+
+        with TemporaryDirectory() as td:
+            config, provider = self._workspace(td.dirname)
+
+            # preview
+            with patch('changelet.command.bump.print') as print_mock:
+                cmd.run(args=self.MockArgs([]), config=config)
+            self.assertEqual(
+                [
+                    call('one: 1.0.0 -> 1.1.0\n'),
+                    call(f'## 1.1.0 - {date}\n\nMinor:\n* change 1\n\n'),
+                    call('two-b: nothing to release\n'),
+                ],
+                print_mock.call_args_list,
+            )
+            exit_mock.assert_called_once_with(0)
+            # PRs were looked up through the shared provider
+            provider.pr_by_filename.assert_called_once()
+
+            # check
+            exit_mock.reset_mock()
+            with patch('changelet.command.bump.print') as print_mock:
+                cmd.run(args=self.MockArgs([], check=True), config=config)
+            print_mock.assert_not_called()
+            exit_mock.assert_called_once_with(0)
+
+            exit_mock.reset_mock()
+            cmd.run(
+                args=self.MockArgs([], check=True, packages=['two-b']),
+                config=config,
+            )
+            exit_mock.assert_called_once_with(1)
+
+            # nothing to preview
+            exit_mock.reset_mock()
+            with patch('changelet.command.bump.print') as print_mock:
+                cmd.run(
+                    args=self.MockArgs([], packages=['two-b']), config=config
+                )
+            exit_mock.assert_called_once_with(1)
+
+            # make changes
+            exit_mock.reset_mock()
+            with patch('changelet.command.bump.print') as print_mock:
+                bumps = cmd.run(
+                    args=self.MockArgs([], make_changes=True), config=config
+                )
+            exit_mock.assert_not_called()
+            self.assertEqual({'one': Version.parse('1.1.0')}, bumps)
+            self.assertEqual(
+                [
+                    call('one: bumped 1.0.0 -> 1.1.0'),
+                    call('two-b: nothing to release\n'),
+                ],
+                print_mock.call_args_list,
+            )
+            with open(join(td.dirname, 'one', 'CHANGELOG.md')) as fh:
+                self.assertEqual(
+                    f'## 1.1.0 - {date}\n\nMinor:\n* change 1\n\n'
+                    '## 1.0.0 - 2025-07-04\n\nMajor:\n* First\n',
+                    fh.read(),
+                )
+            with open(join(td.dirname, 'one', 'one', '__init__.py')) as fh:
+                self.assertEqual("__version__ = '1.1.0'\n", fh.read())
+            self.assertEqual([], listdir(join(td.dirname, 'one', '.changelog')))
+
+            # a package w/o a CHANGELOG.md yet
+            Entry(
+                type='patch',
+                description='change 2',
+                filename=join(td.dirname, 'two-b', '.changelog', 'b.md'),
+            ).save()
+            with patch('changelet.command.bump.print') as print_mock:
+                bumps = cmd.run(
+                    args=self.MockArgs(
+                        [], make_changes=True, packages=['two-b']
+                    ),
+                    config=config,
+                )
+            self.assertEqual({'two-b': Version.parse('2.0.1')}, bumps)
+            with open(join(td.dirname, 'two-b', 'CHANGELOG.md')) as fh:
+                self.assertTrue(fh.read().startswith('## 2.0.1 - '))
+
+    @patch('changelet.command.bump.Bump.exit')
+    def test_workspace_errors(self, exit_mock):
+        cmd = Bump()
+        exit_mock.side_effect = SystemExit
+
+        with TemporaryDirectory() as td:
+            config, provider = self._workspace(td.dirname)
+
+            for args, msg in (
+                (
+                    self.MockArgs([], pr=True),
+                    'Error: --pr, --edit, --ref, and --version are not '
+                    'supported for workspaces, use --package',
+                ),
+                (
+                    self.MockArgs([], packages=['nope']),
+                    'Error: Unknown package(s) nope',
+                ),
+            ):
+                exit_mock.reset_mock()
+                with patch('changelet.command.bump.print') as print_mock:
+                    with self.assertRaises(SystemExit):
+                        cmd.run(args=args, config=config)
+                exit_mock.assert_called_once_with(1)
+                print_mock.assert_called_once_with(msg, file=sys.stderr)
+
+            # no version to be found
+            init = join(td.dirname, 'one', 'one', '__init__.py')
+            with open(init, 'w') as fh:
+                fh.write('VERSION = 42\n')
+            exit_mock.reset_mock()
+            with patch('changelet.command.bump.print') as print_mock:
+                with self.assertRaises(SystemExit):
+                    cmd.run(args=self.MockArgs([]), config=config)
+            print_mock.assert_called_once_with(
+                f'Error: Unable to find __version__ in {init}', file=sys.stderr
+            )
+
     @patch('changelet.command.bump.Bump.exit')
     @patch('changelet.entry.Entry.load_all')
     @patch('changelet.command.bump._get_current_version')
@@ -284,6 +639,109 @@ Patch:
             with open(init) as fh:
                 self.assertEqual("# __version__ = '3.0.0' #", fh.read())
 
+    @patch('changelet.command.bump.Bump.exit')
+    @patch('changelet.entry.Entry.load_all')
+    @patch('changelet.command.bump._get_current_version')
+    def test_release_cache(self, gcv_mock, ela_mock, exit_mock):
+        cmd = Bump()
+
+        gcv_mock.return_value = Version.parse('0.1.3')
+        now = datetime.now().replace(tzinfo=timezone.utc)
+
+        with TemporaryDirectory() as td:
+            module_name = basename(td.dirname).replace('-', '_')
+
+            changelog = join(td.dirname, 'CHANGELOG.md')
+            with open(changelog, 'w') as fh:
+                fh.write('fin')
+
+            init = join(td.dirname, module_name)
+            makedirs(init)
+            init = join(init, '__init__.py')
+            with open(init, 'w') as fh:
+                fh.write("# __version__ = '0.1.3' #")
+
+            config = Config(
+                join(td.dirname, '.cl'),
+                module=module_name,
+                cache_dir=join(td.dirname, 'cache'),
+                provider=None,
+            )
+            config._provider = 'provider'
+
+            entry = Entry(
+                type='minor',
+                description='change 1',
+                pr=Pr(id=1, text='#1', url='http://1', merged_at=now),
+                filename=join(config.directory, 'one.md'),
+            )
+            entry.save()
+            ela_mock.return_value = [entry]
+
+            # preview loads the entries and caches them
+            exit_mock.return_value = None
+            with patch('changelet.command.bump.print'):
+                _, preview = cmd.run(
+                    self.MockArgs([]), config=config, root=td.dirname
+                )
+            ela_mock.assert_called_once()
+
+            # applying w/nothing changed reuses them, including the PR
+            ela_mock.reset_mock()
+            new_version, buf = cmd.run(
+                self.MockArgs([], make_changes=True),
+                config=config,
+                root=td.dirname,
+            )
+            ela_mock.assert_not_called()
+            self.assertEqual('0.2.0', new_version)
+            self.assertEqual(preview, buf)
+            self.assertTrue('[#1](http://1)' in buf)
+            # and the cache is cleared once it's been used
+            self.assertIsNone(ReleaseCache(config, '0.1.3').load())
+
+    @patch('changelet.command.bump.Bump.exit')
+    @patch('changelet.entry.Entry.load_all')
+    def test_run_root(self, ela_mock, exit_mock):
+        cmd = Bump()
+
+        with TemporaryDirectory() as td:
+            # the version is read from the same root that the changes are
+            # written to, not the cwd
+            makedirs(join(td.dirname, 'mod'))
+            init = join(td.dirname, 'mod', '__init__.py')
+            with open(init, 'w') as fh:
+                fh.write("__version__ = '1.2.3'\n")
+            changelog = join(td.dirname, 'CHANGELOG.md')
+            with open(changelog, 'w') as fh:
+                fh.write('fin')
+
+            config = Config(
+                join(td.dirname, '.cl'),
+                module='mod',
+                cache_dir=False,
+                provider=None,
+            )
+            entry = Entry(
+                type='minor',
+                description='change 1',
+                pr=None,
+                filename=join(td.dirname, 'one.md'),
+            )
+            entry.save()
+            ela_mock.return_value = [entry]
+
+            new_version, _ = cmd.run(
+                self.MockArgs([], make_changes=True),
+                config=config,
+                root=td.dirname,
+            )
+            self.assertEqual('1.3.0', new_version)
+            with open(init) as fh:
+                self.assertEqual("__version__ = '1.3.0'\n", fh.read())
+            with open(changelog) as fh:
+                self.assertTrue(fh.read().startswith('## 1.3.0 - '))
+
     @patch('changelet.command.bump.Popen')
     @patch('changelet.command.bump.environ')
     @patch('changelet.command.bump.Bump.exit')
@@ -523,7 +981,10 @@ Patch:
         ela_mock.return_value = [Entry(type='minor', description='change 1')]
 
         exit_mock.return_value = None
-        cmd.run(self.MockArgs([], edit=True), config=MagicMock())
+        cmd.run(
+            self.MockArgs([], edit=True),
+            config=MagicMock(cache_dir=None, packages=None),
+        )
 
         popen_mock.assert_not_called()
         exit_mock.assert_called_once_with(0)
@@ -541,7 +1002,10 @@ Patch:
         ela_mock.return_value = [Entry(type='minor', description='change 1')]
 
         exit_mock.return_value = None
-        cmd.run(self.MockArgs([], edit=True, check=True), config=MagicMock())
+        cmd.run(
+            self.MockArgs([], edit=True, check=True),
+            config=MagicMock(cache_dir=None, packages=None),
+        )
 
         popen_mock.assert_not_called()
         exit_mock.assert_called_once_with(0)
@@ -763,6 +1227,27 @@ class TestGetCurrentVersion(TestCase):
             # sys.path should be restored after the call
             self.assertEqual(original_path, path)
 
+    def test_get_current_version_from_source(self):
+        # packages are read w/o being imported, and so aren't cached
+        with TemporaryDirectory() as td:
+            module_name = 'foo_baz'
+            makedirs(join(td.dirname, module_name))
+            init = join(td.dirname, module_name, '__init__.py')
+            for current in ('1.0.0', '1.1.0'):
+                with open(init, 'w') as fh:
+                    fh.write(f"__version__ = '{current}'\n")
+                self.assertEqual(
+                    current, str(_get_current_version(module_name, td.dirname))
+                )
+            self.assertNotIn(module_name, modules)
+
+            # versions that aren't literals are imported
+            with open(init, 'w') as fh:
+                fh.write("__version__ = '.'.join(('2', '0', '0'))\n")
+            self.assertEqual(
+                '2.0.0', str(_get_current_version(module_name, td.dirname))
+            )
+
     @patch('changelet.command.bump.path')
     def test_get_current_version_prepends_to_path(self, path_mock):
         # Verify that directory is prepended to sys.path so that it takes
@@ -814,6 +1299,9 @@ class TestCommandBumpPR(TestCase):
             edit=False,
             ignore_local_changes=False,
             check=False,
+            formats=None,
+            ref=None,
+            packages=None,
         ):
             self.title = title
             self.make_changes = make_changes
@@ -822,6 +1310,9 @@ class TestCommandBumpPR(TestCase):
             self.edit = edit
             self.ignore_local_changes = ignore_local_changes
             self.check = check
+            self.formats = formats
+            self.ref = ref
+            self.packages = packages
 
     def _provider_mock(self, **overrides):
         provider = MagicMock()
@@ -938,14 +1429,11 @@ class TestCommandBumpPR(TestCase):
             provider_mock.pull.assert_called_once()
             provider_mock.create_branch.assert_called_once_with('rel-0-2-0')
 
-            # Verify provider.add_file was called for changelog, init,
+            # Verify provider.add_files was called once for changelog, init,
             # and only the entry with a filename
-            add_calls = provider_mock.add_file.call_args_list
-            self.assertEqual(3, len(add_calls))
-            self.assertEqual(changelog, add_calls[0][0][0])
-            self.assertEqual(init, add_calls[1][0][0])
-            self.assertEqual(
-                join(config.directory, 'ela-0000.md'), add_calls[2][0][0]
+            provider_mock.add_file.assert_not_called()
+            provider_mock.add_files.assert_called_once_with(
+                [changelog, init, join(config.directory, 'ela-0000.md')]
             )
 
             provider_mock.commit.assert_called_once_with(
@@ -2,13 +2,20 @@
 #
 #
 
+import sys
 from argparse import ArgumentParser
+from io import StringIO
+from json import dump
+from os.path import join
+from subprocess import CalledProcessError
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
-from helpers import AssertActionMixin
+from helpers import AssertActionMixin, TemporaryDirectory
 
 from changelet.command.check import Check
+from changelet.config import Config
+from changelet.entry import Entry
 
 
 class TestCommandCheck(TestCase, AssertActionMixin):
@@ -22,6 +29,30 @@ class TestCommandCheck(TestCase, AssertActionMixin):
         self.assert_action(
             actions['quiet'], flags=['-q', '--quiet'], default=False
         )
+        self.assert_action(
+            actions['packages'], flags=['--package'], default=None, nargs=None
+        )
+        self.assert_action(
+            actions['changed_files'],
+            flags=['--changed-files'],
+            default=None,
+            nargs=None,
+        )
+        self.assert_action(
+            actions['github_event'], flags=['--github-event'], default=False
+        )
+        self.assert_action(
+            actions['fetch_pr_files'], flags=['--fetch-pr-files'], default=False
+        )
+        self.assert_action(
+            actions['per_package'], flags=['--per-package'], default=False
+        )
+        self.assert_action(
+            actions['validate'], flags=['--validate'], default=False
+        )
+        self.assert_action(
+            actions['refs'], flags=['--refs'], default=None, nargs='+'
+        )
 
     @patch('changelet.command.check.exit')
     def test_exit(self, exit_mock):
@@ -35,10 +66,17 @@ class TestCommandCheck(TestCase, AssertActionMixin):
 
             def __init__(self, quiet=False):
                 self.quiet = quiet
+                self.packages = None
+                self.changed_files = None
+                self.github_event = False
+                self.fetch_pr_files = False
+                self.per_package = False
+                self.refs = None
+                self.validate = False
 
         check = Check()
 
-        config = MagicMock()
+        config = MagicMock(packages=None)
 
         # has changelog entry
         args = ArgsMock()
@@ -64,3 +102,406 @@ class TestCommandCheck(TestCase, AssertActionMixin):
             check.run(args, config)
         print_mock.assert_not_called()
         exit_mock.assert_called_once_with(1)
+
+    @patch('changelet.command.check.Check.exit')
+    def test_run_workspace(self, exit_mock):
+        class ArgsMock:
+            quiet = False
+            packages = None
+            changed_files = None
+            github_event = False
+            fetch_pr_files = False
+            per_package = False
+            refs = None
+            validate = False
+
+        provider = MagicMock()
+        config = Config(
+            root='mono',
+            provider={'class': MagicMock(return_value=provider)},
+            packages=[{'name': 'one'}, {'name': 'two', 'root': 'libs/two'}],
+        )
+        check = Check()
+        args = ArgsMock()
+
+        # one of the packages has an entry
+        provider.changelog_entries_in_branch.side_effect = (
+            lambda root, directory: directory == 'mono/libs/two/.changelog'
+        )
+        check.run(args, config)
+        exit_mock.assert_called_once_with(0)
+        self.assertEqual(
+            ['mono/libs/two/.changelog', 'mono/one/.changelog'],
+            sorted(
+                c.kwargs['directory']
+                for c in provider.changelog_entries_in_branch.call_args_list
+            ),
+        )
+
+        # limited to one that doesn't
+        exit_mock.reset_mock()
+        args.packages = ['one']
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        print_mock.assert_called_once()
+        exit_mock.assert_called_once_with(1)
+
+        # unknown package
+        exit_mock.reset_mock()
+        args.packages = ['nope']
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        print_mock.assert_called_once_with(
+            'Error: Unknown package(s) nope', file=sys.stderr
+        )
+
+    @patch('changelet.command.check.Check.exit')
+    def test_run_changed_files(self, exit_mock):
+        class ArgsMock:
+            quiet = True
+            packages = None
+            github_event = False
+            fetch_pr_files = False
+            per_package = False
+            refs = None
+            validate = False
+
+            def __init__(self, changed_files):
+                self.changed_files = changed_files
+
+        check = Check()
+        config = MagicMock(directory='.changelog', packages=None)
+
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'changes.json')
+            with open(filename, 'w') as fh:
+                dump(['src/thing.py', '.changelog/abc.md'], fh)
+
+            check.run(ArgsMock(filename), config)
+            exit_mock.assert_called_once_with(0)
+            # git wasn't involved
+            config.provider.changelog_entries_in_branch.assert_not_called()
+
+            # stdin
+            exit_mock.reset_mock()
+            with patch('sys.stdin', StringIO('{"files": [{"path": "x.py"}]}')):
+                check.run(ArgsMock('-'), config)
+            exit_mock.assert_called_once_with(1)
+
+            # github event, push events only cover what was pushed
+            event = join(td.dirname, 'event.json')
+            with open(event, 'w') as fh:
+                dump({'commits': [{'added': ['.changelog/abc.md']}]}, fh)
+            args = ArgsMock(None)
+            args.github_event = True
+            exit_mock.reset_mock()
+            with patch.dict(
+                'changelet.command.check.environ', {'GITHUB_EVENT_PATH': event}
+            ), patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once_with(
+                "Error: Push events only list the pushed commits, not the "
+                "branch's changes, use --changed-files",
+                file=sys.stderr,
+            )
+
+            # pull request events don't list their files, and they're only
+            # fetched when asked to
+            with open(event, 'w') as fh:
+                dump({'pull_request': {'number': 42}}, fh)
+            config.provider.pr_files.return_value = [
+                {'filename': '.changelog/abc.md', 'status': 'added'}
+            ]
+            exit_mock.reset_mock()
+            with patch.dict(
+                'changelet.command.check.environ', {'GITHUB_EVENT_PATH': event}
+            ), patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once_with(
+                "Error: Pull request events don't list changed files, use "
+                '--changed-files or --fetch-pr-files',
+                file=sys.stderr,
+            )
+            config.provider.pr_files.assert_not_called()
+            args.fetch_pr_files = True
+            exit_mock.reset_mock()
+            with patch.dict(
+                'changelet.command.check.environ', {'GITHUB_EVENT_PATH': event}
+            ):
+                check.run(args, config)
+            exit_mock.assert_called_once_with(0)
+            config.provider.pr_files.assert_called_once_with(42, repo=None)
+            # edits to existing entries don't count
+            config.provider.pr_files.return_value = [
+                {'filename': '.changelog/abc.md', 'status': 'modified'}
+            ]
+            exit_mock.reset_mock()
+            with patch.dict(
+                'changelet.command.check.environ', {'GITHUB_EVENT_PATH': event}
+            ):
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            # and failing to do so is an error
+            config.provider.pr_files.side_effect = CalledProcessError(1, ['gh'])
+            exit_mock.reset_mock()
+            with patch.dict(
+                'changelet.command.check.environ', {'GITHUB_EVENT_PATH': event}
+            ), patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once()
+
+            # workspace packages
+            exit_mock.reset_mock()
+            workspace = Config(
+                provider={'class': MagicMock()},
+                packages=[{'name': 'one'}, {'name': 'two'}],
+            )
+            with open(filename, 'w') as fh:
+                dump(['two/.changelog/abc.md'], fh)
+            check.run(ArgsMock(filename), workspace)
+            exit_mock.assert_called_once_with(0)
+
+            # errors
+            for changed_files, env, msg in (
+                (None, {}, 'Error: GITHUB_EVENT_PATH is not set'),
+                (
+                    join(td.dirname, 'missing.json'),
+                    {},
+                    'Error: [Errno 2] No such file or directory: '
+                    f"'{join(td.dirname, 'missing.json')}'",
+                ),
+            ):
+                args = ArgsMock(changed_files)
+                args.github_event = changed_files is None
+                exit_mock.reset_mock()
+                with patch.dict(
+                    'changelet.command.check.environ', env, clear=True
+                ), patch('changelet.command.check.print') as print_mock:
+                    check.run(args, config)
+                exit_mock.assert_called_once_with(1)
+                print_mock.assert_called_once_with(msg, file=sys.stderr)
+
+    @patch('changelet.command.check.Check.exit')
+    def test_run_per_package(self, exit_mock):
+        class ArgsMock:
+            quiet = False
+            packages = None
+            changed_files = None
+            github_event = False
+            fetch_pr_files = False
+            per_package = True
+            refs = None
+            validate = False
+
+        provider = MagicMock()
+        config = Config(
+            provider={'class': MagicMock(return_value=provider)},
+            packages=[{'name': 'one'}, {'name': 'two'}, {'name': 'three'}],
+        )
+        check = Check()
+        args = ArgsMock()
+
+        # one and two have changes, only one has an entry
+        provider.changed_files.return_value = {
+            'one/src/a.py': 'M',
+            'one/.changelog/x.md': 'A',
+            'two/src/b.py': 'M',
+            'two/.changelog/old.md': 'M',
+            'README.md': 'M',
+        }
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        # a single diff
+        provider.changed_files.assert_called_once_with()
+        provider.changelog_entries_in_branch.assert_not_called()
+        self.assertEqual(
+            call(
+                'Missing required changelog file in two/.changelog',
+                file=sys.stderr,
+            ),
+            print_mock.call_args_list[0],
+        )
+        self.assertEqual(2, print_mock.call_count)
+
+        # limited to one, all good
+        exit_mock.reset_mock()
+        args.packages = ['one']
+        check.run(args, config)
+        exit_mock.assert_called_once_with(0)
+
+        # quiet
+        exit_mock.reset_mock()
+        args.packages = None
+        args.quiet = True
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_not_called()
+
+        # nothing to check against
+        exit_mock.reset_mock()
+        config.packages = None
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once_with(
+            'Error: No sources or packages in the config', file=sys.stderr
+        )
+
+    @patch('changelet.command.check.Check.exit')
+    def test_run_refs(self, exit_mock):
+        class ArgsMock:
+            quiet = False
+            packages = None
+            changed_files = None
+            github_event = False
+            fetch_pr_files = False
+            per_package = False
+            refs = ['one', 'two', 'nope']
+            validate = False
+
+        provider = MagicMock()
+        provider.changelog_entries_in_refs.return_value = {
+            'one': {'.changelog/b.md', '.changelog/a.md'},
+            'two': set(),
+            'nope': None,
+        }
+        config = Config(
+            provider={'class': MagicMock(return_value=provider)}, packages=None
+        )
+        check = Check()
+        args = ArgsMock()
+
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        provider.changelog_entries_in_refs.assert_called_once_with(
+            root=config.root,
+            directories=['.changelog'],
+            refs=['one', 'two', 'nope'],
+            max_workers=None,
+        )
+        provider.changelog_entries_in_branch.assert_not_called()
+        self.assertEqual(
+            [
+                call(
+                    '{"ref": "one", "ok": true, "entries": '
+                    '[".changelog/a.md", ".changelog/b.md"]}'
+                ),
+                call('{"ref": "two", "ok": false, "entries": []}'),
+                call(
+                    '{"ref": "nope", "ok": false, "error": '
+                    '"Unable to resolve nope"}'
+                ),
+            ],
+            print_mock.call_args_list,
+        )
+
+        # all good
+        exit_mock.reset_mock()
+        provider.changelog_entries_in_refs.return_value = {
+            'one': {'.changelog/a.md'}
+        }
+        args.refs = ['one']
+        with patch('changelet.command.check.print'):
+            check.run(args, config)
+        exit_mock.assert_called_once_with(0)
+
+        # workspace, w/an unknown package
+        exit_mock.reset_mock()
+        config.packages = [{'name': 'pkg'}]
+        args.packages = ['other']
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once_with(
+            'Error: Unknown package(s) other', file=sys.stderr
+        )
+
+        # can't be combined
+        exit_mock.reset_mock()
+        args.per_package = True
+        with patch('changelet.command.check.print') as print_mock:
+            check.run(args, config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once_with(
+            'Error: --refs can not be combined with --changed-files, '
+            '--github-event, or --per-package',
+            file=sys.stderr,
+        )
+
+    @patch('changelet.command.check.Check.exit')
+    def test_run_validate(self, exit_mock):
+        class ArgsMock:
+            quiet = False
+            packages = None
+            changed_files = None
+            github_event = False
+            fetch_pr_files = False
+            per_package = False
+            refs = None
+            validate = True
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            provider = MagicMock()
+            provider.changelog_entries_in_branch.return_value = {
+                f'{directory}/good.md'
+            }
+            config = Config(
+                directory=directory,
+                provider={'class': MagicMock(return_value=provider)},
+                packages=None,
+            )
+            Entry(
+                type='minor',
+                description='good',
+                filename=join(directory, 'good.md'),
+            ).save()
+            check = Check()
+            args = ArgsMock()
+
+            # all good, on to the normal check
+            check.run(args, config)
+            exit_mock.assert_called_once_with(0)
+            provider.changelog_entries_in_branch.assert_called_once()
+
+            # a bad entry fails regardless
+            exit_mock.reset_mock()
+            provider.reset_mock()
+            with open(join(directory, 'bad.md'), 'w') as fh:
+                fh.write('---\ntype: huge\n---\n\n')
+            with patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            provider.changelog_entries_in_branch.assert_not_called()
+            self.assertEqual(2, print_mock.call_count)
+            self.assertEqual(
+                f'{directory}/bad.md:2: Invalid type "huge", expected one of '
+                'none, patch, minor, major',
+                str(print_mock.call_args_list[0].args[0]),
+            )
+
+            # quiet
+            exit_mock.reset_mock()
+            args.quiet = True
+            with patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_not_called()
+
+            # unknown package
+            exit_mock.reset_mock()
+            args.quiet = False
+            args.packages = ['nope']
+            config.packages = [{'name': 'pkg'}]
+            with patch('changelet.command.check.print') as print_mock:
+                check.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once_with(
+                'Error: Unknown package(s) nope', file=sys.stderr
+            )
@@ -2,6 +2,7 @@
 #
 #
 
+import sys
 from argparse import ArgumentParser
 from os import makedirs
 from os.path import join
@@ -39,6 +40,9 @@ class TestCommandCreate(TestCase, AssertActionMixin):
         self.assert_action(
             actions['continue_'], flags=['--continue'], default=False
         )
+        self.assert_action(
+            actions['from_file'], flags=['--from-file'], default=None, nargs=1
+        )
         self.assert_action(
             actions['description'],
             flags=[],
@@ -61,6 +65,7 @@ class TestCommandCreate(TestCase, AssertActionMixin):
                 self.add = add
                 self.commit = commit
                 self.continue_ = False
+                self.from_file = None
 
         with TemporaryDirectory() as td:
             type = 'patch'
@@ -140,6 +145,7 @@ class TestCommandCreate(TestCase, AssertActionMixin):
 
         class ArgsMock:
             continue_ = True
+            from_file = None
 
         with TemporaryDirectory() as td:
             directory = join(td.dirname, '.cl')
@@ -194,6 +200,7 @@ class TestCommandCreate(TestCase, AssertActionMixin):
 
         class ArgsMock:
             continue_ = False
+            from_file = None
             type = 'patch'
             description = ['Hello', 'World']
             pr = None
@@ -229,6 +236,7 @@ class TestCommandCreate(TestCase, AssertActionMixin):
         class ArgsMock:
             def __init__(self, type=None, description=None):
                 self.continue_ = False
+                self.from_file = None
                 self.add = False
                 self.commit = False
                 self.pr = None
@@ -260,3 +268,115 @@ class TestCommandCreate(TestCase, AssertActionMixin):
             exit_mock.reset_mock()
             create.run(args, config)
             exit_mock.assert_called_once_with(1)
+
+    @patch('changelet.command.create.sys_exit')
+    @patch('changelet.command.create.print')
+    def test_from_file(self, print_mock, exit_mock):
+
+        class ArgsMock:
+            add = False
+            commit = False
+            continue_ = False
+
+            def __init__(self, from_file):
+                self.from_file = from_file
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.cl')
+            config = Config(
+                directory=directory, commit_prefix='xyz: ', provider=None
+            )
+            config._provider = provider_mock = MagicMock()
+            provider_mock.staged_changelog_entry.return_value = None
+            provider_mock.has_staged.return_value = False
+            create = Create()
+
+            filename = join(td.dirname, 'entries.jsonl')
+            with open(filename, 'w') as fh:
+                fh.write('{"type": "patch", "description": "One"}\n')
+                fh.write('\n')
+                fh.write('{"type": "minor", "description": "Two", "pr": 42}\n')
+
+            args = ArgsMock(filename)
+            entries = create.run(args, config)
+            self.assertEqual(['One', 'Two'], [e.description for e in entries])
+            self.assertEqual(
+                [EntryType.PATCH, EntryType.MINOR], [e.type for e in entries]
+            )
+            self.assertEqual(42, entries[1].pr)
+            for entry in entries:
+                with open(entry.filename) as fh:
+                    self.assertTrue(fh.read().startswith('---\ntype: '))
+            provider_mock.add_files.assert_not_called()
+            print_mock.assert_called_once()
+            self.assertTrue(
+                print_mock.call_args[0][0].startswith('Created 2 entries in ')
+            )
+            self.assertTrue(
+                print_mock.call_args[0][0].endswith('have been written.')
+            )
+            exit_mock.assert_not_called()
+
+            # staged w/a single add
+            print_mock.reset_mock()
+            args.add = True
+            entries = create.run(args, config)
+            provider_mock.add_files.assert_called_once_with(
+                [e.filename for e in entries]
+            )
+            self.assertTrue(
+                print_mock.call_args[0][0].endswith('have been staged.')
+            )
+
+            # committed once
+            provider_mock.reset_mock()
+            print_mock.reset_mock()
+            args.commit = True
+            with open(filename) as stdin, patch('sys.stdin', stdin):
+                args.from_file = '-'
+                entries = create.run(args, config)
+                # stdin is left open, it isn't ours
+                self.assertFalse(stdin.closed)
+            provider_mock.add_files.assert_called_once()
+            provider_mock.commit.assert_called_once_with(
+                'xyz: Add 2 changelog entries'
+            )
+            self.assertTrue(
+                print_mock.call_args[0][0].endswith('have been committed.')
+            )
+
+            # invalid json
+            print_mock.reset_mock()
+            with open(filename, 'w') as fh:
+                fh.write('{"type": "patch", "description": "One"}\n')
+                fh.write('nope\n')
+            args.from_file = filename
+            create.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            self.assertTrue(
+                print_mock.call_args[0][0].startswith(
+                    f'error: {filename}:2: invalid JSON, '
+                )
+            )
+
+            # missing & unreadable files
+            for missing in (join(td.dirname, 'missing.ndjson'), td.dirname):
+                exit_mock.reset_mock()
+                args.from_file = missing
+                create.run(args, config)
+                exit_mock.assert_called_once_with(1)
+                self.assertTrue(
+                    print_mock.call_args[0][0].startswith('error: [Errno ')
+                )
+                self.assertIn(missing, print_mock.call_args[0][0])
+            args.from_file = filename
+
+            # invalid entry
+            exit_mock.reset_mock()
+            with open(filename, 'w') as fh:
+                fh.write('{"type": "pathc", "description": "One"}\n')
+            create.run(args, config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_with(
+                'error: entry 0: invalid type "pathc"', file=sys.stderr
+            )
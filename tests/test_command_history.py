@@ -0,0 +1,57 @@
+#
+#
+#
+
+from argparse import ArgumentParser
+from os.path import join
+from unittest import TestCase
+from unittest.mock import call, patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+
+from changelet.command.history import History
+from changelet.config import Config
+
+
+class TestCommandHistory(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, limit=None):
+            self.limit = limit
+
+    def test_configure(self):
+        history = History()
+        parser = ArgumentParser(exit_on_error=False)
+        history.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['limit'], flags=['-n', '--limit'], default=None, nargs=None
+        )
+
+    def test_run(self):
+        history = History()
+
+        with TemporaryDirectory() as td:
+            config = Config(root=td.dirname, provider=None)
+            with open(join(td.dirname, 'CHANGELOG.md'), 'w') as fh:
+                fh.write('## 1.0.1 - 2025-07-15 - Quick Fix\n\n* Fixed\n\n')
+                fh.write('## 1.0.0 - 2025-07-01\n\n* First\n')
+
+            with patch('changelet.command.history.print') as print_mock:
+                sections = history.run(self.ArgsMock(), config)
+            self.assertEqual(['1.0.1', '1.0.0'], [s.version for s in sections])
+            self.assertEqual(
+                [
+                    call('1.0.1 - 2025-07-15 - Quick Fix'),
+                    call('1.0.0 - 2025-07-01'),
+                ],
+                print_mock.call_args_list,
+            )
+
+            with patch('changelet.command.history.print') as print_mock:
+                sections = history.run(self.ArgsMock(limit=1), config)
+            self.assertEqual(['1.0.1'], [s.version for s in sections])
+            print_mock.assert_called_once_with('1.0.1 - 2025-07-15 - Quick Fix')
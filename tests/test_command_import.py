@@ -0,0 +1,141 @@
+#
+#
+#
+
+import sys
+from argparse import ArgumentParser
+from os import listdir
+from os.path import join
+from subprocess import CalledProcessError
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+
+from changelet.command.import_ import TYPES, Import, classify
+from changelet.config import Config
+from changelet.entry import Entry
+
+
+class TestCommandImport(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, ref='v1.0.0', default_type=None, add=False):
+            self.ref = ref
+            self.default_type = default_type
+            self.add = add
+            self.dry_run = False
+
+    def test_configure(self):
+        cmd = Import()
+        parser = ArgumentParser(exit_on_error=False)
+        cmd.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['default_type'],
+            flags=['--default-type'],
+            default=None,
+            nargs=1,
+            choices={'none', 'patch', 'minor', 'major'},
+        )
+        self.assert_action(actions['add'], flags=['-a', '--add'], default=False)
+        self.assert_action(
+            actions['dry_run'], flags=['--dry-run'], default=False
+        )
+        self.assert_action(
+            actions['ref'], flags=[], default=None, nargs=None, required=True
+        )
+
+    @patch('changelet.command.import_.exit')
+    def test_exit(self, exit_mock):
+        cmd = Import()
+        cmd.exit(42)
+        exit_mock.assert_called_once_with(42)
+
+    def test_classify(self):
+        for subject, body, expected in (
+            ('feat: A thing', '', ('minor', 'A thing', None)),
+            ('fix(parser): A fix (#42)', '', ('patch', 'A fix', 42)),
+            ('Feat: Caps', '', ('minor', 'Caps', None)),
+            ('docs: Words', '', ('none', 'Words', None)),
+            ('feat!: Breaks', '', ('major', 'Breaks', None)),
+            (
+                'refactor(api): Also breaks',
+                'Details\n\nBREAKING CHANGE: yes',
+                ('major', 'Also breaks', None),
+            ),
+            ('wip: Unknown type', '', (None, 'Unknown type', None)),
+            ('Not conventional (#7)', '', (None, 'Not conventional', 7)),
+        ):
+            self.assertEqual(expected, classify(subject, body, TYPES), subject)
+
+        # default for the unclassifiable
+        self.assertEqual(
+            ('patch', 'Plain', None), classify('Plain', '', TYPES, 'patch')
+        )
+
+    @patch('changelet.command.import_.print')
+    def test_run(self, print_mock):
+        provider = MagicMock()
+        provider.commits.return_value = iter(
+            [
+                ('c', 'feat: Feature (#3)', ''),
+                ('b', 'Merge things', ''),
+                ('a', 'custom: Customized', ''),
+            ]
+        )
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = Config(
+                directory=directory,
+                provider={'class': MagicMock(return_value=provider)},
+                import_types={'custom': 'patch'},
+            )
+            cmd = Import()
+            args = self.ArgsMock(add=True)
+            filenames = cmd.run(args, config)
+            provider.commits.assert_called_once_with('v1.0.0')
+            self.assertEqual(2, len(filenames))
+            self.assertEqual(2, len(listdir(directory)))
+            entries = [Entry.load_file(f) for f in filenames]
+            self.assertEqual(
+                [('minor', 'Feature'), ('patch', 'Customized')],
+                [(e.type.value, e.description) for e in entries],
+            )
+            with open(filenames[0]) as fh:
+                self.assertTrue('pr: 3\n' in fh.read())
+            provider.add_files.assert_called_once_with(filenames)
+            print_mock.assert_called_once_with(
+                'Imported 2 entries from 3 commits', file=sys.stderr
+            )
+
+            # dry run w/a default type
+            print_mock.reset_mock()
+            provider.add_files.reset_mock()
+            provider.commits.return_value = iter(
+                [('c', 'feat: Feature', ''), ('b', 'Merge things', '')]
+            )
+            args = self.ArgsMock(default_type='none', add=True)
+            args.dry_run = True
+            self.assertEqual([], cmd.run(args, config))
+            # nothing new written
+            self.assertEqual(2, len(listdir(directory)))
+            provider.add_files.assert_not_called()
+            print_mock.assert_any_call('minor: Feature')
+            print_mock.assert_any_call('none: Merge things')
+
+    @patch('changelet.command.import_.Import.exit')
+    @patch('changelet.command.import_.print')
+    def test_run_git_failure(self, print_mock, exit_mock):
+        provider = MagicMock()
+        provider.commits.side_effect = CalledProcessError(128, ['git', 'log'])
+        config = Config(provider={'class': MagicMock(return_value=provider)})
+        Import().run(self.ArgsMock(ref='nope'), config)
+        exit_mock.assert_called_once_with(1)
+        print_mock.assert_called_once_with(
+            'error: failed to read the git log after nope', file=sys.stderr
+        )
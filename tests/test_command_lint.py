@@ -0,0 +1,92 @@
+#
+#
+#
+
+import sys
+from argparse import ArgumentParser
+from os.path import join
+from unittest import TestCase
+from unittest.mock import MagicMock, call, patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+
+from changelet.command.lint import Lint
+from changelet.config import Config
+from changelet.entry import Entry
+
+
+class TestCommandLint(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, packages=None):
+            self.packages = packages
+
+    def test_configure(self):
+        lint = Lint()
+        parser = ArgumentParser(exit_on_error=False)
+        lint.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['packages'], flags=['--package'], default=None, nargs=None
+        )
+
+    @patch('changelet.command.lint.exit')
+    def test_exit(self, exit_mock):
+        lint = Lint()
+        lint.exit(42)
+        exit_mock.assert_called_once_with(42)
+
+    @patch('changelet.command.lint.Lint.exit')
+    def test_run(self, exit_mock):
+        lint = Lint()
+
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            config = Config(directory=directory, provider=MagicMock())
+
+            # nothing pending is fine
+            with patch('changelet.command.lint.print') as print_mock:
+                lint.run(self.ArgsMock(), config)
+            exit_mock.assert_called_once_with(0)
+            print_mock.assert_not_called()
+
+            Entry(
+                type='patch',
+                description='good',
+                filename=join(directory, 'a.md'),
+            ).save()
+            with open(join(directory, 'b.md'), 'w') as fh:
+                fh.write('---\ntype: minor\npr: abc\n---\n')
+            with open(join(directory, 'c.md'), 'w') as fh:
+                fh.write('no front matter\n')
+
+            # every problem is reported
+            exit_mock.reset_mock()
+            with patch('changelet.command.lint.print') as print_mock:
+                lint.run(self.ArgsMock(), config)
+            exit_mock.assert_called_once_with(1)
+            self.assertEqual(
+                [
+                    f'{directory}/b.md:3: Invalid pr "abc", expected a number',
+                    f'{directory}/b.md:5: Empty description',
+                    f'{directory}/c.md:1: Missing front matter, expected ---',
+                ],
+                [str(c.args[0]) for c in print_mock.call_args_list[:-1]],
+            )
+            self.assertEqual(
+                call('3 problem(s) found', file=sys.stderr),
+                print_mock.call_args_list[-1],
+            )
+
+            # unknown package
+            exit_mock.reset_mock()
+            config.packages = [{'name': 'pkg'}]
+            with patch('changelet.command.lint.print') as print_mock:
+                lint.run(self.ArgsMock(packages=['nope']), config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once_with(
+                'Error: Unknown package(s) nope', file=sys.stderr
+            )
@@ -0,0 +1,97 @@
+#
+#
+#
+
+from argparse import ArgumentParser
+from os.path import exists, join
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+
+from changelet.command.serve import Serve
+from changelet.daemon import Server
+
+
+class TestCommandServe(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, socket=None, idle_timeout=0.01, directory=None):
+            self.socket = socket
+            self.idle_timeout = idle_timeout
+            self.config = None
+            self.root = None
+            self.directory = directory
+            self.module = None
+
+    def test_configure(self):
+        serve = Serve()
+        parser = ArgumentParser(exit_on_error=False)
+        serve.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['socket'], flags=['--socket'], default=None, nargs=None
+        )
+        self.assert_action(
+            actions['idle_timeout'],
+            flags=['--idle-timeout'],
+            default=None,
+            nargs=None,
+        )
+
+    @patch('changelet.command.serve.exit')
+    def test_exit(self, exit_mock):
+        serve = Serve()
+        serve.exit(42)
+        exit_mock.assert_called_once_with(42)
+
+    @patch('changelet.command.serve.print')
+    @patch('changelet.command.serve.Serve.exit')
+    def test_run(self, exit_mock, print_mock):
+        serve = Serve()
+
+        with TemporaryDirectory() as td:
+            config = MagicMock(cache_dir=td.dirname)
+            path = join(td.dirname, 'serve.sock')
+
+            # default socket in the cache dir, exits once idle
+            server = serve.run(self.ArgsMock(), config)
+            self.assertEqual(path, server.path)
+            print_mock.assert_called_once_with(f'Listening on {path}')
+            # cleaned up after itself
+            self.assertFalse(exists(path))
+            exit_mock.assert_not_called()
+
+            # explicit socket, interrupted
+            other = join(td.dirname, 'other.sock')
+            with patch('changelet.daemon.Server.serve') as serve_mock:
+                serve_mock.side_effect = KeyboardInterrupt()
+                server = serve.run(self.ArgsMock(socket=other), config)
+            self.assertEqual(other, server.path)
+            self.assertFalse(exists(other))
+
+            # its config is only used for requests w/the same args
+            with patch('changelet.daemon.Server.serve'):
+                server = serve.run(
+                    self.ArgsMock(socket=other, directory='other'), config
+                )
+            self.assertEqual(
+                [frozenset({('directory', 'other')})], list(server._configs)
+            )
+            self.assertIs(config, server.config({'directory': 'other'}))
+
+            # already running
+            running = Server(path)
+            print_mock.reset_mock()
+            serve.run(self.ArgsMock(), config)
+            exit_mock.assert_called_once_with(1)
+            print_mock.assert_called_once()
+            running.server_close()
+
+            # no cache dir, no default socket
+            exit_mock.reset_mock()
+            serve.run(self.ArgsMock(), MagicMock(cache_dir=False))
+            exit_mock.assert_called_once_with(1)
@@ -0,0 +1,68 @@
+#
+#
+#
+
+from argparse import ArgumentParser
+from os.path import join
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers import AssertActionMixin, TemporaryDirectory
+
+from changelet.command.show import Show
+from changelet.config import Config
+
+
+class TestCommandShow(TestCase, AssertActionMixin):
+
+    class ArgsMock:
+
+        def __init__(self, version):
+            self.version = version
+
+    def test_configure(self):
+        show = Show()
+        parser = ArgumentParser(exit_on_error=False)
+        show.configure(parser)
+
+        actions = {a.dest: a for a in parser._actions}
+
+        self.assert_action(
+            actions['version'],
+            flags=[],
+            default=None,
+            nargs=None,
+            required=True,
+        )
+
+    @patch('changelet.command.show.exit')
+    def test_exit(self, exit_mock):
+        show = Show()
+        show.exit(42)
+        exit_mock.assert_called_once_with(42)
+
+    @patch('changelet.command.show.Show.exit')
+    def test_run(self, exit_mock):
+        show = Show()
+
+        with TemporaryDirectory() as td:
+            config = Config(root=td.dirname, provider=None)
+            with open(join(td.dirname, 'CHANGELOG.md'), 'w') as fh:
+                fh.write('## 1.0.1 - 2025-07-15\n\nPatch:\n* Fixed\n\n')
+                fh.write('## 1.0.0 - 2025-07-01\n\nMajor:\n* First\n')
+
+            with patch('changelet.command.show.print') as print_mock:
+                section = show.run(self.ArgsMock('1.0.1'), config)
+            self.assertEqual(
+                '## 1.0.1 - 2025-07-15\n\nPatch:\n* Fixed\n\n', section
+            )
+            print_mock.assert_called_once_with(
+                '## 1.0.1 - 2025-07-15\n\nPatch:\n* Fixed'
+            )
+            exit_mock.assert_not_called()
+
+            exit_mock.return_value = None
+            with patch('changelet.command.show.print') as print_mock:
+                self.assertIsNone(show.run(self.ArgsMock('2.0.0'), config))
+            print_mock.assert_called_once()
+            exit_mock.assert_called_once_with(1)
@@ -2,12 +2,15 @@
 #
 #
 
+from os import utime
 from os.path import join
 from unittest import TestCase
+from unittest.mock import patch
 
 from helpers import TemporaryDirectory
 
-from changelet.config import Config
+from changelet.cache import default_cache_dir
+from changelet.config import Config, _changelet_toml, _load, _parsed
 from changelet.github import GitHubCli
 
 
@@ -26,6 +29,8 @@ class TestConfig(TestCase):
         self.assertEqual('.changelog', config.directory)
         self.assertEqual('Changelog: ', config.commit_prefix)
         self.assertIsNone(config.module)
+        self.assertIsNone(config.templates)
+        self.assertIsNone(config.cache_dir)
         self.assertEqual(
             {'class': 'changelet.github.GitHubCli'}, config._provider_config
         )
@@ -195,3 +200,157 @@ directory: from_yaml
             # module override from kwargs
             config = Config.build(root=td.dirname, module='from_kwargs_mod')
             self.assertEqual('from_kwargs_mod', config.module)
+
+            # default cache dir is filled in
+            self.assertEqual(default_cache_dir(td.dirname), config.cache_dir)
+
+            # unless disabled
+            with open(filename, 'w') as fh:
+                fh.write('''---
+cache_dir: false
+''')
+            config = Config.build(root=td.dirname)
+            self.assertFalse(config.cache_dir)
+
+    def test_changelet_toml(self):
+        text = """[project]
+name = "thing"
+dependencies = ["changelet>=0.6"]
+
+[tool.changelet]
+directory = ".cl"
+
+[tool.black]
+line-length = 80
+
+[tool.changelet.provider]
+class = "changelet.github.GitHubCli"
+
+[[tool.changelet.things]]
+a = 1
+
+[tool.changelet-extra]
+b = 2
+"""
+        self.assertEqual(
+            """[tool.changelet]
+directory = ".cl"
+
+[tool.changelet.provider]
+class = "changelet.github.GitHubCli"
+
+[[tool.changelet.things]]
+a = 1
+
+""",
+            _changelet_toml(text),
+        )
+
+        # config that isn't under a [tool.changelet...] header can't be
+        # extracted
+        self.assertIsNone(
+            _changelet_toml('[tool]\nchangelet.directory = ".cl"\n')
+        )
+        self.assertIsNone(_changelet_toml('tool.changelet.directory = ".cl"\n'))
+        self.assertIsNone(
+            _changelet_toml('[tool]\nchangelet = { directory = ".cl" }\n')
+        )
+        # nor can quoted or spaced table names that mention changelet
+        for header in (
+            '[tool."changelet"]',
+            "[tool.'changelet'.provider]",
+            '[tool . changelet]',
+            '[[ tool.changelet . things ]]',
+        ):
+            self.assertIsNone(_changelet_toml(f'{header}\na = 1\n'))
+        # others are fine
+        self.assertEqual(
+            '[tool.changelet]\na = 1\n',
+            _changelet_toml('[tool."other"]\nb = 2\n[tool.changelet]\na = 1\n'),
+        )
+
+    def test_load_pyproject_toml_variations(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'pyproject.toml')
+
+            def load(text):
+                with open(filename, 'w') as fh:
+                    fh.write(text)
+                config = Config()
+                config.load_pyproject_toml(filename)
+                return config
+
+            # doesn't mention changelet at all, never parsed
+            with patch('changelet.config._toml_loads') as loads_mock:
+                config = load('[tool.other]\nkey = "value"\n')
+            loads_mock.assert_not_called()
+            self.assertEqual('.changelog', config.directory)
+
+            # only the changelet table is parsed
+            with patch(
+                'changelet.config._toml_loads', return_value={}
+            ) as loads_mock:
+                load('[tool.other]\nx = 1\n[tool.changelet]\ndirectory = "a"\n')
+            loads_mock.assert_called_once_with(
+                '[tool.changelet]\ndirectory = "a"\n'
+            )
+
+            # dotted keys under [tool] fall back to a full parse
+            config = load('[tool]\nchangelet.directory = "dotted"\n')
+            self.assertEqual('dotted', config.directory)
+
+            # as do quoted table names
+            config = load('[tool."changelet"]\ndirectory = "quoted"\n')
+            self.assertEqual('quoted', config.directory)
+
+            # a multi-line string that looks like a table confuses extraction,
+            # falls back to a full parse
+            config = load('''[tool.changelet]
+commit_prefix = """Changelog:
+[tool.other]
+"""
+directory = "multi"
+''')
+            self.assertEqual('multi', config.directory)
+            self.assertEqual('Changelog:\n[tool.other]\n', config.commit_prefix)
+
+    def test_load_cache(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, '.changelet.yaml')
+            with open(filename, 'w') as fh:
+                fh.write('directory: first\n')
+
+            parse_calls = []
+
+            def parse(filename):
+                parse_calls.append(filename)
+                with open(filename) as fh:
+                    return fh.read()
+
+            self.assertEqual('directory: first\n', _load(filename, parse))
+            self.assertEqual(1, len(parse_calls))
+            # unchanged, cached, keyed on the absolute path
+            self.assertEqual('directory: first\n', _load(filename, parse))
+            self.assertEqual(1, len(parse_calls))
+            self.assertTrue(filename in _parsed)
+
+            # changed, re-parsed
+            with open(filename, 'w') as fh:
+                fh.write('directory: second\n')
+            utime(filename, ns=(0, 0))
+            self.assertEqual('directory: second\n', _load(filename, parse))
+            self.assertEqual(2, len(parse_calls))
+
+            # Config.build doesn't re-parse unchanged files
+            _parsed.clear()
+            with patch(
+                'changelet.config._parse_yaml',
+                return_value={'directory': 'second'},
+            ) as parse_mock:
+                config = Config.build(config=filename)
+            parse_mock.assert_called_once()
+            self.assertEqual('second', config.directory)
+            with patch('changelet.config._parse_yaml') as parse_mock:
+                config = Config.build(config=filename)
+            parse_mock.assert_not_called()
+            self.assertEqual('second', config.directory)
@@ -0,0 +1,230 @@
+#
+#
+#
+
+from os import chdir, environ, getcwd, makedirs
+from os.path import exists, join
+from socket import AF_UNIX, SOCK_STREAM, socket
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import TemporaryDirectory
+
+from changelet.client import request
+from changelet.config import Config
+from changelet.daemon import Server, ServerException
+
+
+class TestDaemon(TestCase):
+
+    def changelog(self, root):
+        with open(join(root, 'CHANGELOG.md'), 'w') as fh:
+            fh.write('## 1.0.0 - 2025-07-01\n\nMajor:\n* First\n')
+        # keep out of the user's cache dir
+        with open(join(root, '.changelet.yaml'), 'w') as fh:
+            fh.write('cache_dir: false\n')
+
+    def test_lifecycle(self):
+        with TemporaryDirectory() as td:
+            path = join(td.dirname, 'sub', 'serve.sock')
+            server = Server(path)
+            self.assertTrue(exists(path))
+            self.assertEqual(f'Server<{path}>', server.__repr__())
+
+            # can't have two
+            with self.assertRaises(ServerException) as ctx:
+                Server(path)
+            self.assertEqual(f'Already running on {path}', str(ctx.exception))
+
+            server.server_close()
+            self.assertFalse(exists(path))
+            # already gone is fine
+            server.server_close()
+
+            # stale socket, bound but nothing listening
+            with socket(AF_UNIX, SOCK_STREAM) as sock:
+                sock.bind(path)
+            self.assertTrue(exists(path))
+            server = Server(path)
+            server.server_close()
+
+    def test_idle_timeout(self):
+        with TemporaryDirectory() as td:
+            server = Server(join(td.dirname, 'serve.sock'))
+            # returns once nothing has come in for the timeout
+            server.serve(idle_timeout=0.01)
+            server.server_close()
+
+    def test_config(self):
+        config = Config(provider=None)
+        with TemporaryDirectory() as td:
+            server = Server(join(td.dirname, 'serve.sock'), config=config)
+            # serve's own config is used for matching args
+            self.assertIs(config, server.config({}))
+            # others are built once and then reused
+            other = server.config({'root': td.dirname})
+            self.assertIsNot(config, other)
+            self.assertEqual(td.dirname, other.root)
+            self.assertIs(other, server.config({'root': td.dirname}))
+
+            # and rebuilt when their config files change
+            with open(join(td.dirname, '.changelet.yaml'), 'w') as fh:
+                fh.write('directory: .cl\n')
+            changed = server.config({'root': td.dirname})
+            self.assertIsNot(other, changed)
+            self.assertEqual('.cl', changed.directory)
+            self.assertIs(changed, server.config({'root': td.dirname}))
+            server.server_close()
+
+    def test_execute_sees_version_changes(self):
+        with TemporaryDirectory() as td:
+            makedirs(join(td.dirname, 'mod'))
+            init = join(td.dirname, 'mod', '__init__.py')
+            makedirs(join(td.dirname, '.changelog'))
+            with open(join(td.dirname, '.changelog', 'a.md'), 'w') as fh:
+                fh.write('---\ntype: minor\npr: 1\n---\nchange\n')
+            with open(join(td.dirname, '.changelet.yaml'), 'w') as fh:
+                fh.write('cache_dir: false\n')
+            # bump reads & writes relative to the cwd, as the server does
+            self.addCleanup(chdir, getcwd())
+            chdir(td.dirname)
+            server = Server(join(td.dirname, 'serve.sock'))
+            self.addCleanup(server.server_close)
+            argv = ['changelet', '--module', 'mod', 'bump']
+
+            for current, expected in (('1.0.0', '1.1.0'), ('1.1.0', '1.2.0')):
+                with open(init, 'w') as fh:
+                    fh.write(f"__version__ = '{current}'\n")
+                with patch(
+                    'changelet.github.GitHubCli.pr_by_id'
+                ) as pr_mock, patch('changelet.github.GitHubCli.state'):
+                    pr_mock.return_value = None
+                    response = server.execute({'argv': argv, 'cwd': getcwd()})
+                self.assertEqual(0, response['code'], response['stderr'])
+                self.assertIn(
+                    f'New version number {expected}', response['stdout']
+                )
+
+    def test_refresh(self):
+        with TemporaryDirectory() as td:
+            directory = join(td.dirname, '.changelog')
+            provider = MagicMock()
+            config = Config(
+                directory=directory,
+                provider={'class': MagicMock(return_value=provider)},
+            )
+            server = Server(join(td.dirname, 'serve.sock'), config=config)
+            self.addCleanup(server.server_close)
+
+            # nothing there to start with
+            server.refresh(config)
+            server.refresh(config)
+            provider.reset.assert_not_called()
+
+            makedirs(directory)
+            with open(join(directory, 'abc.md'), 'w') as fh:
+                fh.write('---\ntype: none\n---\nabc\n')
+            with open(join(directory, 'README'), 'w') as fh:
+                fh.write('ignored')
+            server.refresh(config)
+            provider.reset.assert_called_once()
+
+            # unchanged
+            provider.reset.reset_mock()
+            server.refresh(config)
+            provider.reset.assert_not_called()
+
+            # providers w/o a reset are left alone
+            with open(join(directory, 'def.md'), 'w') as fh:
+                fh.write('---\ntype: none\n---\ndef\n')
+            server.refresh(
+                Config(
+                    directory=directory,
+                    provider={'class': MagicMock(return_value=object())},
+                )
+            )
+            server.server_close()
+
+    def test_execute(self):
+        with TemporaryDirectory() as td:
+            self.changelog(td.dirname)
+            server = Server(join(td.dirname, 'serve.sock'))
+            cwd = getcwd()
+
+            # a different project is declined
+            self.assertEqual(
+                {'code': None},
+                server.execute({'argv': ['changelet'], 'cwd': '/elsewhere'}),
+            )
+
+            argv = ['changelet', '--root', td.dirname, 'show']
+            with patch.dict(
+                'changelet.daemon.environ', {'CHANGELET_SERVER': 'server'}
+            ):
+                response = server.execute(
+                    {
+                        'argv': argv + ['1.0.0'],
+                        'cwd': cwd,
+                        'env': {'CHANGELET_THING': 'value'},
+                    }
+                )
+                # the server's environment is put back
+                self.assertEqual('server', environ['CHANGELET_SERVER'])
+                self.assertFalse('CHANGELET_THING' in environ)
+            self.assertEqual(
+                {
+                    'code': 0,
+                    'stdout': '## 1.0.0 - 2025-07-01\n\nMajor:\n* First\n',
+                    'stderr': '',
+                },
+                response,
+            )
+
+            # the command's exit code is passed along
+            response = server.execute({'argv': argv + ['9.9.9'], 'cwd': cwd})
+            self.assertEqual(1, response['code'])
+            self.assertEqual('', response['stdout'])
+            self.assertTrue(response['stderr'])
+
+            with patch('changelet.command.show.Show.run') as run_mock:
+                run_mock.side_effect = SystemExit()
+                response = server.execute(
+                    {'argv': argv + ['1.0.0'], 'cwd': cwd}
+                )
+                self.assertEqual(0, response['code'])
+
+                run_mock.side_effect = SystemExit('boom')
+                response = server.execute(
+                    {'argv': argv + ['1.0.0'], 'cwd': cwd}
+                )
+                self.assertEqual(
+                    {'code': 1, 'stdout': '', 'stderr': 'boom\n'}, response
+                )
+
+                run_mock.side_effect = Exception('kaboom')
+                response = server.execute(
+                    {'argv': argv + ['1.0.0'], 'cwd': cwd}
+                )
+                self.assertEqual(1, response['code'])
+                self.assertTrue('Exception: kaboom' in response['stderr'])
+
+            server.server_close()
+
+    def test_serve(self):
+        with TemporaryDirectory() as td:
+            self.changelog(td.dirname)
+            path = join(td.dirname, 'serve.sock')
+            server = Server(path)
+            thread = Thread(target=server.serve)
+            thread.start()
+            try:
+                response = request(
+                    path, ['changelet', '--root', td.dirname, 'show', '1.0.0']
+                )
+            finally:
+                server.shutdown()
+                thread.join()
+                server.server_close()
+            self.assertEqual(0, response['code'])
+            self.assertTrue(response['stdout'].startswith('## 1.0.0'))
@@ -10,6 +10,7 @@ from unittest import TestCase
 from helpers import TemporaryDirectory
 from yaml import safe_load
 
+from changelet import metrics
 from changelet.config import Config
 from changelet.entry import Entry, EntryType
 from changelet.pr import Pr
@@ -185,6 +186,80 @@ class TestEntry(TestCase):
             loaded = Entry.load_file(filename)
             self.assertEqual(description, loaded.description)
 
+    def test_parse_cache(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'cached.md')
+            Entry(type='patch', description='first', filename=filename).save()
+
+            active = metrics.start()
+            data, description = Entry._parse_file(filename)
+            self.assertEqual({'type': 'patch'}, data)
+            # callers get their own copy of data
+            data['pr'] = 42
+            self.assertEqual(
+                ({'type': 'patch'}, 'first\n'), Entry._parse_file(filename)
+            )
+            metrics.stop()
+            self.assertEqual(
+                1, active.get('changelet_cache_hits_total', cache='entry')
+            )
+            self.assertEqual(
+                1, active.get('changelet_cache_misses_total', cache='entry')
+            )
+
+            # changes are picked up
+            Entry(
+                type='minor', description='second one', filename=filename
+            ).save()
+            self.assertEqual(
+                ({'type': 'minor'}, 'second one\n'), Entry._parse_file(filename)
+            )
+
+    def test_front_matter(self):
+        # what changelet writes is handled w/o YAML
+        self.assertEqual(
+            {'type': 'minor', 'pr': 42},
+            Entry._front_matter('type: minor\npr: 42\n'),
+        )
+        self.assertEqual({'type': 'none'}, Entry._front_matter('type: none\n'))
+        # anything else isn't
+        for text in (
+            'type: "minor"\n',
+            'type: minor # comment\n',
+            'pr: 042\n',
+            'pr: -1\n',
+            'other: thing\n',
+            '{type: minor}\n',
+        ):
+            self.assertIsNone(Entry._front_matter(text), text)
+
+        # and falls back to YAML when parsing
+        self.assertEqual(
+            ({'type': 'minor', 'pr': 34}, 'Thing\n'),
+            Entry._parse('---\ntype: "minor"\npr: 042\n---\nThing\n'),
+        )
+        self.assertEqual(
+            ({'type': 'minor', 'pr': 42}, 'Thing\n'),
+            Entry._parse('---\ntype: minor\npr: 42\n---\nThing\n'),
+        )
+
+    def test_load_contents(self):
+        config = Config(provider={'class': DummyProvider})
+        entries = Entry.load_contents(
+            {
+                '.changelog/b.md': '---\ntype: minor\npr: 3\n---\nB\n',
+                '.changelog/a.md': '---\ntype: patch\n---\nA\n',
+                '.changelog/gone.md': None,
+            },
+            config,
+        )
+        self.assertEqual(
+            ['.changelog/a.md', '.changelog/b.md'],
+            [e.filename for e in entries],
+        )
+        self.assertEqual(['A', 'B'], [e.description for e in entries])
+        self.assertEqual(3, entries[1].pr.id)
+
     def test_load_all(self):
         provider = DummyProvider()
 
@@ -3,18 +3,70 @@
 #
 
 from json import dumps
+from subprocess import PIPE, CalledProcessError
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import call, patch
 
-from changelet.github import GitHubCli
+from changelet import metrics, timings, trace
+from changelet.github import GitHubCli, run
 
 
 class TestGitHubCli(TestCase):
 
     class ResultMock:
 
-        def __init__(self, stdout):
+        def __init__(self, stdout, returncode=0):
             self.stdout = stdout
+            self.returncode = returncode
+
+    @patch('changelet.github.subprocess_run')
+    def test_run_timed(self, subprocess_run_mock):
+        active = timings.start()
+        try:
+            run(['git', 'status'], check=True)
+        finally:
+            timings.stop()
+        subprocess_run_mock.assert_called_once_with(
+            ['git', 'status'], check=True
+        )
+        self.assertEqual(1, active.commands['git status'][0])
+
+    @patch('changelet.github.subprocess_run')
+    def test_run_traced(self, subprocess_run_mock):
+        subprocess_run_mock.side_effect = [
+            self.ResultMock(b'abc'),
+            self.ResultMock(None, returncode=1),
+            CalledProcessError(128, ['git', 'push']),
+        ]
+        tracer = trace.start()
+        try:
+            run(['git', 'diff', '--name-only'], stdout=PIPE)
+            run(['git', 'diff', '--quiet'])
+            with self.assertRaises(CalledProcessError):
+                run(['git', 'push'], check=True)
+        finally:
+            trace.stop()
+        spans = tracer.spans
+        self.assertEqual(
+            ['git diff', 'git diff', 'git push'], [s.name for s in spans]
+        )
+        self.assertEqual(
+            {
+                'process.command_line': 'git diff --name-only',
+                'process.exit.code': 0,
+                'changelet.output.size': 3,
+            },
+            spans[0].attributes,
+        )
+        self.assertEqual(
+            {
+                'process.command_line': 'git diff --quiet',
+                'process.exit.code': 1,
+            },
+            spans[1].attributes,
+        )
+        self.assertEqual(128, spans[2].attributes['process.exit.code'])
+        self.assertEqual(trace.STATUS_ERROR, spans[2].status)
 
     def test_repr(self):
         # smoke
@@ -23,16 +75,54 @@ class TestGitHubCli(TestCase):
     def test_pr_by_id(self):
         gh = GitHubCli()
         # pre-fill the cache
-        gh._prs = {42: 'pr'}
+        gh._prs = {'.changelog': {42: 'pr'}}
         self.assertEqual(
             'pr', gh.pr_by_id(root='', directory='.changelog', id=42)
         )
         self.assertIsNone(gh.pr_by_id(root='', directory='.changelog', id=43))
 
+    @patch('changelet.github.subprocess_run')
+    def test_metrics(self, subprocess_run_mock):
+        subprocess_run_mock.return_value = self.ResultMock(b'{"a": 1}')
+        gh = GitHubCli()
+        gh._prs = {'.changelog': {42: 'pr'}}
+        active = metrics.start()
+        try:
+            gh._run(['gh', 'api', 'thing'])
+            run(['git', 'status'])
+            gh.pr_by_id(root='', directory='.changelog', id=42)
+            gh.pr_by_id(root='', directory='.changelog', id=43)
+            gh.pr_by_filename(root='', directory='.changelog', filename='x.md')
+        finally:
+            metrics.stop()
+        self.assertEqual(
+            1, active.get('changelet_subprocesses_total', tool='gh')
+        )
+        self.assertEqual(
+            1, active.get('changelet_subprocesses_total', tool='git')
+        )
+        self.assertEqual(1, active.get('changelet_github_calls_total'))
+        self.assertEqual(8, active.get('changelet_json_bytes_parsed_total'))
+        self.assertEqual(2, active.get('changelet_pr_lookups_total', by='id'))
+        self.assertEqual(
+            1, active.get('changelet_pr_lookup_misses_total', by='id')
+        )
+        self.assertEqual(
+            1, active.get('changelet_pr_lookup_misses_total', by='filename')
+        )
+
+    def test_reset(self):
+        gh = GitHubCli()
+        gh._merged_prs = []
+        gh._prs = {'.changelog': {42: 'pr'}}
+        gh.reset()
+        self.assertIsNone(gh._merged_prs)
+        self.assertEqual({}, gh._prs)
+
     def test_pr_by_filename(self):
         gh = GitHubCli()
         # pre-fill the cache
-        gh._prs = {'.changelog/abc123.md': 'pr'}
+        gh._prs = {'.changelog': {'.changelog/abc123.md': 'pr'}}
         self.assertEqual(
             'pr',
             gh.pr_by_filename(
@@ -149,15 +239,73 @@ class TestGitHubCli(TestCase):
         self.assertEqual('43', pr.id)
         run_mock.assert_not_called()
 
+        # other directories get their own index from the same fetch
+        prs = gh.prs(root='', directory='.changelog-extra')
+        self.assertEqual(['.changelog-extra/something.md', '44'], sorted(prs))
+        self.assertIsNot(prs, gh.prs(root='', directory='.changelog'))
+        run_mock.assert_not_called()
+
+    @patch('changelet.github.run')
+    def test_state(self, run_mock):
+        gh = GitHubCli(base_branch='develop')
+        run_mock.return_value = self.ResultMock('head\nbase\n')
+        self.assertEqual('head base', gh.state())
+        run_mock.assert_called_once_with(
+            ['git', 'rev-parse', 'HEAD', 'origin/develop'],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+        # base doesn't exist
+        run_mock.return_value = self.ResultMock('head\n', returncode=128)
+        self.assertIsNone(gh.state())
+
     @patch('changelet.github.run')
     def test_changelog_entries_in_branch_base_branch(self, run_mock):
         gh = GitHubCli(base_branch='develop')
 
-        run_mock.return_value = self.ResultMock(b'.foobar/blip.md')
-        gh.changelog_entries_in_branch(root='', directory='.foobar')
-        run_mock.assert_called_once()
-        args = run_mock.call_args[0][0]
-        self.assertEqual(['git', 'diff', '--name-only', 'origin/develop'], args)
+        # w/o a merge base the diff is against base itself
+        run_mock.side_effect = [
+            self.ResultMock(b'', returncode=1),
+            self.ResultMock(b'.foobar/blip.md'),
+        ]
+        self.assertEqual(
+            {'.foobar/blip.md'},
+            gh.changelog_entries_in_branch(root='', directory='.foobar'),
+        )
+        self.assertEqual(
+            [
+                call(
+                    [
+                        'git',
+                        'diff',
+                        '--name-only',
+                        '--diff-filter=A',
+                        '--merge-base',
+                        'origin/develop',
+                        '--',
+                        '.foobar/',
+                    ],
+                    check=False,
+                    stdout=PIPE,
+                ),
+                call(
+                    [
+                        'git',
+                        'diff',
+                        '--name-only',
+                        '--diff-filter=A',
+                        'origin/develop',
+                        '--',
+                        '.foobar/',
+                    ],
+                    check=False,
+                    stdout=PIPE,
+                ),
+            ],
+            run_mock.call_args_list,
+        )
 
     @patch('changelet.github.run')
     def test_changelog_entries_in_branch(self, run_mock):
@@ -165,24 +313,30 @@ class TestGitHubCli(TestCase):
 
         directory = '.foobar'
 
-        # no directory
-        run_mock.reset_mock()
-        self.assertEqual(
-            set(), gh.changelog_entries_in_branch(root='', directory=directory)
-        )
-        run_mock.assert_called_once()
-
         # no changes
-        run_mock.reset_mock()
         run_mock.return_value = self.ResultMock(b'')
         self.assertEqual(
             set(), gh.changelog_entries_in_branch(root='', directory=directory)
         )
-        run_mock.assert_called_once()
+        # a single process, git finds the merge base itself
+        run_mock.assert_called_once_with(
+            [
+                'git',
+                'diff',
+                '--name-only',
+                '--diff-filter=A',
+                '--merge-base',
+                'origin/main',
+                '--',
+                '.foobar/',
+            ],
+            check=False,
+            stdout=PIPE,
+        )
 
-        # non changelog changes
+        # non-entry additions
         run_mock.reset_mock()
-        run_mock.return_value = self.ResultMock(b'foo/bar.py')
+        run_mock.return_value = self.ResultMock(b'.foobar/README')
         self.assertEqual(
             set(), gh.changelog_entries_in_branch(root='', directory=directory)
         )
@@ -191,21 +345,10 @@ class TestGitHubCli(TestCase):
         # changelog changes
         run_mock.reset_mock()
         run_mock.return_value = self.ResultMock(
-            b'foo/bar.py\n.foobar/blip.md\nother.txt'
+            b'.foobar/blip.md\n.foobar/blop.md\n'
         )
         self.assertEqual(
-            {'.foobar/blip.md'},
-            gh.changelog_entries_in_branch(root='', directory=directory),
-        )
-        run_mock.assert_called_once()
-
-        # prefix match should not include files from similar directories
-        run_mock.reset_mock()
-        run_mock.return_value = self.ResultMock(
-            b'.foobar/blip.md\n.foobar-extra/blip.md'
-        )
-        self.assertEqual(
-            {'.foobar/blip.md'},
+            {'.foobar/blip.md', '.foobar/blop.md'},
             gh.changelog_entries_in_branch(root='', directory=directory),
         )
         run_mock.assert_called_once()
@@ -259,6 +402,50 @@ class TestGitHubCli(TestCase):
         args = run_mock.call_args[0][0]
         self.assertEqual(['git', 'add', filename], args)
 
+    @patch('changelet.github.environ')
+    @patch('changelet.github.run')
+    def test_add_files(self, run_mock, environ_mock):
+        gh = GitHubCli()
+        environ_mock.get.return_value = ''
+
+        # nothing to do
+        gh.add_files([])
+        run_mock.assert_not_called()
+
+        # all of the files in a single call
+        filenames = ['CHANGELOG.md', 'mod/__init__.py', '.changelog/a.md']
+        gh.add_files(filenames)
+        run_mock.assert_called_once_with(['git', 'add'] + filenames, check=True)
+
+        # generators work too and extra args are honored
+        run_mock.reset_mock()
+        environ_mock.get.return_value = '--force'
+        gh.add_files(f for f in filenames)
+        run_mock.assert_called_once_with(
+            ['git', 'add', '--force'] + filenames, check=True
+        )
+
+        # long lists go through stdin rather than argv
+        run_mock.reset_mock()
+        filenames = [f'.changelog/{i:032d}.md' for i in range(2000)]
+        gh.add_files(filenames)
+        run_mock.assert_called_once()
+        args = run_mock.call_args[0][0]
+        self.assertEqual(
+            [
+                'git',
+                'add',
+                '--force',
+                '--pathspec-from-file=-',
+                '--pathspec-file-nul',
+            ],
+            args,
+        )
+        self.assertEqual(
+            '\0'.join(filenames).encode('utf-8'),
+            run_mock.call_args.kwargs['input'],
+        )
+
     @patch('changelet.github.run')
     def test_has_staged(self, run_mock):
         gh = GitHubCli()
@@ -331,9 +518,12 @@ class TestGitHubCli(TestCase):
 
         run_mock.reset_mock()
         gh.commit(description)
-        run_mock.assert_called_once()
-        args = run_mock.call_args[0][0]
-        self.assertTrue(description in args)
+        run_mock.assert_called_once_with(
+            ['git', 'commit', '--file', '-'],
+            check=True,
+            input=description,
+            text=True,
+        )
 
     @patch('changelet.github.run')
     def test_current_branch(self, run_mock):
@@ -406,13 +596,16 @@ class TestGitHubCli(TestCase):
                 'create',
                 '--title',
                 'My Title',
-                '--body',
-                'My Body',
+                '--body-file',
+                '-',
                 '--assignee',
                 '@me',
             ],
             args,
         )
+        # the body is streamed through stdin, not argv
+        self.assertEqual('My Body', run_mock.call_args.kwargs['input'])
+        self.assertTrue(run_mock.call_args.kwargs['text'])
 
     @patch('changelet.github.environ')
     @patch('changelet.github.run')
@@ -426,9 +619,7 @@ class TestGitHubCli(TestCase):
         gh.commit(description)
         run_mock.assert_called_once()
         args = run_mock.call_args[0][0]
-        self.assertEqual(
-            ['git', 'commit', '--no-verify', '--message', description], args
-        )
+        self.assertEqual(['git', 'commit', '--no-verify', '--file', '-'], args)
 
         # Test with multiple extra arguments
         run_mock.reset_mock()
@@ -437,15 +628,7 @@ class TestGitHubCli(TestCase):
         run_mock.assert_called_once()
         args = run_mock.call_args[0][0]
         self.assertEqual(
-            [
-                'git',
-                'commit',
-                '--no-verify',
-                '--signoff',
-                '--message',
-                description,
-            ],
-            args,
+            ['git', 'commit', '--no-verify', '--signoff', '--file', '-'], args
         )
 
         # Test with quoted arguments
@@ -462,11 +645,12 @@ class TestGitHubCli(TestCase):
                 'commit',
                 '--no-verify',
                 '--author=John Doe <john@example.com>',
-                '--message',
-                description,
+                '--file',
+                '-',
             ],
             args,
         )
+        self.assertEqual(description, run_mock.call_args.kwargs['input'])
 
         # Test with empty string
         run_mock.reset_mock()
@@ -474,7 +658,7 @@ class TestGitHubCli(TestCase):
         gh.commit(description)
         run_mock.assert_called_once()
         args = run_mock.call_args[0][0]
-        self.assertEqual(['git', 'commit', '--message', description], args)
+        self.assertEqual(['git', 'commit', '--file', '-'], args)
 
         # Test with whitespace only
         run_mock.reset_mock()
@@ -482,4 +666,318 @@ class TestGitHubCli(TestCase):
         gh.commit(description)
         run_mock.assert_called_once()
         args = run_mock.call_args[0][0]
-        self.assertEqual(['git', 'commit', '--message', description], args)
+        self.assertEqual(['git', 'commit', '--file', '-'], args)
+
+    @patch('changelet.github.Popen')
+    def test_log(self, popen_mock):
+        proc = popen_mock.return_value.__enter__.return_value
+        proc.stdout = iter(
+            [
+                '\x1eaaa\0feat: thing (#3)\0\n',
+                '\x1ebbb\0fix!: other\0Some body\n',
+                'BREAKING CHANGE: yes\n',
+                '\n',
+            ]
+        )
+        proc.returncode = 0
+        gh = GitHubCli()
+        self.assertEqual(
+            [
+                ('aaa', 'feat: thing (#3)', ''),
+                ('bbb', 'fix!: other', 'Some body\nBREAKING CHANGE: yes'),
+            ],
+            list(gh.commits('v1.0.0')),
+        )
+        popen_mock.assert_called_once_with(
+            [
+                'git',
+                'log',
+                '--no-merges',
+                '--format=%x1e%H%x00%s%x00%b',
+                'v1.0.0..HEAD',
+            ],
+            stdout=PIPE,
+            text=True,
+        )
+
+        # nothing
+        proc.stdout = iter([])
+        self.assertEqual([], list(gh.commits('v1.0.0')))
+
+        # failure
+        proc.stdout = iter([])
+        proc.returncode = 128
+        with self.assertRaises(CalledProcessError):
+            list(gh.commits('nope'))
+
+    @patch('changelet.github.run')
+    def test_ls_tree(self, run_mock):
+        run_mock.return_value = self.ResultMock(b'.cl/a.md\0.cl/b.md\0')
+        gh = GitHubCli()
+        self.assertEqual(['.cl/a.md', '.cl/b.md'], gh.ls_tree('main', '.cl'))
+        run_mock.assert_called_once_with(
+            ['git', 'ls-tree', '-z', '--name-only', 'main', '--', '.cl/'],
+            check=True,
+            capture_output=True,
+        )
+
+    @patch('changelet.github.run')
+    def test_cat_files(self, run_mock):
+        gh = GitHubCli()
+        # nothing asked for, nothing run
+        self.assertEqual({}, gh.cat_files('main', []))
+        run_mock.assert_not_called()
+
+        run_mock.return_value = self.ResultMock(
+            b'aaa blob 6\nfirst\n\n'
+            b'main:./.cl/missing.md missing\n'
+            b'bbb blob 8\nse\xc3\xa7ond\n\n'
+        )
+        self.assertEqual(
+            {
+                '.cl/a.md': 'first\n',
+                '.cl/missing.md': None,
+                '.cl/b.md': 'se\xe7ond\n',
+            },
+            gh.cat_files('main', ['.cl/a.md', '.cl/missing.md', '.cl/b.md']),
+        )
+        run_mock.assert_called_once_with(
+            ['git', 'cat-file', '--batch'],
+            check=True,
+            capture_output=True,
+            input=b'main:./.cl/a.md\nmain:./.cl/missing.md\nmain:./.cl/b.md\n',
+        )
+
+    @patch('changelet.github.run')
+    def test_index(self, run_mock):
+        gh = GitHubCli(repo='org/repo')
+
+        run_mock.return_value = self.ResultMock(
+            dumps(
+                [
+                    {
+                        'files': [
+                            {'path': 'one/.changelog/a.md'},
+                            {'path': 'two/.changelog/b.md'},
+                        ],
+                        'mergedAt': '2025-07-01T10:42',
+                        'number': 42,
+                    },
+                    {
+                        'files': [
+                            {'path': 'one/.changelog/nested/c.md'},
+                            {'path': 'one/src/thing.py'},
+                        ],
+                        'mergedAt': '2025-07-02T10:42',
+                        'number': 43,
+                    },
+                ]
+            )
+        )
+        indexes = gh.index(
+            root='', directories=['one/.changelog', 'two/.changelog', 'three']
+        )
+        # a single fetch
+        run_mock.assert_called_once()
+        self.assertEqual(
+            {
+                'one/.changelog': [42, 'one/.changelog/a.md'],
+                'two/.changelog': [42, 'two/.changelog/b.md'],
+                'three': [],
+            },
+            {d: sorted(i, key=str) for d, i in indexes.items()},
+        )
+        # the same pr object is shared
+        self.assertIs(
+            indexes['one/.changelog'][42], indexes['two/.changelog'][42]
+        )
+
+        # existing indexes are reused, new ones built from the same fetch
+        run_mock.reset_mock()
+        self.assertIs(
+            indexes['one/.changelog'],
+            gh.prs(root='', directory='one/.changelog'),
+        )
+        self.assertEqual(
+            [43, 'one/.changelog/nested/c.md'],
+            sorted(gh.prs(root='', directory='one/.changelog/nested'), key=str),
+        )
+        run_mock.assert_not_called()
+
+        # unnormalized directories & filenames, e.g. from `-r .`, match gh's
+        self.assertIs(
+            indexes['one/.changelog'],
+            gh.prs(root='.', directory='./one/.changelog'),
+        )
+        self.assertEqual(
+            42,
+            gh.pr_by_filename(
+                root='.',
+                directory='./one/.changelog',
+                filename='./one/.changelog/a.md',
+            ).id,
+        )
+        run_mock.assert_not_called()
+
+    @patch('changelet.github.run')
+    def test_changed_files(self, run_mock):
+        gh = GitHubCli()
+        run_mock.return_value = self.ResultMock(
+            b'M\0src/a.py\0A\0.changelog/b.md\0D\0c.txt\0'
+        )
+        self.assertEqual(
+            {'src/a.py': 'M', '.changelog/b.md': 'A', 'c.txt': 'D'},
+            gh.changed_files(),
+        )
+        run_mock.assert_called_once_with(
+            [
+                'git',
+                'diff',
+                '--name-status',
+                '--no-renames',
+                '-z',
+                '--merge-base',
+                'origin/main',
+            ],
+            check=False,
+            stdout=PIPE,
+        )
+
+        run_mock.return_value = self.ResultMock(b'')
+        self.assertEqual({}, gh.changed_files())
+
+    @patch('changelet.github.run')
+    def test_pr_files(self, run_mock):
+        run_mock.return_value = self.ResultMock(
+            b'{"filename":"a.py","status":"modified"}\n'
+            b'{"filename":".changelog/b.md","status":"added"}\n'
+        )
+        gh = GitHubCli()
+        self.assertEqual(
+            [
+                {'filename': 'a.py', 'status': 'modified'},
+                {'filename': '.changelog/b.md', 'status': 'added'},
+            ],
+            gh.pr_files(42),
+        )
+        run_mock.assert_called_once_with(
+            [
+                'gh',
+                'api',
+                '--paginate',
+                'repos/{owner}/{repo}/pulls/42/files',
+                '--jq',
+                '.[] | {filename, status}',
+            ],
+            check=True,
+            stdout=PIPE,
+        )
+
+        # explicit repo, or the configured one
+        run_mock.reset_mock()
+        gh.pr_files(42, repo='org/other')
+        self.assertEqual(
+            'repos/org/other/pulls/42/files', run_mock.call_args[0][0][3]
+        )
+        run_mock.reset_mock()
+        GitHubCli(repo='org/repo').pr_files(42)
+        self.assertEqual(
+            'repos/org/repo/pulls/42/files', run_mock.call_args[0][0][3]
+        )
+
+    @patch('changelet.github.Popen')
+    @patch('changelet.github.run')
+    def test_changelog_entries_in_refs(self, run_mock, popen_mock):
+        gh = GitHubCli()
+        shas = {
+            'origin/main^{commit}': 'base',
+            'one^{commit}': 'aaa',
+            'also-one^{commit}': 'aaa',
+            'two^{commit}': 'bbb',
+            'three^{commit}': 'ccc',
+        }
+        merge_bases = {('aaa', 'base'): 'fork', ('bbb', 'base'): 'fork'}
+
+        def run_side_effect(cmd, **kwargs):
+            if cmd[1] == 'rev-parse':
+                sha = shas.get(cmd[2])
+                return self.ResultMock(sha or '', returncode=0 if sha else 128)
+            # merge-base
+            mb = merge_bases.get(tuple(cmd[2:]))
+            return self.ResultMock(mb or '', returncode=0 if mb else 1)
+
+        run_mock.side_effect = run_side_effect
+        proc = popen_mock.return_value.__enter__.return_value
+        proc.communicate.return_value = (
+            b'aaa\0A\0.changelog/a.md\0A\0.changelog/sub/b.md\0'
+            b'A\0.changelog/c.txt\0A\0pkg/.changelog/d.md\0'
+            b'ccc\0A\0other/e.md\0',
+            None,
+        )
+        proc.returncode = 0
+
+        self.assertEqual(
+            {
+                'one': {'.changelog/a.md', 'pkg/.changelog/d.md'},
+                'also-one': {'.changelog/a.md', 'pkg/.changelog/d.md'},
+                'two': set(),
+                'three': set(),
+                'nope': None,
+            },
+            gh.changelog_entries_in_refs(
+                root='.',
+                directories=['pkg/.changelog', '.changelog'],
+                refs=['one', 'also-one', 'two', 'three', 'nope'],
+                max_workers=2,
+            ),
+        )
+        # a single diff-tree session for all of them
+        popen_mock.assert_called_once_with(
+            [
+                'git',
+                'diff-tree',
+                '--stdin',
+                '-r',
+                '-z',
+                '--name-status',
+                '--diff-filter=A',
+                '--',
+                '.changelog/',
+                'pkg/.changelog/',
+            ],
+            stdin=PIPE,
+            stdout=PIPE,
+        )
+        # commits are only diffed once, w/o a merge base base itself is used
+        queries = proc.communicate.call_args[0][0].decode('utf-8')
+        self.assertEqual(
+            ['aaa fork', 'bbb fork', 'ccc base'],
+            sorted(queries.split('\n')[:-1]),
+        )
+        # merge bases are cached per pair of commits
+        self.assertEqual(
+            {
+                ('aaa', 'base'): 'fork',
+                ('bbb', 'base'): 'fork',
+                ('ccc', 'base'): None,
+            },
+            gh._merge_bases,
+        )
+
+        # diff-tree failing
+        proc.returncode = 128
+        with self.assertRaises(CalledProcessError):
+            gh.changelog_entries_in_refs(
+                root='.', directories=['.changelog'], refs=['one']
+            )
+
+        # base can't be resolved, nothing can be compared
+        del shas['origin/main^{commit}']
+        popen_mock.reset_mock()
+        self.assertEqual(
+            {'one': None},
+            gh.changelog_entries_in_refs(
+                root='.', directories=['.changelog'], refs=['one']
+            ),
+        )
+        popen_mock.assert_not_called()
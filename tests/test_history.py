@@ -0,0 +1,170 @@
+#
+#
+#
+
+from os import listdir, utime
+from os.path import join
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers import TemporaryDirectory
+
+from changelet.history import ChangelogIndex
+
+CHANGELOG = '''## v1.1.0 - 2025-08-01 - Has a Title
+
+Minor:
+* Added the thing - [#3](https://github.com/org/repo/pull/3)
+
+## 1.0.1 - 2025-07-15
+
+Patch:
+* Fixed the thing
+
+### Not a release - 2025-07-14
+
+## 1.0.0 - 2025-07-01
+
+Major:
+* First release
+'''
+
+
+class TestChangelogIndex(TestCase):
+
+    def setUp(self):
+        ChangelogIndex._cache.clear()
+
+    def test_repr(self):
+        # smoke
+        index = ChangelogIndex('CHANGELOG.md', [])
+        index.__repr__()
+        ChangelogIndex.load('CHANGELOG.md').latest.__repr__()
+
+    def test_missing_and_empty(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'CHANGELOG.md')
+
+            index = ChangelogIndex.load(filename)
+            self.assertEqual(0, len(index))
+            self.assertIsNone(index.latest)
+            self.assertIsNone(index.get('1.0.0'))
+            self.assertIsNone(index.read('1.0.0'))
+
+            with open(filename, 'w'):
+                pass
+            index = ChangelogIndex.load(filename)
+            self.assertEqual([], list(index))
+            self.assertIsNone(index.latest)
+
+    def test_index(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'CHANGELOG.md')
+            with open(filename, 'w') as fh:
+                fh.write(CHANGELOG)
+
+            index = ChangelogIndex.load(filename)
+            self.assertEqual(3, len(index))
+            self.assertEqual(
+                [
+                    ('v1.1.0', '2025-08-01', 'Has a Title'),
+                    ('1.0.1', '2025-07-15', None),
+                    ('1.0.0', '2025-07-01', None),
+                ],
+                [(s.version, s.date, s.title) for s in index],
+            )
+            latest = index.latest
+            self.assertEqual('v1.1.0', latest.version)
+            self.assertEqual('2025-08-01', latest.date)
+
+            # v prefix is optional in either direction
+            self.assertIs(latest, index.get('1.1.0'))
+            self.assertIs(index.get('1.0.0'), index.get('v1.0.0'))
+            self.assertIsNone(index.get('2.0.0'))
+
+            self.assertEqual(
+                '''## 1.0.1 - 2025-07-15
+
+Patch:
+* Fixed the thing
+
+### Not a release - 2025-07-14
+
+''',
+                index.read('1.0.1'),
+            )
+            # last section runs to the end of the file
+            self.assertEqual(
+                '## 1.0.0 - 2025-07-01\n\nMajor:\n* First release\n',
+                index.read('1.0.0'),
+            )
+            self.assertIsNone(index.read('0.0.1'))
+
+    def test_cache(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'CHANGELOG.md')
+            with open(filename, 'w') as fh:
+                fh.write(CHANGELOG)
+
+            index = ChangelogIndex.load(filename)
+            # unchanged file, cached index
+            self.assertIs(index, ChangelogIndex.load(filename))
+
+            # modified file, index is rebuilt
+            with open(filename, 'w') as fh:
+                fh.write('## 2.0.0 - 2025-09-01\n\n')
+                fh.write(CHANGELOG)
+            utime(filename, ns=(0, 0))
+            updated = ChangelogIndex.load(filename)
+            self.assertIsNot(index, updated)
+            self.assertEqual(4, len(updated))
+            self.assertEqual('2.0.0', updated.latest.version)
+
+    def test_stored(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'CHANGELOG.md')
+            cache_dir = join(td.dirname, 'cache')
+            with open(filename, 'w') as fh:
+                fh.write(CHANGELOG)
+
+            index = ChangelogIndex.load(filename, cache_dir=cache_dir)
+            self.assertEqual(1, len(listdir(cache_dir)))
+
+            # another process, nothing in memory, uses the stored offsets
+            ChangelogIndex._cache.clear()
+            with patch('changelet.history.ChangelogIndex._scan') as scan_mock:
+                stored = ChangelogIndex.load(filename, cache_dir=cache_dir)
+            scan_mock.assert_not_called()
+            self.assertEqual(
+                [(s.version, s.date, s.title, s.start, s.end) for s in index],
+                [(s.version, s.date, s.title, s.start, s.end) for s in stored],
+            )
+            self.assertEqual(index.read('1.0.1'), stored.read('1.0.1'))
+
+            # a changed file is rescanned
+            with open(filename, 'w') as fh:
+                fh.write('## 2.0.0 - 2025-09-01\n\n')
+                fh.write(CHANGELOG)
+            ChangelogIndex._cache.clear()
+            updated = ChangelogIndex.load(filename, cache_dir=cache_dir)
+            self.assertEqual('2.0.0', updated.latest.version)
+
+            # as is unusable stored data
+            (name,) = listdir(cache_dir)
+            with open(join(cache_dir, name), 'w') as fh:
+                fh.write('[]')
+            ChangelogIndex._cache.clear()
+            self.assertEqual(
+                4, len(ChangelogIndex.load(filename, cache_dir=cache_dir))
+            )
+
+            # an unwritable cache dir is scanned every time, but never fails
+            blocker = join(td.dirname, 'blocker')
+            with open(blocker, 'w') as fh:
+                fh.write('')
+            ChangelogIndex._cache.clear()
+            index = ChangelogIndex.load(
+                filename, cache_dir=join(blocker, 'cache')
+            )
+            self.assertEqual('2.0.0', index.latest.version)
+            self.assertEqual(4, len(index))
@@ -0,0 +1,103 @@
+#
+#
+#
+
+from os import makedirs
+from os.path import join
+from unittest import TestCase
+
+from helpers import TemporaryDirectory
+
+from changelet.entry import Entry
+from changelet.lint import LintError, lint, lint_file, lint_text
+
+
+class TestLint(TestCase):
+
+    def assertLint(self, expected, text):
+        self.assertEqual(
+            expected, [(e.line, e.message) for e in lint_text('x.md', text)]
+        )
+
+    def test_lint_error(self):
+        error = LintError('a.md', 3, 'Bad')
+        self.assertEqual('a.md:3: Bad', str(error))
+        self.assertEqual('LintError<a.md:3: Bad>', repr(error))
+        self.assertEqual(LintError('a.md', 3, 'Bad'), error)
+        self.assertLess(error, LintError('a.md', 4, 'Bad'))
+        self.assertLess(error, LintError('b.md', 1, 'Bad'))
+
+    def test_lint_text(self):
+        # good, fast path and YAML
+        self.assertLint([], '---\ntype: minor\npr: 42\n---\nThing\n')
+        self.assertLint([], '---\ntype: "minor"  # quoted\n---\nThing\n')
+
+        self.assertLint(
+            [(1, 'Missing front matter, expected ---')], 'type: minor\n'
+        )
+        self.assertLint(
+            [(1, 'Unterminated front matter')], '---\ntype: minor\n'
+        )
+        self.assertLint(
+            [(3, 'Invalid front matter, mapping values are not allowed here')],
+            '---\ntype: minor\npr: a: b\n---\nThing\n',
+        )
+        self.assertLint(
+            [(2, 'Front matter must be a mapping')],
+            '---\n- minor\n---\nThing\n',
+        )
+        self.assertLint([(1, 'Missing type')], '---\npr: 1\n---\nThing\n')
+        self.assertLint([(1, 'Missing type')], '---\n---\nThing\n')
+        # all of the problems are reported
+        self.assertLint(
+            [
+                (
+                    3,
+                    'Invalid type "huge", expected one of none, patch, '
+                    'minor, major',
+                ),
+                (2, 'Invalid pr "True", expected a number'),
+                (5, 'Empty description'),
+            ],
+            '---\npr: yes\ntype: huge\n---\n  \n',
+        )
+        # flow style has no line per key
+        self.assertLint(
+            [
+                (
+                    2,
+                    'Invalid type "huge", expected one of none, patch, minor, major',
+                )
+            ],
+            '---\n{type: huge}\n---\nThing\n',
+        )
+
+    def test_lint(self):
+        with TemporaryDirectory() as td:
+            one = join(td.dirname, 'one')
+            two = join(td.dirname, 'two')
+            Entry(
+                type='patch', description='good', filename=join(one, 'a.md')
+            ).save()
+            makedirs(two)
+            with open(join(two, 'b.md'), 'w') as fh:
+                fh.write('---\ntype: patch\n---\n')
+            with open(join(two, 'c.md'), 'wb') as fh:
+                fh.write(b'\xff\xfe')
+            with open(join(two, 'ignored.txt'), 'w') as fh:
+                fh.write('whatever')
+
+            errors = lint(
+                [two, one, join(td.dirname, 'missing')], max_workers=2
+            )
+            self.assertEqual(
+                [(join(two, 'b.md'), 4), (join(two, 'c.md'), 1)],
+                [(e.filename, e.line) for e in errors],
+            )
+            self.assertTrue(errors[1].message.startswith('Unreadable, '))
+
+            self.assertEqual([], lint([one]))
+            self.assertEqual(
+                'Unreadable, ',
+                lint_file(join(td.dirname, 'nope.md'))[0].message[:12],
+            )
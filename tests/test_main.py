@@ -4,10 +4,18 @@
 
 import logging
 from argparse import ArgumentError
-from sys import version_info
+from io import StringIO
+from json import load
+from os.path import dirname, join
+from pstats import Stats
+from subprocess import run
+from sys import executable, version_info
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+from helpers import TemporaryDirectory
+
+from changelet.command import Commands
 from changelet.config import Config
 from changelet.main import main
 
@@ -90,3 +98,221 @@ class TestMain(TestCase):
         with patch('logging.basicConfig') as basicConfig_mock:
             main(['e*e', '--logging', 'INFO', 'check'], exit_on_error=False)
             basicConfig_mock.assert_called_once_with(level=logging.INFO)
+
+    @patch('changelet.main.forward')
+    def test_forwarded(self, forward_mock):
+        forward_mock.return_value = {
+            'code': 2,
+            'stdout': 'out',
+            'stderr': 'err',
+        }
+        with patch('changelet.command.check.Check.run') as run_mock, patch(
+            'sys.stdout'
+        ) as stdout_mock, patch('sys.stderr') as stderr_mock:
+            with self.assertRaises(SystemExit) as ctx:
+                main(['e*e', 'check'], exit_on_error=False)
+        self.assertEqual(2, ctx.exception.code)
+        stdout_mock.write.assert_called_once_with('out')
+        stderr_mock.write.assert_called_once_with('err')
+        # never run locally
+        run_mock.assert_not_called()
+
+    @patch('changelet.main.forward')
+    def test_timings_and_profile(self, forward_mock):
+        with TemporaryDirectory() as td:
+            profile = join(td.dirname, 'changelet.prof')
+            with patch('changelet.command.check.exit') as exit_mock, patch(
+                'sys.stderr', new_callable=StringIO
+            ) as stderr:
+                main(
+                    ['e*e', '--timings', '--profile', profile, 'check'],
+                    exit_on_error=False,
+                )
+            exit_mock.assert_called_once()
+            # measured runs are always local
+            forward_mock.assert_not_called()
+            report = stderr.getvalue()
+            self.assertIn('\nconfig ', report)
+            self.assertIn('\nrun ', report)
+            self.assertIn('\nTotal ', report)
+            # stats that pstats can read
+            self.assertTrue(Stats(profile).total_calls)
+
+            # traced
+            filename = join(td.dirname, 'trace.json')
+            with patch('changelet.command.check.exit'):
+                main(['e*e', '--trace', filename, 'check'], exit_on_error=False)
+            forward_mock.assert_not_called()
+            with open(filename) as fh:
+                spans = load(fh)['resourceSpans'][0]['scopeSpans'][0]['spans']
+            self.assertEqual(
+                ['changelet check', 'config'], [s['name'] for s in spans[:2]]
+            )
+            # everything is under the root
+            self.assertNotIn('parentSpanId', spans[0])
+            self.assertEqual(
+                {spans[0]['spanId']}, {s['parentSpanId'] for s in spans[1:2]}
+            )
+
+            # metrics
+            filename = join(td.dirname, 'changelet.prom')
+            with patch('changelet.command.check.exit'):
+                main(
+                    ['e*e', '--metrics', filename, 'check'], exit_on_error=False
+                )
+            forward_mock.assert_not_called()
+            with open(filename) as fh:
+                self.assertIn(
+                    'changelet_subprocesses_total{tool="git"}', fh.read()
+                )
+
+            # reported even when the command exits
+            with patch(
+                'changelet.command.check.exit', side_effect=SystemExit(1)
+            ), patch('sys.stderr', new_callable=StringIO) as stderr:
+                with self.assertRaises(SystemExit):
+                    main(['e*e', '--timings', 'check'], exit_on_error=False)
+            self.assertIn('\nTotal ', stderr.getvalue())
+
+    @patch('changelet.main.forward')
+    def test_record_and_replay(self, forward_mock):
+        with TemporaryDirectory() as td:
+            fixture = join(td.dirname, 'replay.json')
+            with patch('changelet.command.check.exit') as exit_mock:
+                main(['e*e', '--record', fixture, 'check'], exit_on_error=False)
+            forward_mock.assert_not_called()
+            recorded_code = exit_mock.call_args
+            with open(fixture) as fh:
+                self.assertTrue(load(fh)['calls'])
+
+            # nothing is run, same result
+            with patch('changelet.command.check.exit') as exit_mock, patch(
+                'changelet.github.subprocess_run'
+            ) as run_mock, patch('changelet.github.Popen') as popen_mock:
+                main(
+                    [
+                        'e*e',
+                        '--replay',
+                        fixture,
+                        '--replay-latency',
+                        '0',
+                        'check',
+                    ],
+                    exit_on_error=False,
+                )
+            forward_mock.assert_not_called()
+            run_mock.assert_not_called()
+            popen_mock.assert_not_called()
+            self.assertEqual(recorded_code, exit_mock.call_args)
+
+            # unreadable fixture
+            with patch('sys.stderr', new_callable=StringIO) as stderr:
+                with self.assertRaises(SystemExit) as ctx:
+                    main(
+                        ['e*e', '--replay', join(td.dirname, 'nope'), 'check'],
+                        exit_on_error=False,
+                    )
+            self.assertEqual(1, ctx.exception.code)
+            self.assertIn('Error: ', stderr.getvalue())
+
+    @patch('changelet.main.forward')
+    def test_replay_writes(self, forward_mock):
+        runs = {
+            'bump': 'changelet.command.bump.Bump.run',
+            'check': 'changelet.command.check.Check.run',
+            'create': 'changelet.command.create.Create.run',
+            'import': 'changelet.command.import_.Import.run',
+        }
+        with TemporaryDirectory() as td:
+            fixture = join(td.dirname, 'replay.json')
+            with open(fixture, 'w') as fh:
+                fh.write('{"version": 1, "calls": []}')
+
+            # things that would write the working tree are refused
+            for argv in (
+                ['bump', '--make-changes'],
+                ['bump', '--pr'],
+                ['create', '-t', 'none', 'thing'],
+                ['import', 'v1.0.0'],
+            ):
+                command = argv[0]
+                with patch(runs[command]) as run_mock, patch(
+                    'sys.stderr', new_callable=StringIO
+                ) as stderr:
+                    with self.assertRaises(SystemExit) as ctx:
+                        main(
+                            ['e*e', '--replay', fixture] + argv,
+                            exit_on_error=False,
+                        )
+                    self.assertEqual(1, ctx.exception.code)
+                    self.assertIn(
+                        f'Error: a replayed {command} would still write',
+                        stderr.getvalue(),
+                    )
+                    run_mock.assert_not_called()
+
+                    # unless they're explicitly allowed
+                    main(
+                        ['e*e', '--replay', fixture, '--replay-writes'] + argv,
+                        exit_on_error=False,
+                    )
+                    run_mock.assert_called_once()
+
+            # read-only runs are replayed as is
+            for argv in (
+                ['bump'],
+                ['import', '--dry-run', 'v1.0.0'],
+                ['check'],
+            ):
+                with patch(runs[argv[0]]) as run_mock:
+                    main(
+                        ['e*e', '--replay', fixture] + argv, exit_on_error=False
+                    )
+                run_mock.assert_called_once()
+            forward_mock.assert_not_called()
+
+    def test_only_requested_command_configured(self):
+        cmds = Commands()
+        cmds['check'] = check = MagicMock(description='checks')
+        cmds['other'] = 'does.not.Exist'
+
+        with patch('changelet.main.commands', cmds):
+            main(['e*e', 'check'], exit_on_error=False)
+        check.configure.assert_called_once()
+        check.run.assert_called_once()
+        # never imported
+        self.assertEqual('does.not.Exist', cmds._commands['other'])
+
+    def test_import_time(self):
+        # keep start up lean, e.g. for `check` in pre-push hooks, heavier
+        # dependencies should only be imported on the code paths that use them
+        result = run(
+            [
+                executable,
+                '-c',
+                'import sys; '
+                'from changelet.main import main; '
+                'from changelet.command import commands; '
+                'from changelet.config import Config; '
+                'commands["check"]; '
+                'print("\\n".join(sys.modules))',
+            ],
+            capture_output=True,
+            check=True,
+            cwd=dirname(dirname(__file__)),
+            text=True,
+        )
+        imported = set(result.stdout.split())
+        self.assertTrue('changelet.command.check' in imported)
+        for module in (
+            'changelet.command.bump',
+            'changelet.command.create',
+            'changelet.entry',
+            'hashlib',
+            'semver',
+            'tempfile',
+            'tomllib',
+            'typing',
+            'yaml',
+        ):
+            self.assertFalse(module in imported, module)
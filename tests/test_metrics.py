@@ -0,0 +1,114 @@
+#
+#
+#
+
+from json import load
+from os import stat
+from os.path import join
+from unittest import TestCase
+
+from helpers import TemporaryDirectory
+
+from changelet import metrics
+from changelet.metrics import Metrics
+
+
+class TestMetrics(TestCase):
+
+    def tearDown(self):
+        metrics.stop()
+
+    def test_disabled(self):
+        self.assertIsNone(metrics.stop())
+        # no-op, even for unknown names
+        metrics.inc('changelet_nope')
+
+    def test_counters(self):
+        active = metrics.start()
+        self.assertIsInstance(active, Metrics)
+        metrics.inc('changelet_entries_loaded_total', 3)
+        metrics.inc('changelet_entries_loaded_total', 2)
+        metrics.inc('changelet_subprocesses_total', tool='git')
+        metrics.inc('changelet_subprocesses_total', tool='gh')
+        metrics.inc('changelet_subprocesses_total', tool='git')
+        self.assertIs(active, metrics.stop())
+        # nothing counted once stopped
+        metrics.inc('changelet_entries_loaded_total')
+
+        self.assertEqual(5, active.get('changelet_entries_loaded_total'))
+        self.assertEqual(
+            2, active.get('changelet_subprocesses_total', tool='git')
+        )
+        self.assertEqual(0, active.get('changelet_github_calls_total'))
+
+        with self.assertRaises(ValueError) as ctx:
+            active.inc('changelet_nope')
+        self.assertEqual('Unknown metric "changelet_nope"', str(ctx.exception))
+
+    def test_ratios(self):
+        active = Metrics()
+        self.assertEqual({}, active.ratios())
+        active.inc('changelet_cache_hits_total', 3, cache='entry')
+        active.inc('changelet_cache_misses_total', cache='entry')
+        active.inc('changelet_cache_misses_total', cache='release')
+        active.inc('changelet_entries_loaded_total')
+        self.assertEqual({'entry': 0.75, 'release': 0.0}, active.ratios())
+
+    def test_prometheus(self):
+        active = Metrics()
+        self.assertEqual('', active.prometheus())
+        active.inc('changelet_subprocesses_total', tool='git')
+        active.inc('changelet_subprocesses_total', tool='gh')
+        active.inc('changelet_entries_loaded_total', 12)
+        active.inc('changelet_cache_hits_total', cache='entry')
+        self.assertEqual(
+            '''# HELP changelet_entries_loaded_total Changelog entries loaded
+# TYPE changelet_entries_loaded_total counter
+changelet_entries_loaded_total 12
+# HELP changelet_cache_hits_total Cache lookups that were hits, by cache
+# TYPE changelet_cache_hits_total counter
+changelet_cache_hits_total{cache="entry"} 1
+# HELP changelet_subprocesses_total Subprocesses run, by tool
+# TYPE changelet_subprocesses_total counter
+changelet_subprocesses_total{tool="gh"} 1
+changelet_subprocesses_total{tool="git"} 1
+# HELP changelet_cache_hit_ratio Cache hits over lookups, by cache
+# TYPE changelet_cache_hit_ratio gauge
+changelet_cache_hit_ratio{cache="entry"} 1.0
+''',
+            active.prometheus(),
+        )
+
+    def test_write(self):
+        active = Metrics()
+        active.inc('changelet_github_calls_total', 2)
+        active.inc('changelet_cache_misses_total', cache='release')
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'changelet.prom')
+            active.write(filename)
+            with open(filename) as fh:
+                self.assertEqual(active.prometheus(), fh.read())
+            # readable by collectors
+            self.assertEqual(0o644, stat(filename).st_mode & 0o777)
+
+            filename = join(td.dirname, 'changelet.json')
+            active.write(filename)
+            with open(filename) as fh:
+                self.assertEqual(
+                    {
+                        'counters': [
+                            {
+                                'name': 'changelet_cache_misses_total',
+                                'labels': {'cache': 'release'},
+                                'value': 1,
+                            },
+                            {
+                                'name': 'changelet_github_calls_total',
+                                'labels': {},
+                                'value': 2,
+                            },
+                        ],
+                        'cache_hit_ratios': {'release': 0.0},
+                    },
+                    load(fh),
+                )
@@ -0,0 +1,211 @@
+#
+#
+#
+
+from datetime import datetime, timezone
+from json import dump
+from os import makedirs
+from os.path import join
+from time import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers import TemporaryDirectory
+
+from changelet import metrics
+from changelet.config import Config
+from changelet.entry import Entry
+from changelet.pr import Pr
+from changelet.release import ReleaseCache
+
+
+class DummyProvider:
+
+    def __repr__(self):
+        return 'DummyProvider<>'
+
+
+class StatefulProvider(DummyProvider):
+
+    def __init__(self, value):
+        self.value = value
+
+    def state(self):
+        return self.value
+
+
+class TestReleaseCache(TestCase):
+
+    def config(self, dirname, cache_dir=True):
+        if cache_dir is True:
+            cache_dir = join(dirname, 'cache')
+        config = Config(
+            directory=join(dirname, '.cl'), cache_dir=cache_dir, provider=None
+        )
+        config._provider = DummyProvider()
+        makedirs(config.directory, exist_ok=True)
+        return config
+
+    def entries(self, config):
+        merged_at = datetime(2025, 7, 1, 1, 2, 3, tzinfo=timezone.utc)
+        entries = [
+            Entry(
+                type='minor',
+                description='change 1',
+                pr=Pr(id=1, text='#1', url='http://1', merged_at=merged_at),
+                filename=join(config.directory, 'one.md'),
+            ),
+            Entry(
+                type='patch',
+                description='change 2',
+                filename=join(config.directory, 'two.md'),
+            ),
+        ]
+        for entry in entries:
+            entry.save()
+        return entries
+
+    def test_disabled(self):
+        with TemporaryDirectory() as td:
+            for cache_dir in (None, False):
+                config = self.config(td.dirname, cache_dir=cache_dir)
+                entries = self.entries(config)
+                cache = ReleaseCache(config, '1.0.0')
+                self.assertIsNone(cache.cache)
+                cache.store(entries)
+                self.assertIsNone(cache.load())
+                cache.clear()
+
+    def test_round_trip(self):
+        with TemporaryDirectory() as td:
+            config = self.config(td.dirname)
+            entries = self.entries(config)
+            # non-entry files are ignored
+            with open(join(config.directory, 'README.txt'), 'w') as fh:
+                fh.write('ignored')
+
+            active = metrics.start()
+            cache = ReleaseCache(config, '1.0.0')
+            # nothing stored yet
+            self.assertIsNone(cache.load())
+            cache.store(entries)
+
+            # a new instance w/the same inputs gets the entries back
+            cache = ReleaseCache(config, '1.0.0')
+            loaded = cache.load()
+            metrics.stop()
+            self.assertEqual(
+                1, active.get('changelet_cache_hits_total', cache='release')
+            )
+            self.assertEqual(
+                1, active.get('changelet_cache_misses_total', cache='release')
+            )
+            self.assertEqual(2, len(loaded))
+            for expected, got in zip(entries, loaded):
+                self.assertEqual(expected.type, got.type)
+                self.assertEqual(expected.description, got.description)
+                self.assertEqual(expected.filename, got.filename)
+            self.assertEqual(1, loaded[0].pr.id)
+            self.assertEqual('#1', loaded[0].pr.text)
+            self.assertEqual('http://1', loaded[0].pr.url)
+            self.assertEqual(entries[0].pr.merged_at, loaded[0].pr.merged_at)
+            self.assertIsNone(loaded[1].pr)
+
+            # changes to the README don't matter
+            with open(join(config.directory, 'README.txt'), 'w') as fh:
+                fh.write('still ignored')
+            self.assertIsNotNone(ReleaseCache(config, '1.0.0').load())
+
+            # a different current version is a miss
+            self.assertIsNone(ReleaseCache(config, '1.0.1').load())
+
+            # a different provider is a miss
+            config._provider = 'other'
+            self.assertIsNone(ReleaseCache(config, '1.0.0').load())
+            config._provider = DummyProvider()
+
+            # as is a change in the provider's state, e.g. newly merged PRs
+            config._provider = StatefulProvider('a')
+            ReleaseCache(config, '1.0.0').store(entries)
+            self.assertIsNotNone(ReleaseCache(config, '1.0.0').load())
+            config._provider.value = 'b'
+            self.assertIsNone(ReleaseCache(config, '1.0.0').load())
+            config._provider = DummyProvider()
+            ReleaseCache(config, '1.0.0').store(entries)
+
+            # and an old one
+            with patch('changelet.release.time') as time_mock:
+                time_mock.return_value = time() + ReleaseCache.MAX_AGE + 1
+                self.assertIsNone(ReleaseCache(config, '1.0.0').load())
+            self.assertIsNotNone(ReleaseCache(config, '1.0.0').load())
+
+            # an edited entry is a miss
+            entries[1].description = 'edited'
+            entries[1].save()
+            self.assertIsNone(ReleaseCache(config, '1.0.0').load())
+            entries[1].description = 'change 2'
+            entries[1].save()
+            self.assertIsNotNone(ReleaseCache(config, '1.0.0').load())
+
+            # an added entry is a miss
+            Entry(
+                type='none',
+                description='new',
+                filename=join(config.directory, 'three.md'),
+            ).save()
+            self.assertIsNone(ReleaseCache(config, '1.0.0').load())
+
+            # clear removes it
+            cache = ReleaseCache(config, '1.0.0')
+            cache.store(entries)
+            self.assertIsNotNone(cache.load())
+            cache.clear()
+            self.assertIsNone(cache.load())
+
+    def test_missing_directory(self):
+        with TemporaryDirectory() as td:
+            config = Config(
+                directory=join(td.dirname, 'nope'),
+                cache_dir=join(td.dirname, 'cache'),
+                provider=None,
+            )
+            config._provider = DummyProvider()
+            cache = ReleaseCache(config, '1.0.0')
+            cache.store([])
+            self.assertEqual([], ReleaseCache(config, '1.0.0').load())
+
+    def test_unwritable_cache_dir(self):
+        with TemporaryDirectory() as td:
+            blocker = join(td.dirname, 'blocker')
+            with open(blocker, 'w') as fh:
+                fh.write('')
+            config = self.config(td.dirname, cache_dir=join(blocker, 'cache'))
+            entries = self.entries(config)
+            cache = ReleaseCache(config, '1.0.0')
+            # not fatal, just not cached
+            cache.store(entries)
+            self.assertIsNone(cache.load())
+
+    def test_unusable_data(self):
+        with TemporaryDirectory() as td:
+            config = self.config(td.dirname)
+            cache = ReleaseCache(config, '1.0.0')
+            filename = join(config.cache_dir, 'release.json')
+            makedirs(config.cache_dir)
+
+            # matching digest, but the entries are bad
+            with open(filename, 'w') as fh:
+                dump(
+                    {
+                        'digest': cache.digest,
+                        'created': time(),
+                        'entries': [{'type': 'x'}],
+                    },
+                    fh,
+                )
+            self.assertIsNone(cache.load())
+
+            # no digest
+            with open(filename, 'w') as fh:
+                dump({}, fh)
+            self.assertIsNone(cache.load())
@@ -0,0 +1,205 @@
+#
+#
+#
+
+from datetime import datetime
+from unittest import TestCase
+
+from changelet.entry import Entry
+from changelet.pr import Pr
+from changelet.render import FORMATS, Format, _compile, formats, render
+
+
+class TestRender(TestCase):
+
+    def entries(self):
+        merged_at = datetime(2025, 7, 1, 1, 2, 3)
+        return [
+            Entry(
+                type='major',
+                description='change <3>',
+                pr=Pr(
+                    id=3, text='#3', url='http://3/?a&b', merged_at=merged_at
+                ),
+            ),
+            Entry(
+                type='minor',
+                description='change 2',
+                pr=Pr(id=2, text='#2', url='http://2', merged_at=merged_at),
+            ),
+            Entry(type='minor', description='change 2.1'),
+            Entry(type='none', description='change 1'),
+        ]
+
+    def test_repr(self):
+        # smoke
+        FORMATS['markdown'].__repr__()
+
+    def test_markdown(self):
+        rendered = render(
+            version='1.0.0',
+            entries=self.entries(),
+            date='2025-07-04',
+            title='The Title',
+        )
+        self.assertEqual(['markdown'], list(rendered.keys()))
+        self.assertEqual(
+            '''## 1.0.0 - 2025-07-04 - The Title
+
+Major:
+* change <3> - [#3](http://3/?a&b)
+
+Minor:
+* change 2 - [#2](http://2)
+* change 2.1
+
+''',
+            rendered['markdown'],
+        )
+
+    def test_all_formats(self):
+        rendered = render(
+            version='1.0.0',
+            entries=self.entries(),
+            date='2025-07-04',
+            names=('markdown', 'rst', 'html', 'text'),
+        )
+        self.assertEqual(
+            ['markdown', 'rst', 'html', 'text'], list(rendered.keys())
+        )
+        self.assertEqual(
+            '''1.0.0 - 2025-07-04
+==================
+
+Major:
+
+* change <3> - `#3 <http://3/?a&b>`_
+
+Minor:
+
+* change 2 - `#2 <http://2>`_
+* change 2.1
+
+''',
+            rendered['rst'],
+        )
+        self.assertEqual(
+            '''<h2>1.0.0 - 2025-07-04</h2>
+<h3>Major</h3>
+<ul>
+<li>change &lt;3&gt; - <a href="http://3/?a&amp;b">#3</a></li>
+</ul>
+<h3>Minor</h3>
+<ul>
+<li>change 2 - <a href="http://2">#2</a></li>
+<li>change 2.1</li>
+</ul>
+''',
+            rendered['html'],
+        )
+        self.assertEqual(
+            '''1.0.0 - 2025-07-04
+
+Major:
+* change <3> - http://3/?a&b
+
+Minor:
+* change 2 - http://2
+* change 2.1
+
+''',
+            rendered['text'],
+        )
+
+    def test_no_listed_entries(self):
+        # only type none, nothing listed, but sections are still well formed
+        rendered = render(
+            version='1.0.1',
+            entries=[Entry(type='none', description='hidden')],
+            date='2025-07-04',
+            names=('markdown', 'html'),
+        )
+        self.assertEqual('## 1.0.1 - 2025-07-04\n\n', rendered['markdown'])
+        self.assertEqual('<h2>1.0.1 - 2025-07-04</h2>\n', rendered['html'])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError) as ctx:
+            render(
+                version='1.0.0', entries=[], date='2025-07-04', names=('pdf',)
+            )
+        self.assertEqual("Unknown format 'pdf'", str(ctx.exception))
+
+    def test_templates(self):
+        # no overrides is the builtins
+        self.assertIs(FORMATS, formats())
+        self.assertIs(FORMATS, formats({}))
+
+        templates = {
+            'markdown': {'header': '# $version ($date)$title\n', 'pr': ''}
+        }
+        available = formats(templates)
+        # builtins are left alone
+        self.assertEqual('## $heading\n', FORMATS['markdown'].header)
+        self.assertEqual(
+            '# $version ($date)$title\n', available['markdown'].header
+        )
+        # non-overridden parts carry over
+        self.assertEqual(FORMATS['markdown'].entry, available['markdown'].entry)
+        self.assertIs(FORMATS['html'], available['html'])
+
+        rendered = render(
+            version='1.0.0',
+            entries=self.entries(),
+            date='2025-07-04',
+            templates=templates,
+        )
+        self.assertEqual(
+            '''# 1.0.0 (2025-07-04)
+
+Major:
+* change <3>
+
+Minor:
+* change 2
+* change 2.1
+
+''',
+            rendered['markdown'],
+        )
+
+        with self.assertRaises(ValueError) as ctx:
+            formats({'pdf': {'header': ''}})
+        self.assertEqual(
+            'Unknown format "pdf" in templates', str(ctx.exception)
+        )
+
+        with self.assertRaises(ValueError) as ctx:
+            formats({'text': {'heading': ''}})
+        self.assertEqual(
+            'Invalid template part(s) for format "text"', str(ctx.exception)
+        )
+
+        with self.assertRaises(ValueError) as ctx:
+            formats(['text'])
+        self.assertEqual(
+            'templates must map format names to parts', str(ctx.exception)
+        )
+
+    def test_compile_cache(self):
+        # identical content is only compiled once
+        self.assertIs(
+            _compile('* $description\n'), _compile('* $description\n')
+        )
+        fmt = Format(
+            name='custom',
+            header='$heading\n',
+            section_start='$type\n',
+            entry='* $description\n',
+            pr='',
+        )
+        self.assertIs(
+            fmt.compiled()['entry'],
+            FORMATS['markdown']
+            .override(entry='* $description\n')
+            .compiled()['entry'],
+        )
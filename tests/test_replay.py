@@ -0,0 +1,207 @@
+#
+#
+#
+
+from json import load
+from os.path import exists, join
+from subprocess import PIPE, CalledProcessError, CompletedProcess
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from helpers import TemporaryDirectory
+
+from changelet.config import Config
+from changelet.replay import (
+    RecordingGitHubCli,
+    ReplayException,
+    ReplayGitHubCli,
+    install,
+)
+
+
+class TestRecordAndReplay(TestCase):
+
+    def record(self, fixture):
+        provider = RecordingGitHubCli(fixture=fixture, max_lookback=3)
+
+        with patch('changelet.github.subprocess_run') as run_mock:
+            # bytes
+            run_mock.return_value = CompletedProcess(
+                [], 0, b'{"nameWithOwner": "org/repo"}', None
+            )
+            self.assertEqual(
+                {'nameWithOwner': 'org/repo'},
+                provider._run(
+                    ['gh', 'repo', 'view', '--json', 'nameWithOwner']
+                ),
+            )
+            # text, w/input
+            run_mock.return_value = CompletedProcess([], 0, 'out\n', 'warn\n')
+            provider._run_with_input(
+                ['git', 'commit', '-F', '-'], 'message', capture_output=True
+            )
+            # failures are recorded & still raised
+            run_mock.side_effect = CalledProcessError(
+                128, ['git', 'thing'], b'', b'\xffbad\n'
+            )
+            with self.assertRaises(CalledProcessError):
+                provider._exec(['git', 'thing'], check=True, stdout=PIPE)
+            # a second, different, answer to the same command
+            run_mock.side_effect = None
+            run_mock.return_value = CompletedProcess([], 0, b'ok\n', None)
+            provider._exec(['git', 'thing'], check=True, stdout=PIPE)
+
+        with patch('changelet.github.Popen') as popen_mock:
+            proc = popen_mock.return_value
+            proc.communicate.return_value = ('a\nb\n', '')
+            proc.returncode = 0
+            process = provider._open(['git', 'stream'], text=True, stdout=PIPE)
+            with process:
+                self.assertEqual(['a\n', 'b\n'], list(process.stdout))
+            self.assertEqual(0, process.returncode)
+            proc.communicate.assert_called_once_with(None)
+            popen_mock.assert_called_once_with(
+                ['git', 'stream'], text=True, stdout=PIPE
+            )
+
+        return provider
+
+    def test_record(self):
+        with TemporaryDirectory() as td:
+            fixture = join(td.dirname, 'replay.json')
+            provider = self.record(fixture)
+            # rewritten atomically
+            self.assertFalse(exists(f'{fixture}.tmp'))
+            with open(fixture) as fh:
+                data = load(fh)
+            self.assertEqual(1, data['version'])
+            self.assertEqual(provider.calls, data['calls'])
+            calls = data['calls']
+            self.assertEqual(
+                [
+                    ['gh', 'repo', 'view', '--json', 'nameWithOwner'],
+                    ['git', 'commit', '-F', '-'],
+                    ['git', 'thing'],
+                    ['git', 'thing'],
+                    ['git', 'stream'],
+                ],
+                [c['cmd'] for c in calls],
+            )
+            first = calls[0]
+            self.assertIsNone(first['input'])
+            self.assertEqual(0, first['returncode'])
+            self.assertTrue(first['binary'])
+            self.assertGreaterEqual(first['duration'], 0)
+            second = calls[1]
+            self.assertEqual('message', second['input'])
+            self.assertEqual('out\n', second['stdout'])
+            self.assertEqual('warn\n', second['stderr'])
+            self.assertFalse(second['binary'])
+            self.assertEqual(128, calls[2]['returncode'])
+            self.assertEqual('a\nb\n', calls[4]['stdout'])
+
+    @patch('changelet.replay.sleep')
+    @patch('changelet.github.Popen')
+    @patch('changelet.github.subprocess_run')
+    def test_replay(self, run_mock, popen_mock, sleep_mock):
+        with TemporaryDirectory() as td:
+            fixture = join(td.dirname, 'replay.json')
+            self.record(fixture)
+            run_mock.reset_mock()
+            popen_mock.reset_mock()
+
+            provider = ReplayGitHubCli(fixture=fixture)
+            self.assertEqual(
+                {'nameWithOwner': 'org/repo'},
+                provider._run(
+                    ['gh', 'repo', 'view', '--json', 'nameWithOwner']
+                ),
+            )
+
+            result = provider._run_with_input(
+                ['git', 'commit', '-F', '-'], 'message', capture_output=True
+            )
+            self.assertEqual(0, result.returncode)
+            self.assertEqual('out\n', result.stdout)
+            self.assertEqual('warn\n', result.stderr)
+            # w/o capturing there's no output
+            result = provider._exec(['git', 'commit', '-F', '-'])
+            self.assertIsNone(result.stdout)
+            self.assertIsNone(result.stderr)
+
+            # answered in recorded order, the last one repeating
+            with self.assertRaises(CalledProcessError) as ctx:
+                provider._exec(['git', 'thing'], check=True, stdout=PIPE)
+            self.assertEqual(128, ctx.exception.returncode)
+            self.assertEqual(b'\xffbad\n', ctx.exception.stderr)
+            for _ in range(2):
+                result = provider._exec(['git', 'thing'], stdout=PIPE)
+                self.assertEqual(b'ok\n', result.stdout)
+
+            # unchecked failures are returned
+            provider = ReplayGitHubCli(fixture=fixture)
+            result = provider._exec(['git', 'thing'], stdout=PIPE)
+            self.assertEqual(128, result.returncode)
+
+            process = provider._open(['git', 'stream'], text=True, stdout=PIPE)
+            with process:
+                self.assertEqual(['a\n', 'b\n'], list(process.stdout))
+                # read once
+                self.assertIs(process.stdout, process.stdout)
+            self.assertEqual(0, process.returncode)
+            self.assertEqual(('a\nb\n', ''), process.communicate(None))
+
+            with self.assertRaises(ReplayException) as ctx:
+                provider._exec(['git', 'unknown'])
+            self.assertEqual(
+                f'No recording of `git unknown` in {fixture}',
+                str(ctx.exception),
+            )
+
+            # nothing was ever run
+            run_mock.assert_not_called()
+            popen_mock.assert_not_called()
+            sleep_mock.assert_not_called()
+
+            # latency, on its own and w/the recorded durations
+            provider = ReplayGitHubCli(fixture=fixture, latency=0.5)
+            provider._exec(['git', 'stream'])
+            sleep_mock.assert_called_once_with(0.5)
+            sleep_mock.reset_mock()
+            provider = ReplayGitHubCli(
+                fixture=fixture, latency=0.5, realtime=True
+            )
+            provider._exec(['git', 'stream'])
+            (delay,), _ = sleep_mock.call_args
+            self.assertGreaterEqual(delay, 0.5)
+
+    def test_install(self):
+        with TemporaryDirectory() as td:
+            fixture = join(td.dirname, 'replay.json')
+            config = Config(
+                provider={
+                    'class': 'changelet.github.GitHubCli',
+                    'max_lookback': 42,
+                }
+            )
+            provider = install(config, record=fixture)
+            self.assertIsInstance(provider, RecordingGitHubCli)
+            self.assertIs(provider, config.provider)
+            # settings are kept
+            self.assertEqual(42, provider.max_lookback)
+
+            self.record(fixture)
+            config = Config()
+            provider = install(config, replay=fixture, latency=1, realtime=True)
+            self.assertIsInstance(provider, ReplayGitHubCli)
+            self.assertIs(provider, config.provider)
+            self.assertEqual(1, provider.latency)
+            self.assertTrue(provider.realtime)
+
+            config = Config(provider={'class': MagicMock})
+            with self.assertRaises(ReplayException) as ctx:
+                install(config, replay=fixture)
+            self.assertEqual(
+                'Record & replay are only supported w/the GitHubCli provider',
+                str(ctx.exception),
+            )
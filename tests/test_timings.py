@@ -0,0 +1,69 @@
+#
+#
+#
+
+from io import StringIO
+from unittest import TestCase
+
+from changelet import timings
+from changelet.timings import Timings
+
+
+class TestTimings(TestCase):
+
+    def tearDown(self):
+        timings.stop()
+
+    def test_disabled(self):
+        # no-ops w/o being started
+        self.assertIsNone(timings.stop())
+        with timings.phase('nothing'):
+            pass
+        with timings.command(['git', 'status']):
+            pass
+        self.assertIs(timings.phase('a'), timings.phase('b'))
+
+    def test_recording(self):
+        active = timings.start()
+        self.assertIsInstance(active, Timings)
+        for _ in range(2):
+            with timings.phase('outer'):
+                with timings.phase('inner'):
+                    pass
+        with timings.command(['git', 'diff', '--name-only']):
+            pass
+        with self.assertRaises(ValueError):
+            with timings.command(['gh', 'pr', 'list']):
+                raise ValueError('boom')
+        self.assertIs(active, timings.stop())
+        # nothing recorded once stopped
+        with timings.phase('after'):
+            pass
+
+        self.assertEqual(['outer', 'inner'], list(active.phases))
+        self.assertEqual(2, active.phases['outer'][0])
+        count, total, longest = active.phases['inner']
+        self.assertEqual(2, count)
+        self.assertLessEqual(longest, total)
+        # failures are still timed
+        self.assertEqual(['git diff', 'gh pr'], list(active.commands))
+        self.assertEqual(1, active.commands['gh pr'][0])
+
+        fh = StringIO()
+        active.report(fh)
+        lines = fh.getvalue().split('\n')
+        self.assertTrue(lines[0].startswith('Phase '))
+        self.assertTrue(lines[1].startswith('outer '))
+        self.assertTrue(lines[2].startswith('inner '))
+        self.assertEqual('', lines[3])
+        self.assertTrue(lines[4].startswith('Subprocess '))
+        self.assertTrue(lines[5].startswith('git diff '))
+        self.assertTrue(lines[-2].startswith('Total '))
+
+    def test_report_no_commands(self):
+        active = Timings()
+        with active.phase('only'):
+            pass
+        fh = StringIO()
+        active.report(fh)
+        self.assertNotIn('Subprocess', fh.getvalue())
@@ -0,0 +1,172 @@
+#
+#
+#
+
+from json import load
+from os.path import join
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers import TemporaryDirectory
+
+from changelet import __version__, trace
+from changelet.trace import Span, Tracer, span, traced
+
+
+class TestTrace(TestCase):
+
+    def tearDown(self):
+        trace.stop()
+
+    def test_disabled(self):
+        self.assertIsNone(trace.stop())
+        with span('nothing', {'a': 1}) as s:
+            s.set('b', 2)
+            s.error('ignored')
+        self.assertIs(span('a'), span('b'))
+
+        @traced('thing')
+        def thing(a, b=2):
+            return a + b
+
+        self.assertEqual(3, thing(1))
+
+    def test_spans(self):
+        tracer = trace.start()
+        self.assertIsInstance(tracer, Tracer)
+
+        @traced('leaf')
+        def leaf():
+            with span('inner', {'n': 1}) as s:
+                s.set('size', 42)
+
+        with span('root', {'changelet.command': 'check'}) as root:
+            leaf()
+            with self.assertRaises(ValueError):
+                with span('fails'):
+                    raise ValueError('boom')
+            # spans from other threads are still recorded
+            thread = Thread(target=leaf)
+            thread.start()
+            thread.join()
+        with self.assertRaises(SystemExit):
+            with span('exits'):
+                raise SystemExit(1)
+        with self.assertRaises(SystemExit):
+            with span('exits-ok'):
+                raise SystemExit(0)
+        self.assertIs(tracer, trace.stop())
+
+        spans = {s.name: s for s in tracer.spans}
+        self.assertEqual(8, len(tracer.spans))
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(root.span_id, spans['fails'].parent_id)
+        # parents follow the call stack
+        leaf_span = [
+            s for s in tracer.spans if s.name == 'leaf' and s.parent_id
+        ][0]
+        self.assertEqual(root.span_id, leaf_span.parent_id)
+        inner = [s for s in tracer.spans if s.parent_id == leaf_span.span_id]
+        self.assertEqual(['inner'], [s.name for s in inner])
+        self.assertEqual({'n': 1, 'size': 42}, inner[0].attributes)
+        self.assertEqual({tracer.trace_id}, {s.trace_id for s in tracer.spans})
+        self.assertEqual(trace.STATUS_ERROR, spans['fails'].status)
+        self.assertEqual('ValueError: boom', spans['fails'].message)
+        self.assertEqual(trace.STATUS_ERROR, spans['exits'].status)
+        self.assertEqual(1, spans['exits'].attributes['process.exit.code'])
+        self.assertEqual(trace.STATUS_UNSET, spans['exits-ok'].status)
+        self.assertEqual(0, spans['exits-ok'].attributes['process.exit.code'])
+        self.assertLessEqual(root.start, root.end)
+        # smoke
+        repr(root)
+
+    def test_traceparent(self):
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        with patch.dict(
+            'os.environ', {'TRACEPARENT': f'00-{trace_id}-00f067aa0ba902b7-01'}
+        ):
+            tracer = trace.start()
+        with span('root') as root:
+            pass
+        self.assertEqual(trace_id, root.trace_id)
+        self.assertEqual('00f067aa0ba902b7', root.parent_id)
+
+        # garbage is ignored
+        tracer = Tracer('nope')
+        self.assertEqual(32, len(tracer.trace_id))
+        self.assertIsNone(tracer.parent_id)
+
+    def test_otlp(self):
+        span = Span(
+            name='git diff',
+            trace_id='t' * 32,
+            parent_id='p' * 16,
+            attributes={
+                'process.command_line': 'git diff',
+                'process.exit.code': 0,
+                'ok': True,
+                'ratio': 0.5,
+                'paths': ['a', 'b'],
+            },
+        )
+        span.end = span.start + 10
+        span.error('bad')
+        otlp = span.otlp()
+        self.assertEqual('p' * 16, otlp['parentSpanId'])
+        self.assertEqual(str(span.start + 10), otlp['endTimeUnixNano'])
+        self.assertEqual({'code': 2, 'message': 'bad'}, otlp['status'])
+        self.assertEqual(
+            [
+                {
+                    'key': 'process.command_line',
+                    'value': {'stringValue': 'git diff'},
+                },
+                {'key': 'process.exit.code', 'value': {'intValue': '0'}},
+                {'key': 'ok', 'value': {'boolValue': True}},
+                {'key': 'ratio', 'value': {'doubleValue': 0.5}},
+                {
+                    'key': 'paths',
+                    'value': {
+                        'arrayValue': {
+                            'values': [
+                                {'stringValue': 'a'},
+                                {'stringValue': 'b'},
+                            ]
+                        }
+                    },
+                },
+            ],
+            otlp['attributes'],
+        )
+
+        # roots have no parent
+        span.parent_id = None
+        span.status = trace.STATUS_UNSET
+        span.message = None
+        otlp = span.otlp()
+        self.assertNotIn('parentSpanId', otlp)
+        self.assertEqual({'code': 0}, otlp['status'])
+
+    def test_export(self):
+        tracer = trace.start()
+        with span('b'):
+            with span('a'):
+                pass
+        trace.stop()
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'trace.json')
+            tracer.export(filename)
+            with open(filename) as fh:
+                data = load(fh)
+        resource_spans = data['resourceSpans'][0]
+        self.assertEqual(
+            [{'key': 'service.name', 'value': {'stringValue': 'changelet'}}],
+            resource_spans['resource']['attributes'],
+        )
+        scope_spans = resource_spans['scopeSpans'][0]
+        self.assertEqual(
+            {'name': 'changelet', 'version': __version__}, scope_spans['scope']
+        )
+        # in the order they started
+        self.assertEqual(['b', 'a'], [s['name'] for s in scope_spans['spans']])
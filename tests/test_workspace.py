@@ -0,0 +1,136 @@
+#
+#
+#
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from changelet.config import Config
+from changelet.workspace import (
+    WorkspaceException,
+    index_prs,
+    map_packages,
+    package_configs,
+    sources,
+)
+
+
+class TestWorkspace(TestCase):
+
+    def test_package_configs(self):
+        provider = MagicMock()
+        config = Config(
+            root='mono',
+            commit_prefix='cl: ',
+            provider={'class': MagicMock(return_value=provider)},
+            templates={'text': {'header': 'x'}},
+            cache_dir=False,
+            packages=[
+                {'name': 'one'},
+                {
+                    'name': 'two',
+                    'root': 'libs/the-two',
+                    'directory': 'changes',
+                    'module': 'two',
+                },
+            ],
+        )
+
+        configs = package_configs(config)
+        self.assertEqual(['one', 'two'], [n for n, _ in configs])
+        one = configs[0][1]
+        self.assertEqual('mono/one', one.root)
+        self.assertEqual('mono/one/.changelog', one.directory)
+        self.assertEqual('one', one.module)
+        self.assertEqual('cl: ', one.commit_prefix)
+        self.assertEqual({'text': {'header': 'x'}}, one.templates)
+        self.assertFalse(one.cache_dir)
+        two = configs[1][1]
+        self.assertEqual('mono/libs/the-two', two.root)
+        self.assertEqual('mono/libs/the-two/changes', two.directory)
+        self.assertEqual('two', two.module)
+        # a single, shared, provider
+        self.assertIs(provider, one.provider)
+        self.assertIs(provider, two.provider)
+
+        # limited
+        self.assertEqual(
+            ['two'], [n for n, _ in package_configs(config, ['two'])]
+        )
+        with self.assertRaises(WorkspaceException) as ctx:
+            package_configs(config, ['two', 'z', 'a'])
+        self.assertEqual('Unknown package(s) a, z', str(ctx.exception))
+
+        # module defaults to the root's basename
+        config.packages = [{'name': 'x', 'root': 'the-x'}]
+        self.assertEqual('the_x', package_configs(config)[0][1].module)
+
+        # normalized, e.g. w/`-r .`
+        config.root = '.'
+        config.packages = [{'name': 'core', 'directory': './changes/'}]
+        core = package_configs(config)[0][1]
+        self.assertEqual('core', core.root)
+        self.assertEqual('core/changes', core.directory)
+
+        # no packages
+        config.packages = None
+        self.assertEqual([], package_configs(config))
+
+    def test_map_packages(self):
+        configs = [(str(i), MagicMock(value=i)) for i in range(10)]
+        self.assertEqual(
+            [i * 2 for i in range(10)],
+            map_packages(lambda c: c.value * 2, configs, max_workers=4),
+        )
+
+    def test_index_prs(self):
+        provider = MagicMock()
+        config = Config(
+            root='mono',
+            provider={'class': MagicMock(return_value=provider)},
+            packages=[{'name': 'one'}, {'name': 'two'}],
+        )
+        configs = package_configs(config)
+
+        index_prs(config, configs)
+        provider.index.assert_called_once_with(
+            root='mono',
+            directories=['mono/one/.changelog', 'mono/two/.changelog'],
+        )
+
+        # nothing to index
+        provider.index.reset_mock()
+        index_prs(config, [])
+        provider.index.assert_not_called()
+
+        # providers w/o index support are left to build them as needed
+        config = Config(
+            provider={'class': MagicMock(return_value=object())},
+            packages=[{'name': 'one'}],
+        )
+        index_prs(config, package_configs(config))
+
+    def test_sources(self):
+        config = Config(
+            packages=[
+                {'name': 'one', 'root': 'pkgs/one'},
+                {'name': 'two', 'root': 'pkgs/two', 'directory': 'cl'},
+            ]
+        )
+        self.assertEqual(
+            [('pkgs/one', 'pkgs/one/.changelog'), ('pkgs/two', 'pkgs/two/cl')],
+            sources(config),
+        )
+        self.assertEqual(
+            [('pkgs/two', 'pkgs/two/cl')], sources(config, ['two'])
+        )
+
+        # explicit sources win
+        config.sources = {'src/b': 'b/.changelog', 'src/a': 'a/.changelog'}
+        self.assertEqual(
+            [('src/a', 'a/.changelog'), ('src/b', 'b/.changelog')],
+            sources(config),
+        )
+
+        config = Config()
+        self.assertEqual([], sources(config))